@@ -22,41 +22,43 @@ namespace FsxProtocol {
     static FsxReflection() {
       byte[] descriptorData = global::System.Convert.FromBase64String(
           string.Concat(
-            "Cglmc3gucHJvdG8SC0ZzeFByb3RvY29sIuwDChFUY3BSZXF1ZXN0TWVzc2Fn",
+            "Cglmc3gucHJvdG8SC0ZzeFByb3RvY29sIoIEChFUY3BSZXF1ZXN0TWVzc2Fn",
             "ZRI3Cgdtc2dUeXBlGAEgASgOMiYuRnN4UHJvdG9jb2wuVGNwUmVxdWVzdE1l",
             "c3NhZ2UuTXNnVHlwZRJFCg1zZXRDb25maWdCb2R5GAIgASgLMiwuRnN4UHJv",
             "dG9jb2wuVGNwUmVxdWVzdE1lc3NhZ2UuU2V0Q29uZmlnQm9keUgAEjsKCHBp",
             "bmdCb2R5GAMgASgLMicuRnN4UHJvdG9jb2wuVGNwUmVxdWVzdE1lc3NhZ2Uu",
             "UGluZ0JvZHlIABJDCgx0ZXN0Q29ubkJvZHkYBCABKAsyKy5Gc3hQcm90b2Nv",
             "bC5UY3BSZXF1ZXN0TWVzc2FnZS5UZXN0Q29ubkJvZHlIABoyCg1TZXRDb25m",
-            "aWdCb2R5Eg8KB3VkcFBvcnQYASABKAUSEAoIdWRwVG9rZW4YAiABKAUaHQoI",
-            "UGluZ0JvZHkSEQoJdGltZVN0YW1wGAEgASgFGiIKDFRlc3RDb25uQm9keRIS",
-            "CgptYWdpY1Rva2VuGAEgASgFIlMKB01zZ1R5cGUSFwoTTVNHX1RZUEVfU0VU",
-            "X0NPTkZJRxAAEhEKDU1TR19UWVBFX1BJTkcQARIcChhNU0dfVFlQRV9URVNU",
-            "X0NPTk5FQ1RJT04QAkIJCgdtc2dCb2R5IjgKElRjcFJlc3BvbnNlTWVzc2Fn",
-            "ZRIPCgdzdWNjZXNzGAEgASgIEhEKCXRpbWVTdGFtcBgCIAEoBSLIBAoSVWRw",
-            "UmVzcG9uc2VNZXNzYWdlEjgKB21zZ1R5cGUYASABKA4yJy5Gc3hQcm90b2Nv",
-            "bC5VZHBSZXNwb25zZU1lc3NhZ2UuTXNnVHlwZRIUCgxzZXJpYWxOdW1iZXIY",
-            "AiABKAUSDQoFdG9rZW4YAyABKAUSVAoUdGVzdENvbm5DYWxsYmFja0JvZHkY",
-            "BCABKAsyNC5Gc3hQcm90b2NvbC5VZHBSZXNwb25zZU1lc3NhZ2UuVGVzdENv",
-            "bm5DYWxsYmFja0JvZHlIABJUChR0cmFuc21pc3Npb25EYXRhQm9keRgFIAEo",
-            "CzI0LkZzeFByb3RvY29sLlVkcFJlc3BvbnNlTWVzc2FnZS5UcmFuc21pc3Np",
-            "b25EYXRhQm9keUgAGioKFFRlc3RDb25uQ2FsbGJhY2tCb2R5EhIKCm1hZ2lj",
-            "VG9rZW4YASABKAUanQEKFFRyYW5zbWlzc2lvbkRhdGFCb2R5EhUKDXhBY2Nl",
-            "bGVyYXRpb24YASABKAESFQoNeUFjY2VsZXJhdGlvbhgCIAEoARIVCg16QWNj",
-            "ZWxlcmF0aW9uGAMgASgBEhUKDXBpdGNoVmVsb2NpdHkYBCABKAESFAoMcm9s",
-            "bFZlbG9jaXR5GAUgASgBEhMKC3lhd1ZlbG9jaXR5GAYgASgBIlAKB01zZ1R5",
-            "cGUSJQohTVNHX1RZUEVfVEVTVF9DT05ORUNUSU9OX0NBTExCQUNLEAASHgoa",
-            "TVNHX1RZUEVfVFJBTlNNSVNTSU9OX0RBVEEQAUIJCgdtc2dCb2R5YgZwcm90",
-            "bzM="));
+            "aWdCb2R5Eg8KB3VkcFBvcnQYASABKAUSEAoIdWRwVG9rZW4YAiABKAUaMwoI",
+            "UGluZ0JvZHkSEQoJdGltZVN0YW1wGAEgASgFEhQKDG9yaWdpblRpbWVVcxgC",
+            "IAEoAxoiCgxUZXN0Q29ubkJvZHkSEgoKbWFnaWNUb2tlbhgBIAEoBSJTCgdN",
+            "c2dUeXBlEhcKE01TR19UWVBFX1NFVF9DT05GSUcQABIRCg1NU0dfVFlQRV9Q",
+            "SU5HEAESHAoYTVNHX1RZUEVfVEVTVF9DT05ORUNUSU9OEAJCCQoHbXNnQm9k",
+            "eSJ9ChJUY3BSZXNwb25zZU1lc3NhZ2USDwoHc3VjY2VzcxgBIAEoCBIRCgl0",
+            "aW1lU3RhbXAYAiABKAUSFAoMb3JpZ2luVGltZVVzGAMgASgDEhUKDXJlY2Vp",
+            "dmVUaW1lVXMYBCABKAMSFgoOdHJhbnNtaXRUaW1lVXMYBSABKAMi3AQKElVk",
+            "cFJlc3BvbnNlTWVzc2FnZRI4Cgdtc2dUeXBlGAEgASgOMicuRnN4UHJvdG9j",
+            "b2wuVWRwUmVzcG9uc2VNZXNzYWdlLk1zZ1R5cGUSFAoMc2VyaWFsTnVtYmVy",
+            "GAIgASgFEg0KBXRva2VuGAMgASgFElQKFHRlc3RDb25uQ2FsbGJhY2tCb2R5",
+            "GAQgASgLMjQuRnN4UHJvdG9jb2wuVWRwUmVzcG9uc2VNZXNzYWdlLlRlc3RD",
+            "b25uQ2FsbGJhY2tCb2R5SAASVAoUdHJhbnNtaXNzaW9uRGF0YUJvZHkYBSAB",
+            "KAsyNC5Gc3hQcm90b2NvbC5VZHBSZXNwb25zZU1lc3NhZ2UuVHJhbnNtaXNz",
+            "aW9uRGF0YUJvZHlIABISCgpzZW5kVGltZVVzGAYgASgDGioKFFRlc3RDb25u",
+            "Q2FsbGJhY2tCb2R5EhIKCm1hZ2ljVG9rZW4YASABKAUanQEKFFRyYW5zbWlz",
+            "c2lvbkRhdGFCb2R5EhUKDXhBY2NlbGVyYXRpb24YASABKAESFQoNeUFjY2Vs",
+            "ZXJhdGlvbhgCIAEoARIVCg16QWNjZWxlcmF0aW9uGAMgASgBEhUKDXBpdGNo",
+            "VmVsb2NpdHkYBCABKAESFAoMcm9sbFZlbG9jaXR5GAUgASgBEhMKC3lhd1Zl",
+            "bG9jaXR5GAYgASgBIlAKB01zZ1R5cGUSJQohTVNHX1RZUEVfVEVTVF9DT05O",
+            "RUNUSU9OX0NBTExCQUNLEAASHgoaTVNHX1RZUEVfVFJBTlNNSVNTSU9OX0RB",
+            "VEEQAUIJCgdtc2dCb2R5YgZwcm90bzM="));
       descriptor = pbr::FileDescriptor.FromGeneratedCode(descriptorData,
           new pbr::FileDescriptor[] { },
           new pbr::GeneratedClrTypeInfo(null, new pbr::GeneratedClrTypeInfo[] {
             new pbr::GeneratedClrTypeInfo(typeof(global::FsxProtocol.TcpRequestMessage), global::FsxProtocol.TcpRequestMessage.Parser, new[]{ "MsgType", "SetConfigBody", "PingBody", "TestConnBody" }, new[]{ "MsgBody" }, new[]{ typeof(global::FsxProtocol.TcpRequestMessage.Types.MsgType) }, new pbr::GeneratedClrTypeInfo[] { new pbr::GeneratedClrTypeInfo(typeof(global::FsxProtocol.TcpRequestMessage.Types.SetConfigBody), global::FsxProtocol.TcpRequestMessage.Types.SetConfigBody.Parser, new[]{ "UdpPort", "UdpToken" }, null, null, null),
-            new pbr::GeneratedClrTypeInfo(typeof(global::FsxProtocol.TcpRequestMessage.Types.PingBody), global::FsxProtocol.TcpRequestMessage.Types.PingBody.Parser, new[]{ "TimeStamp" }, null, null, null),
+            new pbr::GeneratedClrTypeInfo(typeof(global::FsxProtocol.TcpRequestMessage.Types.PingBody), global::FsxProtocol.TcpRequestMessage.Types.PingBody.Parser, new[]{ "TimeStamp", "OriginTimeUs" }, null, null, null),
             new pbr::GeneratedClrTypeInfo(typeof(global::FsxProtocol.TcpRequestMessage.Types.TestConnBody), global::FsxProtocol.TcpRequestMessage.Types.TestConnBody.Parser, new[]{ "MagicToken" }, null, null, null)}),
-            new pbr::GeneratedClrTypeInfo(typeof(global::FsxProtocol.TcpResponseMessage), global::FsxProtocol.TcpResponseMessage.Parser, new[]{ "Success", "TimeStamp" }, null, null, null),
-            new pbr::GeneratedClrTypeInfo(typeof(global::FsxProtocol.UdpResponseMessage), global::FsxProtocol.UdpResponseMessage.Parser, new[]{ "MsgType", "SerialNumber", "Token", "TestConnCallbackBody", "TransmissionDataBody" }, new[]{ "MsgBody" }, new[]{ typeof(global::FsxProtocol.UdpResponseMessage.Types.MsgType) }, new pbr::GeneratedClrTypeInfo[] { new pbr::GeneratedClrTypeInfo(typeof(global::FsxProtocol.UdpResponseMessage.Types.TestConnCallbackBody), global::FsxProtocol.UdpResponseMessage.Types.TestConnCallbackBody.Parser, new[]{ "MagicToken" }, null, null, null),
+            new pbr::GeneratedClrTypeInfo(typeof(global::FsxProtocol.TcpResponseMessage), global::FsxProtocol.TcpResponseMessage.Parser, new[]{ "Success", "TimeStamp", "OriginTimeUs", "ReceiveTimeUs", "TransmitTimeUs" }, null, null, null),
+            new pbr::GeneratedClrTypeInfo(typeof(global::FsxProtocol.UdpResponseMessage), global::FsxProtocol.UdpResponseMessage.Parser, new[]{ "MsgType", "SerialNumber", "Token", "TestConnCallbackBody", "TransmissionDataBody", "SendTimeUs" }, new[]{ "MsgBody" }, new[]{ typeof(global::FsxProtocol.UdpResponseMessage.Types.MsgType) }, new pbr::GeneratedClrTypeInfo[] { new pbr::GeneratedClrTypeInfo(typeof(global::FsxProtocol.UdpResponseMessage.Types.TestConnCallbackBody), global::FsxProtocol.UdpResponseMessage.Types.TestConnCallbackBody.Parser, new[]{ "MagicToken" }, null, null, null),
             new pbr::GeneratedClrTypeInfo(typeof(global::FsxProtocol.UdpResponseMessage.Types.TransmissionDataBody), global::FsxProtocol.UdpResponseMessage.Types.TransmissionDataBody.Parser, new[]{ "XAcceleration", "YAcceleration", "ZAcceleration", "PitchVelocity", "RollVelocity", "YawVelocity" }, null, null, null)})
           }));
     }
@@ -492,6 +494,7 @@ namespace FsxProtocol {
         [global::System.Diagnostics.DebuggerNonUserCodeAttribute]
         public PingBody(PingBody other) : this() {
           timeStamp_ = other.timeStamp_;
+          originTimeUs_ = other.originTimeUs_;
         }
 
         [global::System.Diagnostics.DebuggerNonUserCodeAttribute]
@@ -510,6 +513,17 @@ namespace FsxProtocol {
           }
         }
 
+        /// <summary>Field number for the "originTimeUs" field.</summary>
+        public const int OriginTimeUsFieldNumber = 2;
+        private long originTimeUs_;
+        [global::System.Diagnostics.DebuggerNonUserCodeAttribute]
+        public long OriginTimeUs {
+          get { return originTimeUs_; }
+          set {
+            originTimeUs_ = value;
+          }
+        }
+
         [global::System.Diagnostics.DebuggerNonUserCodeAttribute]
         public override bool Equals(object other) {
           return Equals(other as PingBody);
@@ -524,6 +538,7 @@ namespace FsxProtocol {
             return true;
           }
           if (TimeStamp != other.TimeStamp) return false;
+          if (OriginTimeUs != other.OriginTimeUs) return false;
           return true;
         }
 
@@ -531,6 +546,7 @@ namespace FsxProtocol {
         public override int GetHashCode() {
           int hash = 1;
           if (TimeStamp != 0) hash ^= TimeStamp.GetHashCode();
+          if (OriginTimeUs != 0L) hash ^= OriginTimeUs.GetHashCode();
           return hash;
         }
 
@@ -545,6 +561,10 @@ namespace FsxProtocol {
             output.WriteRawTag(8);
             output.WriteInt32(TimeStamp);
           }
+          if (OriginTimeUs != 0L) {
+            output.WriteRawTag(16);
+            output.WriteInt64(OriginTimeUs);
+          }
         }
 
         [global::System.Diagnostics.DebuggerNonUserCodeAttribute]
@@ -553,6 +573,9 @@ namespace FsxProtocol {
           if (TimeStamp != 0) {
             size += 1 + pb::CodedOutputStream.ComputeInt32Size(TimeStamp);
           }
+          if (OriginTimeUs != 0L) {
+            size += 1 + pb::CodedOutputStream.ComputeInt64Size(OriginTimeUs);
+          }
           return size;
         }
 
@@ -564,6 +587,9 @@ namespace FsxProtocol {
           if (other.TimeStamp != 0) {
             TimeStamp = other.TimeStamp;
           }
+          if (other.OriginTimeUs != 0L) {
+            OriginTimeUs = other.OriginTimeUs;
+          }
         }
 
         [global::System.Diagnostics.DebuggerNonUserCodeAttribute]
@@ -578,6 +604,10 @@ namespace FsxProtocol {
                 TimeStamp = input.ReadInt32();
                 break;
               }
+              case 16: {
+                OriginTimeUs = input.ReadInt64();
+                break;
+              }
             }
           }
         }
@@ -732,6 +762,9 @@ namespace FsxProtocol {
     public TcpResponseMessage(TcpResponseMessage other) : this() {
       success_ = other.success_;
       timeStamp_ = other.timeStamp_;
+      originTimeUs_ = other.originTimeUs_;
+      receiveTimeUs_ = other.receiveTimeUs_;
+      transmitTimeUs_ = other.transmitTimeUs_;
     }
 
     [global::System.Diagnostics.DebuggerNonUserCodeAttribute]
@@ -761,6 +794,39 @@ namespace FsxProtocol {
       }
     }
 
+    /// <summary>Field number for the "originTimeUs" field.</summary>
+    public const int OriginTimeUsFieldNumber = 3;
+    private long originTimeUs_;
+    [global::System.Diagnostics.DebuggerNonUserCodeAttribute]
+    public long OriginTimeUs {
+      get { return originTimeUs_; }
+      set {
+        originTimeUs_ = value;
+      }
+    }
+
+    /// <summary>Field number for the "receiveTimeUs" field.</summary>
+    public const int ReceiveTimeUsFieldNumber = 4;
+    private long receiveTimeUs_;
+    [global::System.Diagnostics.DebuggerNonUserCodeAttribute]
+    public long ReceiveTimeUs {
+      get { return receiveTimeUs_; }
+      set {
+        receiveTimeUs_ = value;
+      }
+    }
+
+    /// <summary>Field number for the "transmitTimeUs" field.</summary>
+    public const int TransmitTimeUsFieldNumber = 5;
+    private long transmitTimeUs_;
+    [global::System.Diagnostics.DebuggerNonUserCodeAttribute]
+    public long TransmitTimeUs {
+      get { return transmitTimeUs_; }
+      set {
+        transmitTimeUs_ = value;
+      }
+    }
+
     [global::System.Diagnostics.DebuggerNonUserCodeAttribute]
     public override bool Equals(object other) {
       return Equals(other as TcpResponseMessage);
@@ -776,6 +842,9 @@ namespace FsxProtocol {
       }
       if (Success != other.Success) return false;
       if (TimeStamp != other.TimeStamp) return false;
+      if (OriginTimeUs != other.OriginTimeUs) return false;
+      if (ReceiveTimeUs != other.ReceiveTimeUs) return false;
+      if (TransmitTimeUs != other.TransmitTimeUs) return false;
       return true;
     }
 
@@ -784,6 +853,9 @@ namespace FsxProtocol {
       int hash = 1;
       if (Success != false) hash ^= Success.GetHashCode();
       if (TimeStamp != 0) hash ^= TimeStamp.GetHashCode();
+      if (OriginTimeUs != 0L) hash ^= OriginTimeUs.GetHashCode();
+      if (ReceiveTimeUs != 0L) hash ^= ReceiveTimeUs.GetHashCode();
+      if (TransmitTimeUs != 0L) hash ^= TransmitTimeUs.GetHashCode();
       return hash;
     }
 
@@ -802,6 +874,18 @@ namespace FsxProtocol {
         output.WriteRawTag(16);
         output.WriteInt32(TimeStamp);
       }
+      if (OriginTimeUs != 0L) {
+        output.WriteRawTag(24);
+        output.WriteInt64(OriginTimeUs);
+      }
+      if (ReceiveTimeUs != 0L) {
+        output.WriteRawTag(32);
+        output.WriteInt64(ReceiveTimeUs);
+      }
+      if (TransmitTimeUs != 0L) {
+        output.WriteRawTag(40);
+        output.WriteInt64(TransmitTimeUs);
+      }
     }
 
     [global::System.Diagnostics.DebuggerNonUserCodeAttribute]
@@ -813,6 +897,15 @@ namespace FsxProtocol {
       if (TimeStamp != 0) {
         size += 1 + pb::CodedOutputStream.ComputeInt32Size(TimeStamp);
       }
+      if (OriginTimeUs != 0L) {
+        size += 1 + pb::CodedOutputStream.ComputeInt64Size(OriginTimeUs);
+      }
+      if (ReceiveTimeUs != 0L) {
+        size += 1 + pb::CodedOutputStream.ComputeInt64Size(ReceiveTimeUs);
+      }
+      if (TransmitTimeUs != 0L) {
+        size += 1 + pb::CodedOutputStream.ComputeInt64Size(TransmitTimeUs);
+      }
       return size;
     }
 
@@ -827,6 +920,15 @@ namespace FsxProtocol {
       if (other.TimeStamp != 0) {
         TimeStamp = other.TimeStamp;
       }
+      if (other.OriginTimeUs != 0L) {
+        OriginTimeUs = other.OriginTimeUs;
+      }
+      if (other.ReceiveTimeUs != 0L) {
+        ReceiveTimeUs = other.ReceiveTimeUs;
+      }
+      if (other.TransmitTimeUs != 0L) {
+        TransmitTimeUs = other.TransmitTimeUs;
+      }
     }
 
     [global::System.Diagnostics.DebuggerNonUserCodeAttribute]
@@ -845,6 +947,18 @@ namespace FsxProtocol {
             TimeStamp = input.ReadInt32();
             break;
           }
+          case 24: {
+            OriginTimeUs = input.ReadInt64();
+            break;
+          }
+          case 32: {
+            ReceiveTimeUs = input.ReadInt64();
+            break;
+          }
+          case 40: {
+            TransmitTimeUs = input.ReadInt64();
+            break;
+          }
         }
       }
     }
@@ -878,6 +992,7 @@ namespace FsxProtocol {
       msgType_ = other.msgType_;
       serialNumber_ = other.serialNumber_;
       token_ = other.token_;
+      sendTimeUs_ = other.sendTimeUs_;
       switch (other.MsgBodyCase) {
         case MsgBodyOneofCase.TestConnCallbackBody:
           TestConnCallbackBody = other.TestConnCallbackBody.Clone();
@@ -949,6 +1064,17 @@ namespace FsxProtocol {
       }
     }
 
+    /// <summary>Field number for the "sendTimeUs" field.</summary>
+    public const int SendTimeUsFieldNumber = 6;
+    private long sendTimeUs_;
+    [global::System.Diagnostics.DebuggerNonUserCodeAttribute]
+    public long SendTimeUs {
+      get { return sendTimeUs_; }
+      set {
+        sendTimeUs_ = value;
+      }
+    }
+
     private object msgBody_;
     /// <summary>Enum of possible cases for the "msgBody" oneof.</summary>
     public enum MsgBodyOneofCase {
@@ -986,6 +1112,7 @@ namespace FsxProtocol {
       if (Token != other.Token) return false;
       if (!object.Equals(TestConnCallbackBody, other.TestConnCallbackBody)) return false;
       if (!object.Equals(TransmissionDataBody, other.TransmissionDataBody)) return false;
+      if (SendTimeUs != other.SendTimeUs) return false;
       if (MsgBodyCase != other.MsgBodyCase) return false;
       return true;
     }
@@ -998,6 +1125,7 @@ namespace FsxProtocol {
       if (Token != 0) hash ^= Token.GetHashCode();
       if (msgBodyCase_ == MsgBodyOneofCase.TestConnCallbackBody) hash ^= TestConnCallbackBody.GetHashCode();
       if (msgBodyCase_ == MsgBodyOneofCase.TransmissionDataBody) hash ^= TransmissionDataBody.GetHashCode();
+      if (SendTimeUs != 0L) hash ^= SendTimeUs.GetHashCode();
       hash ^= (int) msgBodyCase_;
       return hash;
     }
@@ -1029,6 +1157,10 @@ namespace FsxProtocol {
         output.WriteRawTag(42);
         output.WriteMessage(TransmissionDataBody);
       }
+      if (SendTimeUs != 0L) {
+        output.WriteRawTag(48);
+        output.WriteInt64(SendTimeUs);
+      }
     }
 
     [global::System.Diagnostics.DebuggerNonUserCodeAttribute]
@@ -1049,6 +1181,9 @@ namespace FsxProtocol {
       if (msgBodyCase_ == MsgBodyOneofCase.TransmissionDataBody) {
         size += 1 + pb::CodedOutputStream.ComputeMessageSize(TransmissionDataBody);
       }
+      if (SendTimeUs != 0L) {
+        size += 1 + pb::CodedOutputStream.ComputeInt64Size(SendTimeUs);
+      }
       return size;
     }
 
@@ -1066,6 +1201,9 @@ namespace FsxProtocol {
       if (other.Token != 0) {
         Token = other.Token;
       }
+      if (other.SendTimeUs != 0L) {
+        SendTimeUs = other.SendTimeUs;
+      }
       switch (other.MsgBodyCase) {
         case MsgBodyOneofCase.TestConnCallbackBody:
           TestConnCallbackBody = other.TestConnCallbackBody;
@@ -1115,6 +1253,10 @@ namespace FsxProtocol {
             TransmissionDataBody = subBuilder;
             break;
           }
+          case 48: {
+            SendTimeUs = input.ReadInt64();
+            break;
+          }
         }
       }
     }
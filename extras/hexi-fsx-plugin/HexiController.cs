@@ -121,6 +121,7 @@ namespace HexiInputsFsx
                     bufferReqBody = new byte[reqSize];
                     await networkStream.ReadAsync(bufferReqBody, 0, reqSize);
                     TcpRequestMessage request = TcpRequestMessage.Parser.ParseFrom(bufferReqBody);
+                    long receiveTimeUs = Utils.GetTimeUs();
 
                     bool responseSuccess = false;
                     switch (request.MsgType)
@@ -142,6 +143,13 @@ namespace HexiInputsFsx
                         Success = responseSuccess,
                         TimeStamp = Utils.GetTimeStamp(DateTime.UtcNow),
                     };
+                    if (request.MsgType == TcpRequestMessage.Types.MsgType.Ping && request.PingBody != null)
+                    {
+                        // Timestamps for hexi to estimate the round trip time and clock offset
+                        response.OriginTimeUs = request.PingBody.OriginTimeUs;
+                        response.ReceiveTimeUs = receiveTimeUs;
+                        response.TransmitTimeUs = Utils.GetTimeUs();
+                    }
 
                     // Write size and body
                     bufferResBody = response.ToByteArray();
@@ -49,6 +49,7 @@ namespace HexiInputsFsx
             SerialNumber = SerialNumber + 1;
             message.Token = Token;
             message.SerialNumber = SerialNumber;
+            message.SendTimeUs = Utils.GetTimeUs();
             var body = message.ToByteArray();
             await SendAsync(body, body.Length);
         }
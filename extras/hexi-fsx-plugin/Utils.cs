@@ -1,5 +1,6 @@
 ﻿using System;
 using System.Collections.Generic;
+using System.Diagnostics;
 using System.Linq;
 using System.Text;
 using System.Threading.Tasks;
@@ -9,10 +10,21 @@ namespace HexiInputsFsx
     public static class Utils
     {
         private static DateTime utcDate = new DateTime(1970, 1, 1);
+        private static long utcBaseUs = DateTime.UtcNow.Subtract(utcDate).Ticks / 10;
+        private static Stopwatch stopwatch = Stopwatch.StartNew();
 
         public static Int32 GetTimeStamp(DateTime dt)
         {
             return (Int32)dt.Subtract(utcDate).TotalSeconds;
         }
+
+        /// <summary>
+        /// Microseconds since 1970-01-01 UTC. DateTime.UtcNow only ticks every few milliseconds
+        /// on Windows, so the time is advanced by the high resolution Stopwatch instead.
+        /// </summary>
+        public static long GetTimeUs()
+        {
+            return utcBaseUs + stopwatch.ElapsedTicks * 1000000 / Stopwatch.Frequency;
+        }
     }
 }
@@ -1,9 +1,8 @@
 import asyncio
 
-from sanic import Blueprint
-from yapsy.IPlugin import IPlugin
 from hexi.util import config
-from hexi.service import web
+from hexi.service import runtime
+from hexi.util import httpcache
 
 loop = asyncio.get_event_loop()
 
@@ -11,15 +10,25 @@ loop = asyncio.get_event_loop()
 class BaseCoreModule():
   def __init__(self, id):
     self.id = id
-    self.bp = Blueprint(id, url_prefix='/core/{0}'.format(id))
+    self.bp = None
     self.config = {}
     self.config_default = {}
 
   def init(self):
     self.config = loop.run_until_complete(config.get_core_config(self.id, self.config_default))
 
+  def init_web(self):
+    """
+      Only called when the web server is enabled. Register routes on self.bp here.
+    """
+    from sanic import Blueprint
+    self.bp = Blueprint(self.id, url_prefix='/core/{0}'.format(self.id))
+
   def register(self):
-    web.app.blueprint(self.bp)
+    if runtime.web_enabled:
+      from hexi.service import web
+      web.app.blueprint(self.bp)
 
   def save_config(self):
+    httpcache.bump()
     asyncio.ensure_future(config.save_core_config(self.id, self.config))
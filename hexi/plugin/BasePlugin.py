@@ -2,10 +2,9 @@ import asyncio
 
 from yapsy.IPlugin import IPlugin
 from hexi.util import config
+from hexi.util import httpcache
 
 
-loop = asyncio.get_event_loop()
-
 class BasePlugin(IPlugin):
   def __init__(self):
     super().__init__()
@@ -16,8 +15,22 @@ class BasePlugin(IPlugin):
     self.category = None
     self.configurable = False
 
+  async def load_config_async(self):
+    self.config = await config.get_plugin_config(self.id, self.config_default)
+
   def load(self):
-    self.config = loop.run_until_complete(config.get_plugin_config(self.id, self.config_default))
+    """
+      Called once before the first activation, after config is loaded.
+    """
+    pass
+
+  def load_web(self):
+    """
+      Called after load() when the web server is enabled. Register routes on
+      self.bp here and import sanic locally, so headless mode never loads it.
+    """
+    pass
 
   def save_config(self):
+    httpcache.bump()
     asyncio.ensure_future(config.save_plugin_config(self.id, self.config))
@@ -5,8 +5,49 @@ from hexi.service import event
 
 
 class InputPlugin(BasePlugin):
-  def emit_input_signal(self, data):
+  def deactivate(self):
+    super().deactivate()
+    # the input manager forgets the samples of this plugin
+    asyncio.ensure_future(event.publish('hexi.pipeline.input.raw_gone', {
+      'source': self.id,
+    }))
+
+  def emit_input_signal(self, data, latency=None):
+    """
+      data should be [x, y, z, alpha, beta, gamma], emitted as samples arrive;
+      the input manager holds or extrapolates them between ticks
+      latency is the age of the sample in seconds when known, e.g. the
+      measured transport delay, None to use the configured one
+    """
+    if latency != None and latency < 0:
+      raise ValueError('latency must not be negative')
+    asyncio.ensure_future(event.publish('hexi.pipeline.input.raw_data', {
+      'source': self.id,
+      'signal': data,
+      'time': asyncio.get_event_loop().time(),
+      'latency': latency,
+    }))
+
+  def emit_input_script(self, script_id, samples):
+    """
+      Hands a fully known sequence of signals to the input manager, which plays
+      one sample per tick. MCA plugins may precompute the whole script.
+      script_id should identify the samples, e.g. a flight state id
+      samples should be a list of [x, y, z, alpha, beta, gamma]
+    """
+    asyncio.ensure_future(event.publish('hexi.pipeline.input.raw_script', {
+      'source': self.id,
+      'id': script_id,
+      'samples': samples,
+    }))
+
+  def emit_input_script_hint(self, scripts):
     """
-      data should be [x, y, z, alpha, beta, gamma]
+      Tells MCA plugins which scripts may be played next, so they can be
+      precomputed while idle.
+      scripts should be a dict of script_id -> samples
     """
-    asyncio.ensure_future(event.publish('hexi.pipeline.input.raw_data', data))
+    asyncio.ensure_future(event.publish('hexi.pipeline.input.script_hint', {
+      'source': self.id,
+      'scripts': scripts,
+    }))
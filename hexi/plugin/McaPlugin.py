@@ -1,20 +1,153 @@
 import asyncio
+import collections
+import logging
+import time
 
 from hexi.plugin.BasePlugin import BasePlugin
 from hexi.service import event
+from hexi.service.pipeline import budget
+
+_logger = logging.getLogger(__name__)
+
+SCRIPT_CACHE_SIZE = 16
 
 
 class MCAPlugin(BasePlugin):
+  def __init__(self):
+    super().__init__()
+    # (script id, script_entry_state() key) -> plugin defined precompute result
+    self.script_cache = collections.OrderedDict()
+    self.script = None
+    # sn of the script whose precompute is running
+    self.preparing_sn = None
+
   def activate(self):
     super().activate()
-    event.subscribe(self._on_input_signal, ['hexi.pipeline.input.data'])
+    event.subscribe(self._on_input_signal, [
+      'hexi.pipeline.input.data',
+      'hexi.pipeline.input.script',
+      'hexi.pipeline.input.script_data',
+      'hexi.pipeline.input.script_done',
+      'hexi.pipeline.input.script_hint',
+    ], policy='latest')
 
   def deactivate(self):
     super().deactivate()
     event.unsubscribe(self._on_input_signal)
+    self.script = None
+    self.preparing_sn = None
 
   async def _on_input_signal(self, e):
-    self.handle_input_signal(e['value'])
+    key = e['key']
+    if key == 'hexi.pipeline.input.data':
+      budget.run(self, self.handle_input_signal, e['value'])
+    elif key == 'hexi.pipeline.input.script':
+      # not awaited, the script is processed live until its precompute is done
+      asyncio.ensure_future(self._prepare_script(e['value']))
+    elif key == 'hexi.pipeline.input.script_data':
+      value = e['value']
+      if self.script != None and self.script['sn'] == value['sn']:
+        budget.run(self, self.handle_precomputed_signal, value['signal'], self.script['result'], value['index'])
+      else:
+        budget.run(self, self.handle_input_signal, value['signal'])
+    elif key == 'hexi.pipeline.input.script_done':
+      value = e['value']
+      if self.preparing_sn == value['sn']:
+        self.preparing_sn = None
+      if self.script != None and self.script['sn'] == value['sn']:
+        self.finish_script(self.script['result'], value['played'])
+        self.script = None
+    elif key == 'hexi.pipeline.input.script_hint':
+      # not awaited, signals keep flowing through the queue meanwhile
+      asyncio.ensure_future(self._precompute_hinted_scripts(e['value']['scripts']))
+
+  async def _prepare_script(self, script):
+    self.script = None
+    self.preparing_sn = None
+    if not self.is_activated:
+      return
+    entry = self.script_entry_state()
+    if entry == None:
+      return
+    key = (script['id'], entry[0])
+    result = self.script_cache.get(key)
+    if result == None:
+      # on a worker thread; samples played meanwhile are processed live from
+      # the same entry state, so the precomputed output continues them
+      self.preparing_sn = script['sn']
+      result = await asyncio.get_event_loop().run_in_executor(
+        None, self._precompute, script['id'], script['samples'], entry[1])
+      if result != None:
+        self._store_script_result(key, result)
+      if self.preparing_sn != script['sn']:
+        # finished, replaced or deactivated meanwhile
+        return
+      self.preparing_sn = None
+      if result == None:
+        return
+    else:
+      self.script_cache.move_to_end(key)
+    self.script = { 'sn': script['sn'], 'result': result }
+
+  async def _precompute_hinted_scripts(self, scripts):
+    for script_id, samples in scripts.items():
+      if not self.is_activated or self.script != None or self.preparing_sn != None:
+        return
+      entry = self.script_entry_state()
+      if entry == None:
+        return
+      key = (script_id, entry[0])
+      if key in self.script_cache:
+        continue
+      # on a worker thread, live ticks keep running meanwhile
+      result = await asyncio.get_event_loop().run_in_executor(
+        None, self._precompute, script_id, samples, entry[1])
+      if result != None:
+        self._store_script_result(key, result)
+
+  def _precompute(self, script_id, samples, snapshot):
+    start = time.perf_counter()
+    result = self.precompute_script(samples, snapshot)
+    if result != None:
+      _logger.info('Precomputed script {0} ({1} samples) in {2:.1f} ms'.format(
+        script_id, len(samples), (time.perf_counter() - start) * 1000))
+    return result
+
+  def _store_script_result(self, key, result):
+    self.script_cache[key] = result
+    while len(self.script_cache) > SCRIPT_CACHE_SIZE:
+      self.script_cache.popitem(last=False)
+
+  def script_entry_state(self):
+    """
+      Returns (key, snapshot) of the current state, or None to process
+      scripts live. key must be hashable and cover everything a precomputed
+      script depends on besides its samples (config, filter state); scripts
+      are cached by (script id, key), so a key that is stable while the
+      platform is at rest lets precomputed scripts be reused. snapshot must
+      not share mutable data with the live state.
+    """
+    return None
+
+  def precompute_script(self, samples, snapshot):
+    """
+      Computes MCA output for a whole script starting from snapshot. May be
+      called from a worker thread, so it must not touch the live state.
+      Return None to process the script live.
+    """
+    return None
+
+  def handle_precomputed_signal(self, signal, result, index):
+    """
+      Emits the precomputed output of sample `index` of the running script
+    """
+    raise NotImplementedError()
+
+  def finish_script(self, result, played):
+    """
+      Moves the live state to where the script left it after `played` samples
+    """
+    raise NotImplementedError()
 
   def handle_input_signal(self, signal):
     raise
@@ -26,3 +159,15 @@ class MCAPlugin(BasePlugin):
     """
     asyncio.ensure_future(event.publish('hexi.pipeline.mca.raw_data', (input_data, mca_data)))
 
+  def get_seat_count(self):
+    """
+      Number of seats the plugin emits signals for, see emit_mca_seat_signals
+    """
+    return 1
+
+  def emit_mca_seat_signals(self, input_data, mca_data):
+    """
+      Same as emit_mca_signal, but for plugins driving several seats:
+      input_data and mca_data are lists with one signal per seat
+    """
+    asyncio.ensure_future(event.publish('hexi.pipeline.mca.raw_seat_data', (input_data, mca_data)))
@@ -1,11 +1,12 @@
 from hexi.plugin.BasePlugin import BasePlugin
 from hexi.service import event
+from hexi.service.pipeline import budget
 
 
 class OutputPlugin(BasePlugin):
   def activate(self):
     super().activate()
-    event.subscribe(self._on_mca_signal, ['hexi.pipeline.mca.data'])
+    event.subscribe(self._on_mca_signal, ['hexi.pipeline.mca.data'], policy='latest')
 
   def deactivate(self):
     super().deactivate()
@@ -13,7 +14,7 @@ class OutputPlugin(BasePlugin):
 
   async def _on_mca_signal(self, e):
     input_signal, motion_signal = e['value']
-    self.handle_motion_signal(input_signal, motion_signal)
+    budget.run(self, self.handle_motion_signal, input_signal, motion_signal)
 
   def handle_motion_signal(self, input_signal, motion_signal):
     raise
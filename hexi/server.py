@@ -1,11 +1,15 @@
+import argparse
 import logging
 import logging.config
+import subprocess
 import sys
 import asyncio
 import uvloop
 import signal
-import sanic.config
 
+from hexi.service import runtime
+from hexi.util import idlegc
+from hexi.util import logqueue
 from hexi.util import taillog
 
 _logger = logging.getLogger(__name__)
@@ -14,14 +18,19 @@ asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
 loop = asyncio.get_event_loop()
 signal.signal(signal.SIGINT, lambda s, f: loop.stop())
 
+DEFAULT_CONTROL_SOCKET = './hexi.sock'
+
 
 def load_core_module(BaseClass):
   module = BaseClass()
   module.init()
+  if runtime.web_enabled:
+    module.init_web()
   module.register()
 
 
-def main():
+def configure_web_logging():
+  import sanic.config
   sanic.config.LOGGING['handlers']['memoryTailLog'] = {
     '()': taillog.TailLogHandler,
     'log_queue': taillog.log_queue,
@@ -40,16 +49,80 @@ def main():
   sanic.config.LOGGING['disable_existing_loggers'] = False
   logging.config.dictConfig(sanic.config.LOGGING)
 
+
+def configure_headless_logging():
+  formatter = logging.Formatter('%(asctime)s - (%(name)s)[%(levelname)s]: %(message)s')
+  stream_handler = logging.StreamHandler(sys.stderr)
+  stream_handler.setFormatter(formatter)
+  tail_handler = taillog.TailLogHandler(taillog.log_queue)
+  tail_handler.setFormatter(formatter)
+  root = logging.getLogger()
+  root.setLevel(logging.INFO)
+  root.addHandler(stream_handler)
+  root.addHandler(tail_handler)
+
+
+def parse_args(argv):
+  parser = argparse.ArgumentParser(prog='hexi.server')
+  parser.add_argument('--headless', action='store_true',
+                      help='run only the pipeline and plugins, without the web server and UI')
+  parser.add_argument('--split', action='store_true',
+                      help='serve the web UI from separate worker processes, keeping this '
+                           'process for the pipeline only')
+  parser.add_argument('--web-workers', type=int, default=1,
+                      help='number of web worker processes in split mode (default: 1)')
+  parser.add_argument('--control-socket', default=None,
+                      help='path of the local control socket (default: {0} in headless and '
+                           'split mode, disabled otherwise)'.format(DEFAULT_CONTROL_SOCKET))
+  parser.add_argument('--gc-idle', action='store_true',
+                      help='freeze objects allocated at startup and collect garbage only '
+                           'between pipeline ticks')
+  args = parser.parse_args(argv)
+  if args.headless and args.split:
+    parser.error('--headless and --split cannot be used together')
+  return args
+
+
+def start_web_workers(count):
+  return subprocess.Popen([
+    sys.executable, '-m', 'hexi.service.webworker',
+    '--control-socket', runtime.control_socket,
+    '--workers', str(count),
+  ])
+
+
+def main(argv=None):
+  args = parse_args(sys.argv[1:] if argv == None else argv)
+  runtime.web_enabled = not args.headless
+  runtime.web_serve = not args.headless and not args.split
+  runtime.control_socket = args.control_socket
+  runtime.gc_idle = args.gc_idle
+  if (args.headless or args.split) and runtime.control_socket == None:
+    runtime.control_socket = DEFAULT_CONTROL_SOCKET
+
+  if runtime.web_enabled:
+    configure_web_logging()
+  else:
+    configure_headless_logging()
+  # format and write records on a background thread, not on the event loop
+  logqueue.install([None, 'sanic', 'network'])
+
   _logger.info('Loading base modules...')
   from hexi.service import event
   from hexi.service import db
   from hexi.service import plugin
-  from hexi.service import web
-  from hexi.service import log
+  from hexi.service import debug
   loop.run_until_complete(db.init())
   plugin.init()
-  web.init()
-  log.init()
+  debug.init()
+  if runtime.web_enabled:
+    from hexi.service import web
+    from hexi.service import log
+    web.init()
+    log.init()
+  if runtime.control_socket != None:
+    from hexi.service import control
+    control.init()
 
   _logger.info('Loading base plugins...')
   from hexi.service.pipeline import InputManager
@@ -62,9 +135,20 @@ def main():
   _logger.info('Loading external modules...')
   plugin.load()
 
-  _logger.info('Starting...')
+  _logger.info('Starting{0}...'.format(
+    ' (headless)' if args.headless else ' (split)' if args.split else ''))
   loop.run_until_complete(event.publish('hexi.start', None))
+  if runtime.gc_idle:
+    # plugins are loaded and activated by now
+    idlegc.collector.enable()
+  web_workers = None
+  if args.split:
+    # the control socket is listening once hexi.start is handled
+    web_workers = start_web_workers(args.web_workers)
   loop.run_forever()
+  if web_workers != None:
+    web_workers.terminate()
+    web_workers.wait()
   loop.run_until_complete(event.publish('hexi.stop', None))
 
 if __name__ == '__main__':
@@ -0,0 +1,181 @@
+"""Local control socket.
+
+A unix stream socket speaking JSON lines. Each request is one object like
+`{"cmd": "input.plugins"}` and is answered by one line, either
+`{"code": 200, "data": ...}` or `{"code": 4xx, "reason": "..."}`. In headless
+mode this is the only way to talk to the process.
+
+Requests may carry a `seq` which is echoed in the answer. Requests are
+handled concurrently, so clients sending several requests at once should use
+it to match answers.
+
+`{"cmd": "subscribe", "topic": path}` subscribes the connection to the
+websocket broadcaster at `path` and answers with its initial message and the
+canonical topic. The path may carry the query string of a websocket client,
+see the variants of `WebSocketBroadcaster`. Every message broadcast afterwards
+is pushed as `{"topic": canonical topic, "data": ...}`, and the canonical
+topic is what `unsubscribe` takes. This is how web worker processes serve
+websockets in split mode.
+"""
+
+import asyncio
+import collections
+import json
+import logging
+import os
+
+from hexi.service import event
+from hexi.service import runtime
+from hexi.util import broadcast
+from hexi.util import taillog
+
+_logger = logging.getLogger(__name__)
+
+# pushes are dropped instead of buffered beyond this, a stuck client must not
+# grow the pipeline process without bound
+MAX_WRITE_BUFFER = 4 * 1024 * 1024
+
+# forwarded HTTP bodies travel inside a single line
+MAX_LINE = 16 * 1024 * 1024
+
+_commands = {}
+_connections = set()
+_server = None
+
+
+def register(name, handler):
+  """Registers a command.
+
+  Args:
+    name: command name, by convention `<module id>.<action>`.
+    handler: coroutine function taking the request dict, returns JSON data.
+  """
+  _commands[name] = handler
+
+
+class Connection():
+  def __init__(self, writer):
+    self.writer = writer
+    self.topics = collections.Counter()
+    self.dropped = 0
+
+  def write(self, message):
+    if self.writer.transport.is_closing():
+      return
+    self.writer.write((json.dumps(message) + '\n').encode('utf-8'))
+
+  def push(self, topic, data):
+    if self.writer.transport.get_write_buffer_size() > MAX_WRITE_BUFFER:
+      self.dropped = self.dropped + 1
+      return
+    self.write({ 'topic': topic, 'data': data })
+
+
+def publish(topic, data):
+  """Pushes a message to all connections subscribed to topic."""
+  for connection in _connections:
+    if connection.topics[topic] > 0:
+      connection.push(topic, data)
+
+
+async def _dispatch(connection, request):
+  try:
+    cmd = request.get('cmd')
+    if cmd == 'subscribe':
+      subscription = broadcast.subscribe(request['topic'])
+      if subscription != None:
+        topic, initial = subscription
+        connection.topics[topic] += 1
+        resp = { 'code': 200, 'data': initial, 'topic': topic }
+      else:
+        resp = { 'code': 404, 'reason': 'Unknown topic `{0}`'.format(request['topic']) }
+    elif cmd == 'unsubscribe':
+      if connection.topics[request['topic']] > 0:
+        connection.topics[request['topic']] -= 1
+        if connection.topics[request['topic']] == 0:
+          del connection.topics[request['topic']]
+        broadcast.unsubscribe(request['topic'])
+      resp = { 'code': 200, 'data': None }
+    elif cmd in _commands:
+      resp = { 'code': 200, 'data': await _commands[cmd](request) }
+    else:
+      resp = { 'code': 404, 'reason': 'Unknown command `{0}`'.format(cmd) }
+  except Exception as e:
+    _logger.exception('Control command failed')
+    resp = { 'code': 400, 'reason': str(e) }
+  if 'seq' in request:
+    resp['seq'] = request['seq']
+  connection.write(resp)
+  try:
+    await connection.writer.drain()
+  except ConnectionError:
+    # the client is gone, _handle_client cleans up
+    pass
+
+
+async def _handle_client(reader, writer):
+  connection = Connection(writer)
+  _connections.add(connection)
+  try:
+    while True:
+      line = await reader.readline()
+      if not line:
+        break
+      try:
+        request = json.loads(line.decode('utf-8'))
+      except ValueError as e:
+        connection.write({ 'code': 400, 'reason': str(e) })
+        continue
+      asyncio.ensure_future(_dispatch(connection, request))
+  except ConnectionError:
+    pass
+  finally:
+    _connections.discard(connection)
+    for topic, count in connection.topics.items():
+      for _ in range(count):
+        broadcast.unsubscribe(topic)
+    writer.close()
+
+
+async def _ping(request):
+  return 'pong'
+
+async def _list_commands(request):
+  return sorted(_commands.keys())
+
+async def _get_logs(request):
+  seq, lines = taillog.log_queue.since(request.get('since', 0))
+  return { 'seq': seq, 'lines': lines }
+
+async def _stop(request):
+  asyncio.get_event_loop().call_soon(asyncio.get_event_loop().stop)
+  return None
+
+
+async def on_start(e):
+  global _server
+  path = runtime.control_socket
+  if os.path.exists(path):
+    # left over by a previous process
+    os.unlink(path)
+  _server = await asyncio.start_unix_server(_handle_client, path=path, limit=MAX_LINE)
+  # commands are not authenticated, only the owner may connect
+  os.chmod(path, 0o600)
+  _logger.info('Control socket listening on {0}'.format(path))
+
+
+async def on_stop(e):
+  if _server != None:
+    _server.close()
+    await _server.wait_closed()
+    os.unlink(runtime.control_socket)
+
+
+def init():
+  register('ping', _ping)
+  register('commands', _list_commands)
+  register('logs', _get_logs)
+  register('stop', _stop)
+  broadcast.remote_send = publish
+  event.subscribe(on_start, ['hexi.start'])
+  event.subscribe(on_stop, ['hexi.stop'])
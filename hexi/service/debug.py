@@ -0,0 +1,200 @@
+"""Diagnostics of the running pipeline process.
+
+`/core/debug/profile?seconds=N` samples the event loop thread for N seconds,
+see `hexi.util.sampler`, and returns collapsed stacks for flame graph tools:
+
+  curl 'http://localhost:8000/core/debug/profile?seconds=10' > hexi.folded
+  flamegraph.pl hexi.folded > hexi.svg
+
+`/core/debug/loop` reports the asyncio tasks and how late the event loop
+wakes up a coroutine sleeping `LAG_INTERVAL`, which is how long callbacks
+kept it busy.
+
+`/core/debug/gc` reports garbage collection pauses, and
+`/core/debug/alloc?ticks=N` the memory left allocated per pipeline tick by
+source line, see `hexi.util.idlegc`.
+
+`/core/debug/events` reports the subscriber queues of the event service,
+see `hexi.service.event`.
+
+All are also control commands, `debug.profile`, `debug.loop`, `debug.gc`,
+`debug.alloc` and `debug.events`.
+"""
+
+import asyncio
+import collections
+import logging
+import time
+
+import numpy
+
+from hexi.service import control
+from hexi.service import event
+from hexi.service import runtime
+from hexi.util import idlegc
+from hexi.util import sampler
+
+_logger = logging.getLogger(__name__)
+
+LAG_INTERVAL = 0.1
+# lags kept for the percentiles, a minute
+LAG_WINDOW = 600
+MAX_PROFILE_SECONDS = 120
+MAX_ALLOC_TICKS = 1200
+
+_lags = collections.deque(maxlen=LAG_WINDOW)
+_lag_max = 0
+_profiling = False
+
+
+def _all_tasks():
+  # asyncio.all_tasks is new in Python 3.7
+  if hasattr(asyncio, 'all_tasks'):
+    return asyncio.all_tasks()
+  return asyncio.Task.all_tasks()
+
+
+def _task_name(task):
+  coro = task.get_coro() if hasattr(task, 'get_coro') else task._coro
+  return getattr(coro, '__qualname__', None) or type(coro).__name__
+
+
+async def lag_loop_async():
+  global _lag_max
+  loop = asyncio.get_event_loop()
+  while True:
+    start = loop.time()
+    await asyncio.sleep(LAG_INTERVAL)
+    lag = max(0, loop.time() - start - LAG_INTERVAL)
+    _lags.append(lag)
+    _lag_max = max(_lag_max, lag)
+
+
+def get_loop_stats():
+  tasks = _all_tasks()
+  by_name = collections.Counter(_task_name(task) for task in tasks if not task.done())
+  lags = numpy.array(_lags) * 1000
+  return {
+    'tasks': len(tasks),
+    'pending_tasks': sum(by_name.values()),
+    'tasks_by_coroutine': dict(by_name.most_common(20)),
+    'lag_ms': {
+      'last': float(lags[-1]) if len(lags) > 0 else None,
+      'p50': float(numpy.percentile(lags, 50)) if len(lags) > 0 else None,
+      'p99': float(numpy.percentile(lags, 99)) if len(lags) > 0 else None,
+      'max_window': float(lags.max()) if len(lags) > 0 else None,
+      'max_ever': _lag_max * 1000,
+    },
+  }
+
+
+async def profile_async(seconds, interval=0.005, mode='cpu'):
+  """Samples the event loop thread for `seconds`, returns collapsed stacks.
+
+  Raises ValueError on bad arguments and RuntimeError if a profile is
+  running already or sampling is not supported.
+  """
+  global _profiling
+  if not 0 < seconds <= MAX_PROFILE_SECONDS:
+    raise ValueError('seconds must be within (0, {0}]'.format(MAX_PROFILE_SECONDS))
+  if not 0.0005 <= interval <= 1:
+    raise ValueError('interval must be within [0.0005, 1]')
+  if _profiling:
+    raise RuntimeError('A profile is running already')
+  profile = sampler.StackSampler(interval, mode)
+  _profiling = True
+  start = time.perf_counter()
+  profile.start()
+  try:
+    await asyncio.sleep(seconds)
+  finally:
+    profile.stop()
+    _profiling = False
+  _logger.info('Profiled {0} samples in {1:.1f} s'.format(profile.samples, time.perf_counter() - start))
+  return profile.collapsed()
+
+
+async def _control_profile(request):
+  return await profile_async(float(request.get('seconds', 5)),
+                             float(request.get('interval', 0.005)),
+                             request.get('mode', 'cpu'))
+
+
+async def trace_allocations_async(ticks, limit=30):
+  if not 0 < ticks <= MAX_ALLOC_TICKS:
+    raise ValueError('ticks must be within (0, {0}]'.format(MAX_ALLOC_TICKS))
+  return await idlegc.collector.trace_allocations_async(ticks, limit)
+
+
+async def _control_loop(request):
+  return get_loop_stats()
+
+
+async def _control_gc(request):
+  return idlegc.collector.get_stats()
+
+
+async def _control_alloc(request):
+  return await trace_allocations_async(int(request.get('ticks', 20)), int(request.get('limit', 30)))
+
+
+async def _control_events(request):
+  return event.get_stats()
+
+
+def _init_web():
+  from sanic import Blueprint
+  from sanic import response
+  from hexi.service import web
+
+  bp = Blueprint('debug', url_prefix='/core/debug')
+
+  @bp.route('/profile')
+  async def get_profile(request):
+    """`?seconds=5&interval=0.005&mode=cpu`, mode `wall` samples idle time too."""
+    try:
+      seconds = float(request.args.get('seconds', 5))
+      interval = float(request.args.get('interval', 0.005))
+      mode = request.args.get('mode', 'cpu')
+      collapsed = await profile_async(seconds, interval, mode)
+    except ValueError as e:
+      return response.json({ 'code': 400, 'reason': str(e) }, status=400)
+    except RuntimeError as e:
+      return response.json({ 'code': 409, 'reason': str(e) }, status=409)
+    return response.text(collapsed)
+
+  @bp.route('/loop')
+  async def get_loop(request):
+    return response.json({ 'code': 200, 'data': get_loop_stats() })
+
+  @bp.route('/gc')
+  async def get_gc(request):
+    return response.json({ 'code': 200, 'data': idlegc.collector.get_stats() })
+
+  @bp.route('/alloc')
+  async def get_alloc(request):
+    """`?ticks=20&limit=30`"""
+    try:
+      data = await trace_allocations_async(int(request.args.get('ticks', 20)),
+                                           int(request.args.get('limit', 30)))
+    except ValueError as e:
+      return response.json({ 'code': 400, 'reason': str(e) }, status=400)
+    return response.json({ 'code': 200, 'data': data })
+
+  @bp.route('/events')
+  async def get_events(request):
+    return response.json({ 'code': 200, 'data': event.get_stats() })
+
+  web.app.blueprint(bp)
+
+
+def init():
+  control.register('debug.profile', _control_profile)
+  control.register('debug.loop', _control_loop)
+  control.register('debug.gc', _control_gc)
+  control.register('debug.alloc', _control_alloc)
+  control.register('debug.events', _control_events)
+  idlegc.collector.install()
+  if runtime.web_enabled:
+    _init_web()
+  asyncio.ensure_future(lag_loop_async())
@@ -1,27 +1,170 @@
+"""Publish and subscribe of events by key.
+
+By default `publish` awaits every subscriber of the key. A subscriber can
+instead have a bounded queue, drained by a task of its own which awaits the
+subscriber for one event at a time, so a subscriber falling behind skips
+stale events rather than piling up tasks. The queue policy decides what is
+kept:
+
+  latest: the last event of each key, an older pending one is replaced.
+    Right for signals, where only the newest sample matters.
+  drop_oldest: the last `depth` events, the oldest pending one is dropped.
+  block: the first `depth` events, `publish` waits for space.
+
+`get_stats` reports the depth and drop counters of every queue.
+"""
+
 import asyncio
+import collections
 import logging
 
+POLICIES = ('latest', 'drop_oldest', 'block')
+DEFAULT_DEPTH = 16
+
 _subscribers = {}
+# callback -> SubscriberQueue, for subscribers with a queue
+_queues = {}
 _logger = logging.getLogger(__name__)
 
 
+def _callback_name(callback):
+  owner = getattr(callback, '__self__', None)
+  if owner != None:
+    return '{0}.{1}'.format(type(owner).__name__, callback.__name__)
+  return getattr(callback, '__qualname__', repr(callback))
+
+
+class SubscriberQueue():
+  def __init__(self, callback, policy, depth):
+    self.callback = callback
+    self.policy = policy
+    self.depth = depth
+    # key -> event for `latest`, events otherwise
+    self.pending = collections.OrderedDict() if policy == 'latest' else collections.deque()
+    self.task = None
+    self.wakeup = None
+    # publishers waiting for space, `block` only
+    self.putters = collections.deque()
+    self.closed = False
+    self.received = 0
+    self.delivered = 0
+    self.dropped = 0
+    self.blocked = 0
+    self.max_depth = 0
+
+  async def put(self, e):
+    if self.closed:
+      return
+    self.received = self.received + 1
+    if self.policy == 'latest':
+      key = e['key']
+      if key in self.pending:
+        # keeps the order of keys by their last event
+        del self.pending[key]
+        self.dropped = self.dropped + 1
+      self.pending[key] = e
+    elif self.policy == 'drop_oldest':
+      if len(self.pending) >= self.depth:
+        self.pending.popleft()
+        self.dropped = self.dropped + 1
+      self.pending.append(e)
+    else:
+      if len(self.pending) >= self.depth:
+        self.blocked = self.blocked + 1
+      while len(self.pending) >= self.depth:
+        putter = asyncio.get_event_loop().create_future()
+        self.putters.append(putter)
+        await putter
+        if self.closed:
+          # unsubscribed while waiting, the event is dropped
+          self.dropped = self.dropped + 1
+          return
+      self.pending.append(e)
+    self.max_depth = max(self.max_depth, len(self.pending))
+    if self.task == None:
+      self.task = asyncio.ensure_future(self._run())
+    elif self.wakeup != None and not self.wakeup.done():
+      self.wakeup.set_result(None)
+
+  def _pop(self):
+    if self.policy == 'latest':
+      return self.pending.popitem(last=False)[1]
+    e = self.pending.popleft()
+    while len(self.putters) > 0:
+      putter = self.putters.popleft()
+      if not putter.done():
+        putter.set_result(None)
+        break
+    return e
+
+  async def _run(self):
+    while True:
+      if len(self.pending) == 0:
+        self.wakeup = asyncio.get_event_loop().create_future()
+        await self.wakeup
+        self.wakeup = None
+        continue
+      e = self._pop()
+      try:
+        await self.callback(e)
+      except Exception:
+        _logger.exception('Subscriber {0} failed on {1}'.format(_callback_name(self.callback), e['key']))
+      self.delivered = self.delivered + 1
+
+  def close(self):
+    """Stops delivery. Blocked publishers return, their events are dropped."""
+    self.closed = True
+    if self.task != None:
+      self.task.cancel()
+      self.task = None
+    for putter in self.putters:
+      if not putter.done():
+        putter.set_result(None)
+    self.putters.clear()
+    self.pending.clear()
+
+  def to_dict(self):
+    return {
+      'callback': _callback_name(self.callback),
+      'policy': self.policy,
+      'depth_limit': None if self.policy == 'latest' else self.depth,
+      'depth': len(self.pending),
+      'max_depth': self.max_depth,
+      'received': self.received,
+      'delivered': self.delivered,
+      'dropped': self.dropped,
+      'blocked': self.blocked,
+    }
+
+
 async def publish(key, value):
   #_logger.debug('Event {0}'.format(key))
-  coroutines = [subscriber({'key': key, 'value': value})
-                for subscriber, key_set in _subscribers.items()
-                if key in key_set]
+  coroutines = []
+  for subscriber, key_set in list(_subscribers.items()):
+    if key in key_set:
+      queue = _queues.get(subscriber)
+      e = {'key': key, 'value': value}
+      coroutines.append(subscriber(e) if queue == None else queue.put(e))
   await asyncio.gather(*coroutines)
 
 
-def subscribe(callback, keys):
+def subscribe(callback, keys, policy=None, depth=DEFAULT_DEPTH):
   """Subscibe a set of event keys for a callback.
 
   Args:
     callback: coroutine function for event callback.
     keys: list, set or tuple of object for event keys.
+    policy: None to be awaited by `publish`, or the policy of a queue, one
+      of `POLICIES`.
+    depth: events a `drop_oldest` or `block` queue holds. A `latest` queue
+      holds one per key.
   """
   assert type(keys) in (set, list, tuple)
+  assert policy == None or policy in POLICIES
+  unsubscribe(callback)
   _subscribers[callback] = keys
+  if policy != None:
+    _queues[callback] = SubscriberQueue(callback, policy, depth)
 
 
 def unsubscribe(callback):
@@ -32,3 +175,10 @@ def unsubscribe(callback):
   """
   if callback in _subscribers:
     del _subscribers[callback]
+  queue = _queues.pop(callback, None)
+  if queue != None:
+    queue.close()
+
+
+def get_stats():
+  return [queue.to_dict() for queue in _queues.values()]
@@ -1,16 +1,53 @@
+import asyncio
+import json
+
 from sanic import Blueprint
 from sanic import response
 
 from hexi.service import web
+from hexi.util import broadcast
+from hexi.util import logqueue
 from hexi.util import taillog
 
+STREAM_INTERVAL = 0.5
+
 bp = Blueprint('log', url_prefix='/core/log')
 
 
+def _get_lines(since):
+  seq, lines = taillog.log_queue.since(since)
+  return { 'seq': seq, 'data': lines }
+
+stream = broadcast.WebSocketBroadcaster(initial=lambda: json.dumps(_get_lines(0)))
+
+
 @bp.route('/api/logs')
 async def get_logs(request):
-  return response.json({ 'code': 200, 'data': taillog.log_queue })
+  """`?since=seq` returns only lines after seq, pass the returned `seq` next time."""
+  try:
+    since = int(request.args.get('since', 0))
+  except ValueError:
+    return response.json({ 'code': 400, 'reason': 'Invalid `since`' })
+  data = _get_lines(since)
+  return response.json({ 'code': 200, 'data': data['data'], 'seq': data['seq'] })
+
+
+@bp.route('/api/stats')
+async def get_stats(request):
+  return response.json({ 'code': 200, 'data': logqueue.get_stats() })
+
+
+async def stream_loop_async():
+  sent = taillog.log_queue.seq
+  while True:
+    await asyncio.sleep(STREAM_INTERVAL)
+    if sent < taillog.log_queue.seq:
+      data = _get_lines(sent)
+      sent = data['seq']
+      stream.send(json.dumps(data))
 
 
 def init():
+  stream.attach_ws_endpoint(bp, '/api/log_stream')
   web.app.blueprint(bp)
+  asyncio.ensure_future(stream_loop_async())
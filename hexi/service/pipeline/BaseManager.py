@@ -1,7 +1,11 @@
-from sanic import response
+import json
+
 from hexi.service import event
 from hexi.service import plugin
+from hexi.service import control
+from hexi.service.pipeline import budget
 from hexi.plugin.BaseCoreModule import BaseCoreModule
+from hexi.util import httpcache
 
 
 class BaseManager(BaseCoreModule):
@@ -14,46 +18,116 @@ class BaseManager(BaseCoreModule):
     self.plugin_category = plugin_category
     self.plugin_class = plugin_class
     self.config_default['enabled_plugins'] = []
+    self.config_default['budget'] = dict(budget.DEFAULT_CONFIG)
+    self.watchdog = None
 
   def init(self):
     super().init()
 
+    # saved configs may predate settings added since
+    self.config['budget'] = budget.validate_config(dict(budget.DEFAULT_CONFIG, **self.config['budget']))
+    self.watchdog = budget.Watchdog(self.config['budget'])
+    budget.add_category(self.plugin_category, self.watchdog)
+
+    control.register('{0}.plugins'.format(self.id), self._control_get_plugins)
+    control.register('{0}.enable'.format(self.id), self._control_set_activated_plugins)
+    control.register('{0}.budget'.format(self.id), self._control_get_budget)
+    control.register('{0}.set_budget'.format(self.id), self._control_set_budget)
+
+    event.subscribe(self._activate_plugins, ['hexi.start'])
+    plugin.add_category(self.plugin_category, self.plugin_class)
+
+  def init_web(self):
+    super().init_web()
+    from sanic import response
+
     @self.bp.route('/api/plugins')
     async def get_plugins(request):
-      raw_plugins = plugin.get_plugins_in_category(self.plugin_category)
-      plugins = [{
-        'id': raw_plugin.details.get('Core', 'Id'),
-        'name': raw_plugin.name,
-        'description': raw_plugin.description,
-        'configurable': raw_plugin.plugin_object.configurable,
-      } for raw_plugin in raw_plugins]
-      return response.json({
+      # callback stats change every tick, they are never cached
+      if request.args.get('stats'):
+        return response.json({
+          'code': 200,
+          'data': self.get_plugins(stats=True),
+        })
+      return httpcache.cached_response(request, '{0}.plugins'.format(self.id), lambda: json.dumps({
         'code': 200,
-        'data': {
-          'available': plugins,
-          'enabled': self._get_current_activated_plugins(),
-        },
-      })
+        'data': self.get_plugins(),
+      }).encode('utf-8'), 'application/json')
 
     @self.bp.route('/api/plugins/enabled', methods=['POST'])
     async def set_activated_plugins(request):
       activated_plugins = request.json['id']
-      plugin.set_activated_plugins(self.plugin_category, activated_plugins)
-      self.config['enabled_plugins'] = self._get_current_activated_plugins()
-      self.save_config()
+      await self.set_activated_plugins(activated_plugins)
       return response.json({
         'code': 200,
         'data': activated_plugins,
       })
 
-    event.subscribe(self._activate_plugins, ['hexi.start'])
-    plugin.add_category(self.plugin_category, self.plugin_class)
+    @self.bp.route('/api/budget', methods=['GET'])
+    async def get_budget(request):
+      return response.json({
+        'code': 200,
+        'data': self.watchdog.to_dict(),
+      })
+
+    @self.bp.route('/api/budget', methods=['POST'])
+    async def set_budget(request):
+      try:
+        self.set_budget(request.json)
+        return response.json({ 'code': 200 })
+      except Exception as e:
+        return response.json({ 'code': 400, 'reason': str(e) })
+
+  def get_plugins(self, stats=False):
+    """
+      stats: whether to include the callback times of the plugins, see
+        `hexi.service.pipeline.budget`.
+    """
+    raw_plugins = plugin.get_plugins_in_category(self.plugin_category)
+    plugins = [{
+      'id': raw_plugin.id,
+      'name': raw_plugin.name,
+      'description': raw_plugin.description,
+      'configurable': raw_plugin.configurable,
+    } for raw_plugin in raw_plugins]
+    result = {
+      'available': plugins,
+      'enabled': self._get_current_activated_plugins(),
+    }
+    if stats:
+      result['budget'] = self.watchdog.to_dict()
+    return result
+
+  def set_budget(self, config):
+    """config: settings to change, the others keep their current value."""
+    self.config['budget'] = budget.validate_config(dict(self.config['budget'], **config))
+    self.watchdog.config = self.config['budget']
+    self.save_config()
+
+  async def set_activated_plugins(self, ids):
+    await plugin.set_activated_plugins(self.plugin_category, ids)
+    self.config['enabled_plugins'] = self._get_current_activated_plugins()
+    self.save_config()
+
+  async def _control_get_plugins(self, request):
+    return self.get_plugins(stats=request.get('stats', False))
+
+  async def _control_set_activated_plugins(self, request):
+    await self.set_activated_plugins(request['id'])
+    return self.config['enabled_plugins']
+
+  async def _control_get_budget(self, request):
+    return self.watchdog.to_dict()
+
+  async def _control_set_budget(self, request):
+    self.set_budget(request['budget'])
+    return self.config['budget']
 
   def _get_current_activated_plugins(self):
     raw_plugins = plugin.get_plugins_in_category(self.plugin_category)
-    return [raw_plugin.details.get('Core', 'Id')
+    return [raw_plugin.id
             for raw_plugin in raw_plugins
-            if raw_plugin.plugin_object.is_activated]
+            if raw_plugin.is_activated]
 
   async def _activate_plugins(self, e):
-    plugin.set_activated_plugins(self.plugin_category, self.config['enabled_plugins'])
+    await plugin.set_activated_plugins(self.plugin_category, self.config['enabled_plugins'])
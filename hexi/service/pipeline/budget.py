@@ -0,0 +1,163 @@
+"""Time spent by plugins in their pipeline callbacks.
+
+Callbacks run inline on the event loop, so a slow plugin delays every other
+one. Each manager keeps a `Watchdog` for its category, and the plugin base
+classes call their callbacks through `run`, which measures the wall and CPU
+time of each call and keeps the last `WINDOW` of them per plugin.
+
+A call taking longer than `budget_ms` is an overrun. After `overruns`
+overruns in a row the policy of the manager applies:
+
+  warn: logs a warning once per streak.
+  skip_frame: drops every other frame of the plugin until a call fits the
+    budget again.
+  deactivate: deactivates the plugin until it is enabled again or hexi
+    restarts.
+"""
+
+import asyncio
+import collections
+import logging
+import time
+
+import numpy
+
+_logger = logging.getLogger(__name__)
+
+POLICIES = ('warn', 'skip_frame', 'deactivate')
+# calls kept per plugin for the percentiles
+WINDOW = 200
+PERCENTILES = (50, 90, 99)
+
+DEFAULT_CONFIG = {
+  'budget_ms': 10,
+  'overruns': 5,
+  'policy': 'warn',
+}
+
+# category -> Watchdog
+watchdogs = {}
+
+# CPU time of the calling thread only, rig drivers run on other threads
+_cpu_time = getattr(time, 'thread_time', time.process_time)
+
+
+class CallbackStats():
+  def __init__(self):
+    self.wall = collections.deque(maxlen=WINDOW)
+    self.cpu = collections.deque(maxlen=WINDOW)
+    self.calls = 0
+    self.overruns = 0
+    self.streak = 0
+    self.skipped = 0
+    self.skip_next = False
+    self.deactivations = 0
+
+  def add(self, wall, cpu, overrun):
+    self.wall.append(wall)
+    self.cpu.append(cpu)
+    self.calls = self.calls + 1
+    if overrun:
+      self.overruns = self.overruns + 1
+      self.streak = self.streak + 1
+    else:
+      self.streak = 0
+
+  def to_dict(self):
+    def summarize(values):
+      if len(values) == 0:
+        return None
+      values = numpy.array(values) * 1000
+      summary = { 'p{0}'.format(p): float(v) for p, v in zip(PERCENTILES, numpy.percentile(values, PERCENTILES)) }
+      summary['max'] = float(values.max())
+      return summary
+
+    return {
+      'calls': self.calls,
+      'overruns': self.overruns,
+      'streak': self.streak,
+      'skipped': self.skipped,
+      'deactivations': self.deactivations,
+      'wall_ms': summarize(self.wall),
+      'cpu_ms': summarize(self.cpu),
+    }
+
+
+class Watchdog():
+  def __init__(self, config):
+    """
+      config: dict like `DEFAULT_CONFIG`, usually part of the manager config,
+        read on every call so changes apply at once.
+    """
+    self.config = config
+    # plugin id -> CallbackStats
+    self.stats = {}
+
+  def run(self, plugin_object, callback, *args):
+    stats = self.stats.get(plugin_object.id)
+    if stats == None:
+      stats = self.stats[plugin_object.id] = CallbackStats()
+    if stats.skip_next:
+      stats.skip_next = False
+      stats.skipped = stats.skipped + 1
+      return None
+    wall_start = time.perf_counter()
+    cpu_start = _cpu_time()
+    try:
+      return callback(*args)
+    finally:
+      wall = time.perf_counter() - wall_start
+      cpu = _cpu_time() - cpu_start
+      stats.add(wall, cpu, wall * 1000 > self.config['budget_ms'])
+      if stats.streak >= self.config['overruns']:
+        self.on_overrun(plugin_object, stats, wall)
+
+  def on_overrun(self, plugin_object, stats, wall):
+    policy = self.config['policy']
+    if policy == 'skip_frame':
+      stats.skip_next = True
+    elif policy == 'deactivate':
+      from hexi.service import plugin
+      _logger.error('Plugin {0} is deactivated, {1} calls in a row exceeded {2} ms'.format(
+        plugin_object.id, stats.streak, self.config['budget_ms']))
+      stats.streak = 0
+      stats.deactivations = stats.deactivations + 1
+      asyncio.ensure_future(plugin.deactivate_plugin_by_id(plugin_object.id))
+      return
+    if stats.streak == self.config['overruns']:
+      _logger.warning('Plugin {0} took {1:.1f} ms, {2} calls in a row exceeded {3} ms'.format(
+        plugin_object.id, wall * 1000, stats.streak, self.config['budget_ms']))
+
+  def to_dict(self):
+    return {
+      'config': self.config,
+      'plugins': { id: stats.to_dict() for id, stats in self.stats.items() },
+    }
+
+
+def validate_config(config):
+  """Returns a normalized copy of a complete budget config, raises
+  ValueError on bad or missing values."""
+  missing = [key for key in DEFAULT_CONFIG if key not in config]
+  if len(missing) > 0:
+    raise ValueError('Missing budget settings: {0}'.format(', '.join(missing)))
+  config = dict(config)
+  if config['policy'] not in POLICIES:
+    raise ValueError('Unknown policy {0}, expected one of {1}'.format(config['policy'], ', '.join(POLICIES)))
+  config['budget_ms'] = float(config['budget_ms'])
+  config['overruns'] = int(config['overruns'])
+  if config['budget_ms'] <= 0 or config['overruns'] < 1:
+    raise ValueError('budget_ms must be positive and overruns at least 1')
+  return config
+
+
+def add_category(category, watchdog):
+  watchdogs[category] = watchdog
+
+
+def run(plugin_object, callback, *args):
+  """Calls a pipeline callback of a plugin, measured by the watchdog of its category."""
+  watchdog = watchdogs.get(plugin_object.category)
+  if watchdog == None:
+    return callback(*args)
+  return watchdog.run(plugin_object, callback, *args)
@@ -0,0 +1,173 @@
+"""Input samples between pipeline ticks.
+
+Input plugins emit samples at their own rate and the input manager publishes
+one signal per tick. Each input plugin has an `InputTrack` keeping its last
+sample. At a tick, a track which got a sample since the last tick is fresh.
+Otherwise its sample is held, or extrapolated by the predictor, until it is
+older than `timeout`: then the input is gone, the track is stale and stops
+contributing. The track of a deactivated input plugin is removed. The tick
+takes the signal of the track with the newest sample.
+
+Predictors estimate the rate of change of each axis:
+
+  hold: none, the last sample is repeated.
+  linear: from the last two samples.
+  alpha_beta: an alpha-beta filter over all samples, less sensitive to noise
+    and uneven arrival.
+
+With a predictor, fresh samples are extrapolated as well, by their age at the
+tick including the transport latency, which is reported by the plugin or
+configured per plugin in `latency`. The age extrapolated over is capped to
+`max_horizon`.
+"""
+
+import copy
+
+import numpy
+
+PREDICTORS = ('hold', 'linear', 'alpha_beta')
+STATES = ('fresh', 'held', 'extrapolated', 'stale')
+# samples closer than this, in seconds, give no rate
+MIN_INTERVAL = 0.001
+
+DEFAULT_CONFIG = {
+  'timeout': 0.5,
+  'predictor': 'hold',
+  'max_horizon': 0.1,
+  'alpha': 0.5,
+  'beta': 0.1,
+  # input plugin id -> transport latency in seconds, for plugins not reporting it
+  'latency': {},
+}
+
+
+class InputTrack():
+  def __init__(self, source):
+    self.source = source
+    # loop time the last sample was measured at, its arrival minus latency
+    self.time = None
+    self.signal = None
+    # filtered signal of alpha_beta
+    self.estimate = None
+    self.rate = numpy.zeros(6)
+    self.fresh = False
+    self.latency = 0
+    self.samples = 0
+    self.counts = { state: 0 for state in STATES }
+
+  def add(self, signal, time, latency, config):
+    signal = numpy.asarray(signal, dtype=float)
+    time = time - latency
+    predictor = config['predictor']
+    if self.time == None or time - self.time > config['timeout']:
+      # first sample, or the first after the input was gone
+      self.estimate = signal
+      self.rate = numpy.zeros(6)
+    elif time - self.time >= MIN_INTERVAL:
+      dt = time - self.time
+      if predictor == 'linear':
+        self.rate = (signal - self.signal) / dt
+      elif predictor == 'alpha_beta':
+        predicted = self.estimate + self.rate * dt
+        residual = signal - predicted
+        self.estimate = predicted + config['alpha'] * residual
+        self.rate = self.rate + config['beta'] / dt * residual
+    if predictor != 'alpha_beta':
+      # kept current, so switching to alpha_beta starts from the last sample
+      self.estimate = signal
+    self.signal = signal
+    self.time = time
+    self.latency = latency
+    self.fresh = True
+    self.samples = self.samples + 1
+
+  def sample(self, now, config):
+    """The signal of the track at loop time `now`, None if stale."""
+    if self.time == None or now - self.time > config['timeout']:
+      self.counts['stale'] = self.counts['stale'] + 1
+      return None
+    predictor = config['predictor']
+    if self.fresh:
+      state = 'fresh'
+    else:
+      state = 'held' if predictor == 'hold' else 'extrapolated'
+    self.counts[state] = self.counts[state] + 1
+    self.fresh = False
+    if predictor == 'hold':
+      return self.signal
+    base = self.estimate if predictor == 'alpha_beta' else self.signal
+    return base + self.rate * min(now - self.time, config['max_horizon'])
+
+  def to_dict(self, now):
+    return {
+      'samples': self.samples,
+      'age_ms': (now - self.time) * 1000 if self.time != None else None,
+      'latency_ms': self.latency * 1000,
+      'counts': self.counts,
+    }
+
+
+class InputTracks():
+  def __init__(self, config):
+    """
+      config: dict like `DEFAULT_CONFIG`, read on every call so changes apply at once.
+    """
+    self.config = config
+    # input plugin id -> InputTrack
+    self.tracks = {}
+
+  def add(self, source, signal, time, latency=None):
+    """Adds a sample of an input plugin which arrived at loop time `time`.
+    Raises ValueError on a negative latency."""
+    if latency == None:
+      latency = self.config['latency'].get(source, 0)
+    if latency < 0:
+      raise ValueError('Latency of {0} must not be negative'.format(source))
+    track = self.tracks.get(source)
+    if track == None:
+      track = self.tracks[source] = InputTrack(source)
+    track.add(signal, time, latency, self.config)
+
+  def sample(self, now):
+    """The signal of the tick at loop time `now`, None if every input is gone."""
+    signal = None
+    newest = None
+    for track in self.tracks.values():
+      value = track.sample(now, self.config)
+      if value is not None and (newest == None or track.time > newest):
+        signal = value
+        newest = track.time
+    return signal
+
+  def remove(self, source):
+    """Forgets the track of an input plugin, with its counters."""
+    self.tracks.pop(source, None)
+
+  def reset(self):
+    """Forgets the samples so far, counters are kept."""
+    for track in self.tracks.values():
+      track.time = None
+      track.fresh = False
+
+  def to_dict(self, now):
+    return {
+      'config': self.config,
+      'inputs': { source: track.to_dict(now) for source, track in self.tracks.items() },
+    }
+
+
+def validate_config(config):
+  """Returns a complete dropout config, raises ValueError on bad values."""
+  config = dict(copy.deepcopy(DEFAULT_CONFIG), **config)
+  if config['predictor'] not in PREDICTORS:
+    raise ValueError('Unknown predictor {0}, expected one of {1}'.format(config['predictor'], ', '.join(PREDICTORS)))
+  for key in ('timeout', 'max_horizon', 'alpha', 'beta'):
+    config[key] = float(config[key])
+  if config['timeout'] <= 0 or config['max_horizon'] < 0:
+    raise ValueError('timeout must be positive and max_horizon not negative')
+  if not 0 < config['alpha'] <= 1 or not 0 <= config['beta'] <= 2:
+    raise ValueError('alpha must be within (0, 1] and beta within [0, 2]')
+  config['latency'] = { source: float(value) for source, value in config['latency'].items() }
+  if any(value < 0 for value in config['latency'].values()):
+    raise ValueError('latency must not be negative')
+  return config
@@ -1,36 +1,146 @@
 import asyncio
+import copy
 import time
 
 from hexi.service import event
 from hexi.service.pipeline.BaseManager import BaseManager
-from hexi.util import deque
+from hexi.service import control
+from hexi.service.pipeline import dropout
+from hexi.util import idlegc
+from hexi.util import timeseries
 from hexi.plugin.InputPlugin import InputPlugin
 
 
 EMPTY_SIGNAL = [0, 0, 0, 0, 0, 0]
+TICK_SEC = 1 / 20
+# in memory, a few hours of 6-DOF history at 20 Hz, less for noisy signals.
+# Older history stays on disk, see hexi.util.timeseries.STORE_PLACE
+HISTORY_MAX_BYTES = 8 * 1024 * 1024
 
 class InputManager(BaseManager):
   def __init__(self):
     super().__init__('input', 'input', InputPlugin)
-    self.data_log_queue = deque.WebSocketPipingDeque(maxlen=400)
+    self.data_log_queue = timeseries.TelemetryLog(
+      400, template=[float, 6], store='input', max_bytes=HISTORY_MAX_BYTES)
+    self.config_default['dropout'] = copy.deepcopy(dropout.DEFAULT_CONFIG)
+    self.tracks = None
 
   def init(self):
     super().init()
+    control.register('{0}.history'.format(self.id), self._control_get_history)
+    control.register('{0}.dropout'.format(self.id), self._control_get_dropout)
+    control.register('{0}.set_dropout'.format(self.id), self._control_set_dropout)
 
-    self.last_signal = EMPTY_SIGNAL
+    self.config['dropout'] = dropout.validate_config(self.config['dropout'])
+    self.tracks = dropout.InputTracks(self.config['dropout'])
+    self.script = None
+    self.script_sn = 0
     asyncio.ensure_future(self.fetch_signal_loop_async())
 
-    self.data_log_queue.attach_ws_endpoint(self.bp, '/api/input_log')
     event.subscribe(self.on_input_raw_signal, ['hexi.pipeline.input.raw_data'])
+    event.subscribe(self.on_input_raw_script, ['hexi.pipeline.input.raw_script'])
+    event.subscribe(self.on_input_raw_gone, ['hexi.pipeline.input.raw_gone'])
+
+  def init_web(self):
+    super().init_web()
+    self.data_log_queue.attach_ws_endpoint(self.bp, '/api/input_log')
+    self.data_log_queue.attach_history_endpoint(self.bp, '/api/history')
+    from sanic import response
+
+    @self.bp.route('/api/dropout', methods=['GET'])
+    async def get_dropout(request):
+      return response.json({
+        'code': 200,
+        'data': self.get_dropout(),
+      })
+
+    @self.bp.route('/api/dropout', methods=['POST'])
+    async def set_dropout(request):
+      try:
+        self.set_dropout(request.json)
+        return response.json({ 'code': 200 })
+      except Exception as e:
+        return response.json({ 'code': 400, 'reason': str(e) })
+
+  def get_dropout(self):
+    return self.tracks.to_dict(asyncio.get_event_loop().time())
+
+  def set_dropout(self, config):
+    self.config['dropout'] = dropout.validate_config(config)
+    self.tracks.config = self.config['dropout']
+    self.save_config()
 
   async def fetch_signal_loop_async(self):
+    loop = asyncio.get_event_loop()
     while True:
-      signal = self.last_signal
-      self.last_signal = EMPTY_SIGNAL
-      self.data_log_queue.append([int(time.time()), signal])
-      # TODO: test whether currently started
-      asyncio.ensure_future(event.publish('hexi.pipeline.input.data', signal))
-      await asyncio.sleep(1 / 20)
+      idlegc.collector.on_tick(TICK_SEC)
+      if self.script != None:
+        self.play_script_sample()
+      else:
+        # held or extrapolated between input samples, see dropout
+        signal = self.tracks.sample(loop.time())
+        signal = EMPTY_SIGNAL if signal is None else signal.tolist()
+        self.data_log_queue.append([time.time(), signal])
+        # TODO: test whether currently started
+        asyncio.ensure_future(event.publish('hexi.pipeline.input.data', signal))
+      await asyncio.sleep(TICK_SEC)
+
+  def play_script_sample(self):
+    script = self.script
+    index = script['index']
+    signal = script['samples'][index]
+    script['index'] = index + 1
+    self.data_log_queue.append([time.time(), signal])
+    asyncio.ensure_future(event.publish('hexi.pipeline.input.script_data', {
+      'source': script['source'],
+      'sn': script['sn'],
+      'id': script['id'],
+      'index': index,
+      'total': len(script['samples']),
+      'signal': signal,
+    }))
+    if script['index'] >= len(script['samples']):
+      self.finish_script()
+
+  def finish_script(self):
+    script = self.script
+    self.script = None
+    # live input resumes from its next sample
+    self.tracks.reset()
+    asyncio.ensure_future(event.publish('hexi.pipeline.input.script_done', {
+      'source': script['source'],
+      'sn': script['sn'],
+      'id': script['id'],
+      'played': script['index'],
+      'total': len(script['samples']),
+    }))
 
   async def on_input_raw_signal(self, e):
-    self.last_signal = e['value']
+    value = e['value']
+    self.tracks.add(value['source'], value['signal'], value['time'], value['latency'])
+
+  async def on_input_raw_gone(self, e):
+    source = e['value']['source']
+    self.tracks.remove(source)
+    if self.script != None and self.script['source'] == source:
+      self.finish_script()
+
+  async def on_input_raw_script(self, e):
+    # a new script replaces the running one
+    if self.script != None:
+      self.finish_script()
+    self.script_sn = self.script_sn + 1
+    self.script = dict(e['value'], sn=self.script_sn, index=0)
+    asyncio.ensure_future(event.publish('hexi.pipeline.input.script', self.script))
+    if len(self.script['samples']) == 0:
+      self.finish_script()
+
+  async def _control_get_history(self, request):
+    return self.data_log_queue.query(**self.data_log_queue.query_args(request))
+
+  async def _control_get_dropout(self, request):
+    return self.get_dropout()
+
+  async def _control_set_dropout(self, request):
+    self.set_dropout(request['dropout'])
+    return self.config['dropout']
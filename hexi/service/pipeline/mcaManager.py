@@ -3,21 +3,39 @@ import time
 
 from hexi.service import event
 from hexi.service.pipeline.BaseManager import BaseManager
-from hexi.util import deque
+from hexi.service import control
+from hexi.util import timeseries
 from hexi.plugin.MCAPlugin import MCAPlugin
 
 
+# in memory, a few hours of 6-DOF history at 20 Hz, less for noisy signals.
+# Older history stays on disk, see hexi.util.timeseries.STORE_PLACE
+HISTORY_MAX_BYTES = 8 * 1024 * 1024
+
 class MCAManager(BaseManager):
   def __init__(self):
     super().__init__('mca', 'mca', MCAPlugin)
-    self.data_log_queue = deque.WebSocketPipingDeque(maxlen=400)
+    self.data_log_queue = timeseries.TelemetryLog(
+      400, template=[float, 6], store='mca', max_bytes=HISTORY_MAX_BYTES)
 
   def init(self):
     super().init()
-    self.data_log_queue.attach_ws_endpoint(self.bp, '/api/mca_log')
+    control.register('{0}.history'.format(self.id), self._control_get_history)
     event.subscribe(self.on_mca_raw_signal, ['hexi.pipeline.mca.raw_data'])
+    event.subscribe(self.on_mca_raw_seat_signal, ['hexi.pipeline.mca.raw_seat_data'])
+
+  def init_web(self):
+    super().init_web()
+    self.data_log_queue.attach_ws_endpoint(self.bp, '/api/mca_log')
+    self.data_log_queue.attach_history_endpoint(self.bp, '/api/history')
 
   async def on_mca_raw_signal(self, e):
     input_signal, mca_signal = e['value']
-    self.data_log_queue.append([int(time.time()), mca_signal])
+    self.data_log_queue.append([time.time(), mca_signal])
     asyncio.ensure_future(event.publish('hexi.pipeline.mca.data', e['value']))
+
+  async def on_mca_raw_seat_signal(self, e):
+    asyncio.ensure_future(event.publish('hexi.pipeline.mca.seat_data', e['value']))
+
+  async def _control_get_history(self, request):
+    return self.data_log_queue.query(**self.data_log_queue.query_args(request))
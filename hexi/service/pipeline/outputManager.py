@@ -1,7 +1,97 @@
+import logging
+
+from hexi.service import event
+from hexi.service import control
+from hexi.service import plugin
+from hexi.service.pipeline import rig
 from hexi.service.pipeline.BaseManager import BaseManager
 from hexi.plugin.OutputPlugin import OutputPlugin
 
+_logger = logging.getLogger(__name__)
+
 
 class OutputManager(BaseManager):
   def __init__(self):
     super().__init__('output', 'output', OutputPlugin)
+    self.config_default['rigs'] = []
+    self.config_default['rig_workers'] = 4
+    self.rig_pool = None
+
+  def init(self):
+    super().init()
+
+    self.rebuild_rigs()
+
+    control.register('output.rigs', self._control_get_rigs)
+    control.register('output.set_rigs', self._control_set_rigs)
+
+    event.subscribe(self.on_mca_signal, ['hexi.pipeline.mca.data'])
+    event.subscribe(self.on_mca_seat_signal, ['hexi.pipeline.mca.seat_data'])
+
+  def init_web(self):
+    super().init_web()
+    from sanic import response
+
+    @self.bp.route('/api/rigs', methods=['GET'])
+    async def get_rigs(request):
+      return response.json({
+        'code': 200,
+        'data': self.get_rigs(),
+      })
+
+    @self.bp.route('/api/rigs', methods=['POST'])
+    async def set_rigs(request):
+      try:
+        await self.set_rigs(request.json)
+        return response.json({ 'code': 200 })
+      except Exception as e:
+        return response.json({ 'code': 400, 'reason': str(e) })
+
+  def get_rigs(self):
+    return {
+      'config': self.config['rigs'],
+      'rigs': self.rig_pool.to_list(),
+    }
+
+  def get_seat_count(self):
+    """Seats driven by the activated MCA plugins, None if none is activated."""
+    counts = [record.plugin_object.get_seat_count()
+              for record in plugin.get_plugins_in_category('mca')
+              if record.is_activated]
+    return max(counts) if len(counts) > 0 else None
+
+  async def set_rigs(self, rig_configs):
+    """Raises ValueError on a bad rig config, then nothing is changed."""
+    rig.validate_configs(rig_configs, self.get_seat_count())
+    rig_pool = rig.RigPool(rig_configs, self.config['rig_workers'], strict=True)
+    old_rig_pool = self.rig_pool
+    self.rig_pool = rig_pool
+    if old_rig_pool != None:
+      await old_rig_pool.close_async()
+    self.config['rigs'] = rig_configs
+    self.save_config()
+
+  async def _control_get_rigs(self, request):
+    return self.get_rigs()
+
+  async def _control_set_rigs(self, request):
+    await self.set_rigs(request['rigs'])
+    return self.config['rigs']
+
+  def rebuild_rigs(self):
+    """Builds the rigs of the saved config, leaving out those which fail."""
+    try:
+      self.rig_pool = rig.RigPool(self.config['rigs'], self.config['rig_workers'])
+    except ValueError:
+      _logger.exception('Cannot create rigs')
+      self.rig_pool = rig.RigPool([], self.config['rig_workers'])
+
+  async def on_mca_signal(self, e):
+    input_signal, motion_signal = e['value']
+    self.rig_pool.dispatch(motion_signal, 0)
+
+  async def on_mca_seat_signal(self, e):
+    # seat 0 is already dispatched by `hexi.pipeline.mca.data`
+    input_signals, motion_signals = e['value']
+    for seat in range(1, len(motion_signals)):
+      self.rig_pool.dispatch(motion_signals[seat], seat)
@@ -0,0 +1,234 @@
+import asyncio
+import concurrent.futures
+import logging
+import socket
+import struct
+import time
+import numpy
+
+from hexi.util import stewart
+
+_logger = logging.getLogger(__name__)
+
+
+class BaseRigDriver():
+  """A driver writes leg lengths to the hardware of a single rig.
+
+  Drivers are called from worker threads, one call at a time per rig.
+  """
+
+  def __init__(self, options):
+    self.options = options
+
+  def open(self):
+    pass
+
+  def write(self, lengths, pose):
+    raise NotImplementedError()
+
+  def close(self):
+    pass
+
+
+class NullRigDriver(BaseRigDriver):
+  """Computes everything but writes nowhere. Useful for testing geometry."""
+
+  def write(self, lengths, pose):
+    pass
+
+
+class UdpRigDriver(BaseRigDriver):
+  """Sends `[sn, l1..l6, x, y, z, alpha, beta, gamma]` as a little-endian datagram."""
+
+  PACKET = struct.Struct('<I12f')
+
+  def open(self):
+    self.address = (self.options['host'], int(self.options['port']))
+    self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    self.sn = 0
+
+  def write(self, lengths, pose):
+    self.sn = (self.sn + 1) & 0xFFFFFFFF
+    self.socket.sendto(self.PACKET.pack(self.sn, *lengths, *pose), self.address)
+
+  def close(self):
+    self.socket.close()
+
+
+DRIVERS = {
+  'null': NullRigDriver,
+  'udp': UdpRigDriver,
+}
+
+
+class RigStats():
+  def __init__(self):
+    self.reset()
+
+  def reset(self):
+    self.ticks = 0
+    self.skipped = 0
+    self.clipped = 0
+    self.errors = 0
+    self.last_ms = 0
+    self.avg_ms = 0
+    self.max_ms = 0
+
+  def add(self, elapsed_ms):
+    self.ticks = self.ticks + 1
+    self.last_ms = elapsed_ms
+    self.avg_ms = elapsed_ms if self.ticks == 1 else 0.95 * self.avg_ms + 0.05 * elapsed_ms
+    self.max_ms = max(self.max_ms, elapsed_ms)
+
+  def to_dict(self):
+    return {
+      'ticks': self.ticks,
+      'skipped': self.skipped,
+      'clipped': self.clipped,
+      'errors': self.errors,
+      'last_ms': self.last_ms,
+      'avg_ms': self.avg_ms,
+      'max_ms': self.max_ms,
+    }
+
+
+class Rig():
+  """A physical platform: its own geometry, pose limits and driver instance."""
+
+  def __init__(self, config):
+    if not isinstance(config, dict) or 'id' not in config:
+      raise ValueError('A rig config must be an object with an id')
+    self.id = config['id']
+    self.config = config
+    self.seat = config.get('seat', 0)
+    self.kinematics = stewart.StewartKinematics(config.get('geometry'))
+    limits = config.get('limits', {})
+    self.pose_max = numpy.array([
+      limits.get('x', 0.1), limits.get('y', 0.1), limits.get('z', 0.1),
+      numpy.deg2rad(limits.get('alpha', 15)),
+      numpy.deg2rad(limits.get('beta', 15)),
+      numpy.deg2rad(limits.get('gamma', 15)),
+    ])
+    driver = config.get('driver', {'type': 'null'})
+    if driver.get('type') not in DRIVERS:
+      raise ValueError('Unknown driver type {0}, expected one of {1}'.format(driver.get('type'), ', '.join(DRIVERS)))
+    self.driver = DRIVERS[driver['type']](driver)
+    self.stats = RigStats()
+    self.busy = False
+    self.last_lengths = None
+
+  def open(self):
+    self.driver.open()
+
+  def close(self):
+    self.driver.close()
+
+  def process(self, motion_signal):
+    """Runs in a worker thread."""
+    start = time.perf_counter()
+    pose = numpy.clip(motion_signal, -self.pose_max, self.pose_max)
+    lengths, clipped = self.kinematics.clip_leg_lengths(self.kinematics.leg_lengths(pose))
+    self.driver.write(lengths.tolist(), pose.tolist())
+    self.last_lengths = lengths
+    return clipped, (time.perf_counter() - start) * 1000
+
+  def to_dict(self):
+    return {
+      'id': self.id,
+      'seat': self.seat,
+      'busy': self.busy,
+      'lengths': self.last_lengths.tolist() if self.last_lengths is not None else None,
+      'stats': self.stats.to_dict(),
+    }
+
+
+def validate_configs(rig_configs, seats=None):
+  """Raises ValueError on rig configs which cannot all be applied.
+
+    seats: number of seats signals are emitted for, None if unknown.
+  """
+  if not isinstance(rig_configs, list):
+    raise ValueError('Rig configs must be a list')
+  ids = set()
+  for index, config in enumerate(rig_configs):
+    if not isinstance(config, dict) or 'id' not in config:
+      raise ValueError('Rig {0} must be an object with an id'.format(index))
+    if config['id'] in ids:
+      raise ValueError('Duplicate rig id {0}'.format(config['id']))
+    ids.add(config['id'])
+    seat = config.get('seat', 0)
+    if not isinstance(seat, int) or isinstance(seat, bool) or seat < 0:
+      raise ValueError('Rig {0}: seat must be a non-negative integer'.format(config['id']))
+    if seats != None and seat >= seats:
+      raise ValueError('Rig {0}: seat {1} does not exist, the MCA drives {2} seat(s)'.format(
+        config['id'], seat, seats))
+
+
+class RigPool():
+  """Fans each motion signal out to all rigs on a thread pool.
+
+  A rig whose previous tick is still running skips the current tick instead
+  of queueing it, so a slow rig never delays the others or the event loop.
+  """
+
+  def __init__(self, rig_configs, max_workers=4, strict=False):
+    """
+      strict: raise ValueError on the first rig which cannot be created,
+        otherwise it is logged and left out.
+    """
+    if not isinstance(rig_configs, list):
+      raise ValueError('Rig configs must be a list')
+    self.rigs = []
+    for index, config in enumerate(rig_configs):
+      try:
+        rig = Rig(config)
+        rig.open()
+        self.rigs.append(rig)
+      except Exception as e:
+        if strict:
+          self._close_rigs()
+          raise ValueError('Cannot create rig {0}: {1}'.format(index, e))
+        _logger.exception('Cannot create rig {0}'.format(index))
+    self.executor = concurrent.futures.ThreadPoolExecutor(
+      max_workers=max(1, min(max_workers, len(self.rigs))))
+
+  def dispatch(self, motion_signal, seat=0):
+    loop = asyncio.get_event_loop()
+    for rig in self.rigs:
+      if rig.seat != seat:
+        continue
+      if rig.busy:
+        rig.stats.skipped = rig.stats.skipped + 1
+        continue
+      rig.busy = True
+      future = loop.run_in_executor(self.executor, rig.process, motion_signal)
+      future.add_done_callback(lambda f, rig=rig: self._on_rig_done(rig, f))
+
+  def _on_rig_done(self, rig, future):
+    rig.busy = False
+    try:
+      clipped, elapsed_ms = future.result()
+      rig.stats.add(elapsed_ms)
+      if clipped:
+        rig.stats.clipped = rig.stats.clipped + 1
+    except Exception:
+      rig.stats.errors = rig.stats.errors + 1
+      _logger.exception('Rig {0} failed'.format(rig.id))
+
+  def close(self):
+    """Closes the rigs after their writes in flight, blocks until then."""
+    self.executor.shutdown(wait=True)
+    self._close_rigs()
+
+  async def close_async(self):
+    await asyncio.get_event_loop().run_in_executor(None, self.close)
+
+  def _close_rigs(self):
+    for rig in self.rigs:
+      try:
+        rig.close()
+      except Exception:
+        _logger.exception('Cannot close rig {0}'.format(rig.id))
+
+  def to_list(self):
+    return [rig.to_dict() for rig in self.rigs]
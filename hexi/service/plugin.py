@@ -1,65 +1,248 @@
 import logging
 import json
 import os
+import glob
 import configparser
+import importlib
+import inspect
 import asyncio
+import time
 
-from sanic import Blueprint
-from sanic import response
-from yapsy.PluginManager import PluginManager
-from hexi.service import web
+from hexi.service import control
+from hexi.service import runtime
+from hexi.util import httpcache
 
 _logger = logging.getLogger(__name__)
 
-loop = asyncio.get_event_loop()
-pm = PluginManager()
+PLUGIN_PLACE = './plugins'
+PLUGIN_INFO_EXTENSION = 'plugin'
+INDEX_PATH = './.plugin_index.json'
+INDEX_VERSION = 1
+
 plugins_by_id = {}
 plugins_by_category = {}
 plugins_filter = {}
+startup = {
+  'discovery_ms': 0,
+  'index_hits': 0,
+  'index_misses': 0,
+}
 
-bp = Blueprint('plugin', url_prefix='/core/plugin')
 
+def get_startup():
+  return dict(startup, plugins=[record.to_dict() for record in plugins_by_id.values()])
 
-@bp.route('/loadPlugins.js')
-async def get_plugins(request):
-  pids = [plugin.details.get('Core', 'Id')
-    for plugin in pm.getAllPlugins()]
-  resp_text = 'var EXTERNAL_PLUGINS = {0};\n'.format(json.dumps(pids));
-  for id in pids:
-    resp_text += ('try{{document.write(\'<script src="/plugins/{0}/static/main.js"></script>\');}}catch(e){{}}\n'.format(id))
-  return response.text(resp_text, content_type='application/javascript')
 
+async def _control_get_startup(request):
+  return get_startup()
+
+
+def _init_web():
+  from sanic import Blueprint
+  from sanic import response
+  from hexi.service import web
+
+  bp = Blueprint('plugin', url_prefix='/core/plugin')
+
+  def build_load_plugins_js():
+    pids = list(plugins_by_id.keys())
+    resp_text = 'var EXTERNAL_PLUGINS = {0};\n'.format(json.dumps(pids));
+    for id in pids:
+      resp_text += ('try{{document.write(\'<script src="/plugins/{0}/static/main.js"></script>\');}}catch(e){{}}\n'.format(id))
+    return resp_text.encode('utf-8')
+
+  @bp.route('/loadPlugins.js')
+  async def get_plugins(request):
+    return httpcache.cached_response(request, 'plugin.loadPlugins.js', build_load_plugins_js,
+                                     'application/javascript')
+
+  @bp.route('/api/startup')
+  async def get_startup_timing(request):
+    return response.json({
+      'code': 200,
+      'data': get_startup(),
+    })
 
-def init():
   web.app.blueprint(bp)
-  pm.setPluginPlaces(['./plugins'])
-  pm.setPluginInfoExtension('plugin')
+
+
+def _create_blueprint(name, id):
+  from sanic import Blueprint
+  return Blueprint(name, url_prefix='/plugins/{0}'.format(id))
+
+
+class PluginRecord():
+  """A discovered plugin.
+
+  Everything here comes from the manifest, so listing plugins does not import
+  them. The plugin module is imported on first activation, see `ensure_loaded`.
+  """
+
+  def __init__(self, path, details):
+    self.path = path
+    self.details = details
+    self.id = details['Core']['Id']
+    self.category = details['Core']['Category']
+    self.name = details['Core'].get('Name', self.id)
+    self.module = details['Core'].get('Module', 'plugin')
+    self.description = details.get('Documentation', {}).get('Description', '')
+    self.manifest_configurable = details['Core'].get('Configurable', 'false').lower() in ('1', 'yes', 'true', 'on')
+    self.plugin_object = None
+    self.error = None
+    self.lock = asyncio.Lock()
+    self.timing = {}
+
+  @property
+  def configurable(self):
+    """From the manifest, or the `configurable` attribute set by the plugin
+    once loaded."""
+    if self.manifest_configurable:
+      return True
+    return self.plugin_object != None and getattr(self.plugin_object, 'configurable', False)
+
+  @property
+  def is_activated(self):
+    return self.plugin_object != None and self.plugin_object.is_activated
+
+  def to_dict(self):
+    return {
+      'id': self.id,
+      'category': self.category,
+      'loaded': self.plugin_object != None,
+      'activated': self.is_activated,
+      'error': self.error,
+      'timing': self.timing,
+    }
+
+
+def _read_manifest(path):
+  parser = configparser.ConfigParser()
+  parser.optionxform = str
+  with open(path, 'r', encoding='utf-8') as fd:
+    parser.read_file(fd)
+  return {section: dict(parser.items(section)) for section in parser.sections()}
+
+
+def _load_index():
+  try:
+    with open(INDEX_PATH, 'r') as fd:
+      index = json.load(fd)
+    if index.get('version') == INDEX_VERSION:
+      return index['manifests']
+  except (OSError, ValueError):
+    pass
+  return {}
+
+
+def _save_index(manifests):
+  try:
+    tmp_path = INDEX_PATH + '.tmp'
+    with open(tmp_path, 'w') as fd:
+      json.dump({ 'version': INDEX_VERSION, 'manifests': manifests }, fd)
+    os.replace(tmp_path, INDEX_PATH)
+  except OSError:
+    _logger.warning('Cannot write plugin index {0}'.format(INDEX_PATH))
+
+
+def discover():
+  """Returns {manifest path: details} of all plugins, parsing only manifests
+  whose mtime or size changed since the cached index was written."""
+  cached = _load_index()
+  manifests = {}
+  changed = False
+  for path in sorted(glob.glob(os.path.join(PLUGIN_PLACE, '*', '*.' + PLUGIN_INFO_EXTENSION))):
+    stat = os.stat(path)
+    entry = cached.get(path)
+    if entry != None and entry['mtime'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+      startup['index_hits'] = startup['index_hits'] + 1
+    else:
+      startup['index_misses'] = startup['index_misses'] + 1
+      changed = True
+      try:
+        entry = { 'mtime': stat.st_mtime_ns, 'size': stat.st_size, 'details': _read_manifest(path) }
+      except (OSError, configparser.Error):
+        _logger.exception('Cannot read plugin manifest {0}'.format(path))
+        continue
+    manifests[path] = entry
+  if changed or len(manifests) != len(cached):
+    _save_index(manifests)
+  return manifests
+
+
+def init():
+  control.register('plugin.startup', _control_get_startup)
+  if runtime.web_enabled:
+    _init_web()
 
 def load():
-  pm.setCategoriesFilter(plugins_filter)
-  pm.collectPlugins()
-  for plugin in pm.getAllPlugins():
-    try:
-      id = plugin.details.get('Core', 'Id')
-    except configparser.NoOptionError:
-      _logger.error('Plugin `{0}` is ignored because of missing valid `Id` property.'.format(plugin.name))
+  start = time.perf_counter()
+  for path, entry in discover().items():
+    details = entry['details']
+    core = details.get('Core', {})
+    if not 'Id' in core:
+      _logger.error('Plugin `{0}` is ignored because of missing valid `Id` property.'.format(path))
+      continue
+    if not core.get('Category') in plugins_by_category.keys():
+      _logger.error('Plugin `{0}` is ignored because of missing valid `Category` property.'.format(path))
+      continue
+
+    record = PluginRecord(os.path.dirname(path), details)
+    plugins_by_category[record.category].append(record)
+    plugins_by_id[record.id] = record
+
+    if runtime.web_enabled:
+      # static directories are served before the plugin is imported
+      from hexi.service import web
+      static_bp = _create_blueprint('plugin-static-{0}'.format(record.id), record.id)
+      httpcache.add_static(static_bp, '/static', os.path.join(record.path, '.ui_built'))
+      web.app.blueprint(static_bp)
+  startup['discovery_ms'] = (time.perf_counter() - start) * 1000
+  _logger.info('Discovered {0} plugins in {1:.1f} ms ({2} manifests from index)'.format(
+    len(plugins_by_id), startup['discovery_ms'], startup['index_hits']))
+
+def _find_plugin_class(module, PluginType):
+  for name, value in inspect.getmembers(module, inspect.isclass):
+    if issubclass(value, PluginType) and value.__module__ == module.__name__:
+      return value
+  raise Exception('No {0} subclass found in {1}'.format(PluginType.__name__, module.__name__))
+
+async def ensure_loaded(record):
+  """Imports, instantiates and loads the plugin on first use."""
+  async with record.lock:
+    if record.plugin_object != None:
+      return True
     try:
-      category = plugin.details.get('Core', 'Category')
-      assert(category in plugins_by_category.keys())
-    except configparser.NoOptionError:
-      _logger.error('Plugin `{0}` is ignored because of missing valid `Category` property.'.format(plugin.name))
-
-    plugins_by_category[category].append(plugin)
-    plugins_by_id[id] = plugin
-
-    # assign static directories
-    bp = Blueprint('plugin-{0}'.format(id), url_prefix='/plugins/{0}'.format(id))
-    bp.static('/static', os.path.join(os.path.dirname(plugin.path), '.ui_built'))
-    plugin.plugin_object.id = id;
-    plugin.plugin_object.category = category;
-    plugin.plugin_object.bp = bp;
-    plugin.plugin_object.load()
-    web.app.blueprint(bp)
+      start = time.perf_counter()
+      module = importlib.import_module('.'.join([
+        os.path.basename(os.path.normpath(PLUGIN_PLACE)),
+        os.path.basename(record.path),
+        record.module]))
+      PluginClass = _find_plugin_class(module, plugins_filter[record.category])
+      plugin_object = PluginClass()
+      record.timing['import_ms'] = (time.perf_counter() - start) * 1000
+
+      plugin_object.id = record.id
+      plugin_object.category = record.category
+
+      start = time.perf_counter()
+      await plugin_object.load_config_async()
+      record.timing['config_ms'] = (time.perf_counter() - start) * 1000
+
+      start = time.perf_counter()
+      plugin_object.load()
+      if runtime.web_enabled:
+        from hexi.service import web
+        plugin_object.bp = _create_blueprint('plugin-{0}'.format(record.id), record.id)
+        plugin_object.load_web()
+        web.app.blueprint(plugin_object.bp)
+      record.timing['load_ms'] = (time.perf_counter() - start) * 1000
+    except Exception as e:
+      record.error = str(e)
+      _logger.exception('Cannot load plugin {0}'.format(record.id))
+      return False
+    record.error = None
+    record.plugin_object = plugin_object
+    return True
 
 def add_category(category, PluginType):
   plugins_filter[category] = PluginType
@@ -68,21 +251,27 @@ def add_category(category, PluginType):
 def get_plugins_in_category(category):
   return plugins_by_category[category]
 
-def set_activated_plugins(category, ids):
+async def set_activated_plugins(category, ids):
   plugins = get_plugins_in_category(category)
-  for plugin in plugins:
-    id = plugin.details.get('Core', 'Id')
-    if id in ids:
-      activate_plugin_by_id(id)
-    else:
-      deactivate_plugin_by_id(id)
+  await asyncio.gather(*[
+    activate_plugin_by_id(record.id) if record.id in ids else deactivate_plugin_by_id(record.id)
+    for record in plugins])
 
-def activate_plugin_by_id(id):
-  if not plugins_by_id[id].plugin_object.is_activated:
-    _logger.info('Plugin {0} activated'.format(id))
-    plugins_by_id[id].plugin_object.activate()
+async def activate_plugin_by_id(id):
+  record = plugins_by_id[id]
+  if not await ensure_loaded(record):
+    return
+  if not record.plugin_object.is_activated:
+    start = time.perf_counter()
+    record.plugin_object.activate()
+    record.timing['activate_ms'] = (time.perf_counter() - start) * 1000
+    httpcache.bump()
+    _logger.info('Plugin {0} activated ({1})'.format(id, ', '.join(
+      '{0} {1:.1f} ms'.format(key[:-3], value) for key, value in record.timing.items())))
 
-def deactivate_plugin_by_id(id):
-  if plugins_by_id[id].plugin_object.is_activated:
+async def deactivate_plugin_by_id(id):
+  record = plugins_by_id[id]
+  if record.is_activated:
     _logger.info('Plugin {0} deactivated'.format(id))
-    plugins_by_id[id].plugin_object.deactivate()
+    record.plugin_object.deactivate()
+    httpcache.bump()
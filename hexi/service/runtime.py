@@ -0,0 +1,15 @@
+"""Process wide options, set once by `hexi.server` before any module is loaded."""
+
+# False in headless mode: no web stack is imported and no routes are registered
+web_enabled = True
+
+# False in split mode: routes are registered, but requests arrive from web
+# worker processes through the control socket instead of a local server
+web_serve = True
+
+# path of the local control socket, None to disable it
+control_socket = None
+
+# True to freeze startup objects and collect garbage only between ticks, see
+# `hexi.util.idlegc`
+gc_idle = False
@@ -1,26 +1,100 @@
 import asyncio
+import base64
 import logging
 
 from sanic import Sanic
 from sanic import Blueprint
+from sanic.request import Request
+from sanic.server import CIDict
+from hexi.service import control
 from hexi.service import event
+from hexi.service import runtime
+from hexi.util import broadcast
+from hexi.util import httpcache
+from hexi.util import hub
 
 _logger = logging.getLogger(__name__)
 
+HOST = '0.0.0.0'
+PORT = 8000
+UI_INDEX = 'hexi/ui/root/index.html'
+UI_STATIC = 'hexi/.ui_built'
+HUB_PATH = '/core/api/stream'
+
 app = Sanic()
 
 
-app.static('/', 'hexi/ui/root/index.html')
+httpcache.add_static(app, '/', UI_INDEX)
 
 bp = Blueprint('core', url_prefix='/core')
-bp.static('/static', 'hexi/.ui_built')
+httpcache.add_static(bp, '/static', UI_STATIC)
+
+
+async def _hub_attach(topic, sink):
+  return broadcast.attach(topic, sink)
+
+async def _hub_detach(topic, sink):
+  broadcast.detach(topic, sink)
+
+async def stream(request, ws):
+  await hub.HubClient(ws, _hub_attach, _hub_detach).run()
+
+
 app.blueprint(bp)
 
 
+class _ProxyTransport():
+  """Stands in for the socket of a request forwarded by a web worker."""
+
+  def __init__(self, peername):
+    self.peername = tuple(peername) if peername != None else ('127.0.0.1', 0)
+
+  def get_extra_info(self, name, default=None):
+    if name == 'peername':
+      return self.peername
+    return default
+
+
+async def handle_proxied_request(request):
+  """Runs a request forwarded by a web worker through the local routes.
+
+  Request and response bodies are base64 encoded.
+  """
+  url = request['path']
+  if request.get('query'):
+    url = url + '?' + request['query']
+  sanic_request = Request(url.encode('utf-8'), CIDict(request.get('headers', {})), '1.1',
+                          request['method'], _ProxyTransport(request.get('peername')))
+  sanic_request.body = base64.b64decode(request.get('body', ''))
+
+  future = asyncio.get_event_loop().create_future()
+
+  def write_callback(response):
+    future.set_result(response)
+
+  async def stream_callback(response):
+    future.set_exception(Exception('Streaming responses cannot be forwarded'))
+
+  await app.handle_request(sanic_request, write_callback, stream_callback)
+  response = await future
+  return {
+    'status': response.status,
+    'content_type': response.content_type,
+    'headers': dict(response.headers),
+    'body': base64.b64encode(response.body).decode('ascii'),
+  }
+
+
 async def on_start(e):
-  server = app.create_server(host='0.0.0.0', port=8000, log_config=None)
+  server = app.create_server(host=HOST, port=PORT, log_config=None)
   asyncio.ensure_future(server)
 
 
 def init():
-  event.subscribe(on_start, ['hexi.start'])
+  if runtime.web_serve:
+    # only where the broadcasters live, web workers attach through their
+    # pipeline client, see hexi.service.webworker
+    app.websocket(HUB_PATH)(stream)
+    event.subscribe(on_start, ['hexi.start'])
+  else:
+    control.register('web.http', handle_proxied_request)
@@ -0,0 +1,178 @@
+"""Web worker process for split mode.
+
+Serves the UI static files itself and forwards everything else to the
+pipeline process through its control socket, so web load never runs on the
+real-time loop:
+
+- HTTP requests become `web.http` commands, handled by the routes of the
+  pipeline process.
+- Websocket clients are attached to broadcaster topics. Every message
+  crosses the socket once per worker and is fanned out here, to plain
+  websockets and to the multiplexed ones of `hexi.util.hub` alike.
+
+Started by `python -m hexi.server --split`, see `--web-workers`.
+"""
+
+import argparse
+import asyncio
+import base64
+import collections
+import json
+import logging
+import os
+import uvloop
+
+from sanic import response
+from hexi.service import plugin
+from hexi.service import web
+from hexi.util import broadcast
+from hexi.util import httpcache
+from hexi.util import hub
+
+_logger = logging.getLogger(__name__)
+
+# must match the pipeline side, see hexi.service.control
+MAX_LINE = 16 * 1024 * 1024
+
+# set per worker process once the server has started
+client = None
+
+
+class PipelineClient():
+  """Connection of one worker process to the pipeline control socket."""
+
+  def __init__(self, path):
+    self.path = path
+    self.seq = 0
+    self.pending = {}
+    self.sinks = collections.defaultdict(set)
+
+  async def connect(self):
+    self.reader, self.writer = await asyncio.open_unix_connection(self.path, limit=MAX_LINE)
+    asyncio.ensure_future(self.read_loop_async())
+
+  async def read_loop_async(self):
+    while True:
+      line = await self.reader.readline()
+      if not line:
+        break
+      message = json.loads(line.decode('utf-8'))
+      if 'topic' in message:
+        for sink in self.sinks[message['topic']]:
+          sink.deliver(message['data'])
+      else:
+        future = self.pending.pop(message.get('seq'), None)
+        if future != None:
+          future.set_result(message)
+    _logger.error('Lost connection to the pipeline process, exiting')
+    for future in self.pending.values():
+      future.set_exception(ConnectionError('Pipeline process is gone'))
+    asyncio.get_event_loop().stop()
+
+  async def request(self, cmd, **kwargs):
+    self.seq = self.seq + 1
+    future = asyncio.get_event_loop().create_future()
+    self.pending[self.seq] = future
+    self.writer.write((json.dumps(dict(kwargs, cmd=cmd, seq=self.seq)) + '\n').encode('utf-8'))
+    return await future
+
+  async def attach(self, topic, sink):
+    """Returns the canonical topic, or None if the pipeline has no
+    broadcaster at topic."""
+    resp = await self.request('subscribe', topic=topic)
+    if resp['code'] != 200:
+      return None
+    if resp['data'] != None:
+      sink.deliver(resp['data'])
+    self.sinks[resp['topic']].add(sink)
+    sink.canonical_topic = resp['topic']
+    return resp['topic']
+
+  async def detach(self, topic, sink):
+    topic = sink.canonical_topic
+    self.sinks[topic].discard(sink)
+    if len(self.sinks[topic]) == 0:
+      del self.sinks[topic]
+    await self.request('unsubscribe', topic=topic)
+
+
+async def forward_websocket(request, path):
+  # same as the handshake done by sanic's websocket decorator
+  protocol = request.transport.get_protocol()
+  ws = await protocol.websocket_handshake(request)
+  try:
+    if path == web.HUB_PATH:
+      await hub.HubClient(ws, client.attach, client.detach).run()
+      return
+    if request.query_string:
+      path = '{0}?{1}'.format(path, request.query_string)
+    sink = broadcast.WebSocketSink(ws)
+    if await client.attach(path, sink) != None:
+      try:
+        while True:
+          await ws.recv()
+      finally:
+        await client.detach(path, sink)
+  finally:
+    await ws.close()
+
+
+async def forward_http(request):
+  resp = await client.request('web.http',
+    method=request.method,
+    path=request.path,
+    query=request.query_string,
+    headers=dict(request.headers),
+    body=base64.b64encode(request.body or b'').decode('ascii'),
+    peername=request.transport.get_extra_info('peername'))
+  if resp['code'] != 200:
+    return response.text(resp['reason'], status=502)
+  data = resp['data']
+  headers = {key: value for key, value in data['headers'].items()
+             if not key.lower() in ('content-length', 'content-type')}
+  return response.raw(base64.b64decode(data['body']), status=data['status'],
+                      headers=headers, content_type=data['content_type'])
+
+
+def setup_routes(app):
+  # static files are served here, the pipeline never sees them
+  for path, entry in plugin.discover().items():
+    plugin_id = entry['details'].get('Core', {}).get('Id')
+    if plugin_id != None:
+      httpcache.add_static(app, '/plugins/{0}/static'.format(plugin_id),
+                           os.path.join(os.path.dirname(path), '.ui_built'))
+
+  app.enable_websocket()
+
+  @app.route('/<path:path>', methods=['GET', 'POST', 'PUT', 'DELETE', 'PATCH'])
+  async def forward(request, path):
+    if request.headers.get('upgrade', '').lower() == 'websocket':
+      await forward_websocket(request, request.path)
+      return None
+    return await forward_http(request)
+
+
+def main(argv=None):
+  parser = argparse.ArgumentParser(prog='hexi.service.webworker')
+  parser.add_argument('--control-socket', required=True)
+  parser.add_argument('--host', default=web.HOST)
+  parser.add_argument('--port', type=int, default=web.PORT)
+  parser.add_argument('--workers', type=int, default=1)
+  args = parser.parse_args(argv)
+
+  asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+  logging.basicConfig(level=logging.INFO,
+                      format='%(asctime)s - (%(name)s)[%(levelname)s][%(process)d]: %(message)s')
+
+  setup_routes(web.app)
+
+  @web.app.listener('after_server_start')
+  async def connect_pipeline(app, loop):
+    global client
+    client = PipelineClient(args.control_socket)
+    await client.connect()
+
+  web.app.run(host=args.host, port=args.port, workers=args.workers, log_config=None)
+
+if __name__ == '__main__':
+  main()
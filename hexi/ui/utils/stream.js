@@ -0,0 +1,63 @@
+import WebSocket from 'reconnecting-websocket';
+
+// All the streams of a page share one websocket, see hexi/util/hub.py.
+// Frames are arrays of [topic, data] pairs.
+
+const HUB_TOPIC = '$hub';
+
+let ws = null;
+const listeners = {};
+
+function send(cmd, topic) {
+  if (ws !== null && ws.readyState === 1) {
+    ws.send(JSON.stringify({ cmd, topic }));
+  }
+}
+
+function connect() {
+  ws = new WebSocket(`ws://${location.host}/core/api/stream`);
+  ws.addEventListener('open', () => {
+    Object.keys(listeners).forEach(topic => send('subscribe', topic));
+  });
+  ws.addEventListener('message', ev => {
+    let frame;
+    try {
+      frame = JSON.parse(ev.data);
+    } catch (e) {
+      return;
+    }
+    frame.forEach(([topic, data]) => {
+      if (topic === HUB_TOPIC || listeners[topic] === undefined) {
+        return;
+      }
+      listeners[topic].forEach(callback => callback(data));
+    });
+  });
+}
+
+// Calls callback with every message of topic, the path of a websocket
+// endpoint like `/core/mca/api/mca_log`. Returns the unsubscribe function.
+export function subscribe(topic, callback) {
+  if (ws === null) {
+    connect();
+  }
+  if (listeners[topic] === undefined) {
+    listeners[topic] = new Set();
+    send('subscribe', topic);
+  }
+  listeners[topic].add(callback);
+  return () => unsubscribe(topic, callback);
+}
+
+export function unsubscribe(topic, callback) {
+  if (listeners[topic] === undefined) {
+    return;
+  }
+  listeners[topic].delete(callback);
+  if (listeners[topic].size === 0) {
+    delete listeners[topic];
+    send('unsubscribe', topic);
+  }
+}
+
+export default { subscribe, unsubscribe };
@@ -0,0 +1,167 @@
+import asyncio
+import collections
+import urllib.parse
+
+
+# topic (full websocket path) -> WebSocketBroadcaster
+broadcasters = {}
+
+# set by hexi.service.control in split mode: callable(topic, data) forwarding
+# every broadcast message to the web worker processes
+remote_send = None
+
+
+def split_topic(topic):
+  """Returns (path, query args) of a topic like `/api/foo?points=300`."""
+  path, _, query = topic.partition('?')
+  return path, urllib.parse.parse_qs(query)
+
+
+def _find(topic):
+  path, args = split_topic(topic)
+  broadcaster = broadcasters.get(path)
+  if broadcaster == None:
+    return None, None
+  return broadcaster, broadcaster.get_key(args)
+
+
+def attach(topic, sink):
+  """Adds a local sink to the broadcaster at topic and delivers the initial
+  message to it.
+
+  Returns the canonical topic, or None if there is no broadcaster at topic.
+  """
+  broadcaster, key = _find(topic)
+  if broadcaster == None:
+    return None
+  broadcaster.add_sink(key, sink)
+  return broadcaster.topic_for(key)
+
+
+def detach(topic, sink):
+  broadcaster, key = _find(topic)
+  if broadcaster != None:
+    broadcaster.remove_sink(key, sink)
+
+
+def subscribe(topic):
+  """Counts a remote subscriber of topic.
+
+  Returns (canonical topic, initial message), or None if there is no
+  broadcaster at topic. Messages are forwarded under the canonical topic.
+  """
+  broadcaster, key = _find(topic)
+  if broadcaster == None:
+    return None
+  broadcaster.remote_keys[key] += 1
+  return broadcaster.topic_for(key), broadcaster.get_initial(key)
+
+
+def unsubscribe(topic):
+  """Undoes `subscribe`, topic is the canonical topic it returned."""
+  broadcaster, key = _find(topic)
+  if broadcaster == None:
+    return
+  broadcaster.remote_keys[key] -= 1
+  if broadcaster.remote_keys[key] <= 0:
+    del broadcaster.remote_keys[key]
+
+
+class WebSocketSink():
+  """Delivers broadcast messages to one websocket.
+
+  Sinks are what broadcasters send to, anything with a `deliver(message)`
+  method that does not block, see `hexi.util.hub` for another one.
+  """
+
+  def __init__(self, ws):
+    self.ws = ws
+
+  def deliver(self, message):
+    asyncio.ensure_future(self.ws.send(message))
+
+
+class WebSocketBroadcaster():
+  """Sends the same messages to every websocket client of one endpoint.
+
+  Messages sent by clients are ignored. When the web server runs in other
+  processes, messages are forwarded to them and they fan out to their own
+  clients, see `hexi.service.webworker`.
+
+  Clients may ask for a variant of the messages through the query string, for
+  example a lower resolution. Clients asking for the same variant share the
+  same messages, each variant in use is built once per `send`.
+  """
+
+  def __init__(self, initial=None, variant=None):
+    """
+      initial: optional callable returning the message sent to a new client,
+        called with the variant key if variant is given
+      variant: optional callable taking the query args of a client, returns
+        a canonical query string identifying its variant, or None for the
+        plain messages
+    """
+    self.initial = initial
+    self.variant = variant
+    self.clients = collections.defaultdict(set)
+    self.remote_keys = collections.Counter()
+    self.topic = None
+
+  def get_key(self, args):
+    return self.variant(args) if self.variant != None else None
+
+  def topic_for(self, key):
+    return self.topic if key == None else '{0}?{1}'.format(self.topic, key)
+
+  def get_initial(self, key=None):
+    if self.initial == None:
+      return None
+    return self.initial(key) if self.variant != None else self.initial()
+
+  def has_listeners(self):
+    return len(self.clients) > 0 or (remote_send != None and len(self.remote_keys) > 0)
+
+  def attach_ws_endpoint(self, blueprint, path):
+    self.topic = blueprint.url_prefix + path
+    broadcasters[self.topic] = self
+
+    @blueprint.websocket(path)
+    async def broadcast_feed(request, ws):
+      key = self.get_key(request.args)
+      sink = WebSocketSink(ws)
+      try:
+        self.add_sink(key, sink)
+        while True:
+          await ws.recv()
+      finally:
+        self.remove_sink(key, sink)
+
+  def add_sink(self, key, sink):
+    self.clients[key].add(sink)
+    initial = self.get_initial(key)
+    if initial != None:
+      sink.deliver(initial)
+
+  def remove_sink(self, key, sink):
+    self.clients[key].discard(sink)
+    if len(self.clients[key]) == 0:
+      del self.clients[key]
+
+  def send(self, data):
+    """Sends data to all clients.
+
+    Args:
+      data: the message, or for variants a callable taking the variant key
+        and returning its message, or None to skip that variant.
+    """
+    keys = set(self.clients.keys())
+    if remote_send != None:
+      keys.update(self.remote_keys.keys())
+    for key in keys:
+      message = data(key) if callable(data) else data
+      if message == None:
+        continue
+      for sink in self.clients.get(key, ()):
+        sink.deliver(message)
+      if remote_send != None and self.topic != None and self.remote_keys[key] > 0:
+        remote_send(self.topic_for(key), message)
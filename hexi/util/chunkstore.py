@@ -0,0 +1,180 @@
+"""On-disk telemetry chunks.
+
+Sealed `hexi.util.timeseries` chunks are appended to segment files as
+records of a fixed header, a summary (lowest, highest, first and last value
+of each column) and the compressed bits. Segments are named after their
+first timestamp and dropped oldest first beyond `max_bytes`.
+
+Only headers and summaries are kept in memory, one entry per chunk, which is
+the sparse index: a time range is found by bisecting chunk start times, and
+coarse queries are answered from the summaries alone. Chunk bits are read
+through a read-only mmap of their segment, so only the pages of the chunks
+actually decoded are loaded.
+"""
+
+import logging
+import mmap
+import os
+import struct
+
+import numpy
+
+_logger = logging.getLogger(__name__)
+
+MAGIC = b'HXTS'
+# magic, first ts, last ts, count, columns, size of the bits
+RECORD = struct.Struct('<4sqqIHI')
+SEGMENT_EXTENSION = '.hxts'
+
+
+class Segment():
+  def __init__(self, path, first_ts):
+    self.path = path
+    self.first_ts = first_ts
+    self.size = 0
+    self.map = None
+
+  def view(self, offset, nbytes):
+    if self.map == None or offset + nbytes > len(self.map):
+      # the active segment grows, map it again once it has
+      self.close()
+      with open(self.path, 'rb') as fd:
+        self.map = mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ)
+    return self.map[offset:offset + nbytes]
+
+  def close(self):
+    if self.map != None:
+      self.map.close()
+      self.map = None
+
+
+class StoredChunk():
+  """Index entry of a chunk in a segment, its bits are read on demand."""
+
+  sealed = True
+
+  def __init__(self, segment, offset, first_ts, last_ts, count, columns, nbytes, summary):
+    self.segment = segment
+    self.offset = offset
+    self.first_ts = first_ts
+    self.last_ts = last_ts
+    self.count = count
+    self.columns = columns
+    self.nbytes = nbytes
+    self.summary = summary
+
+  def read(self):
+    return self.segment.view(self.offset, self.nbytes)
+
+
+class ChunkStore():
+  """Appends sealed chunks of one time series to segment files under path."""
+
+  def __init__(self, path, columns, segment_bytes=8 * 1024 * 1024, max_bytes=256 * 1024 * 1024):
+    self.path = path
+    self.columns = columns
+    self.segment_bytes = segment_bytes
+    self.max_bytes = max_bytes
+    self.segments = []
+    self.chunks = []
+    self.starts = []
+    self.nbytes = 0
+    self.fd = None
+    os.makedirs(path, exist_ok=True)
+    self.load()
+
+  def load(self):
+    names = sorted(name for name in os.listdir(self.path) if name.endswith(SEGMENT_EXTENSION))
+    for name in names:
+      segment = Segment(os.path.join(self.path, name), int(name[:-len(SEGMENT_EXTENSION)]))
+      self._scan(segment)
+      self.segments.append(segment)
+      self.nbytes = self.nbytes + segment.size
+    self._evict()
+
+  def _scan(self, segment):
+    summary_size = 4 * 8 * self.columns
+    skipped = 0
+    with open(segment.path, 'r+b') as fd:
+      offset = 0
+      while True:
+        header = fd.read(RECORD.size)
+        if len(header) < RECORD.size:
+          break
+        magic, first_ts, last_ts, count, columns, nbytes = RECORD.unpack(header)
+        if magic != MAGIC:
+          break
+        if columns != self.columns:
+          # written by a different version of the log, unreadable here
+          fd.seek(4 * 8 * columns + nbytes, os.SEEK_CUR)
+          offset = fd.tell()
+          skipped = skipped + 1
+          continue
+        summary = fd.read(summary_size)
+        data_offset = offset + RECORD.size + summary_size
+        if len(summary) < summary_size or fd.seek(nbytes, os.SEEK_CUR) > os.fstat(fd.fileno()).st_size:
+          break
+        self._add(StoredChunk(segment, data_offset, first_ts, last_ts, count, columns, nbytes,
+                              numpy.frombuffer(summary, dtype='<f8').reshape(4, columns)))
+        offset = data_offset + nbytes
+      if offset < os.fstat(fd.fileno()).st_size:
+        # left by a crash while writing
+        _logger.warning('Truncating damaged telemetry segment {0} at {1}'.format(segment.path, offset))
+        fd.truncate(offset)
+    segment.size = offset
+    if skipped > 0:
+      _logger.warning('Skipped {0} chunks of another layout in {1}'.format(skipped, segment.path))
+
+  def _add(self, chunk):
+    self.chunks.append(chunk)
+    self.starts.append(chunk.first_ts)
+
+  def write(self, chunk):
+    """Appends a sealed `hexi.util.timeseries.Chunk`."""
+    if self.fd == None or self.segments[-1].size >= self.segment_bytes:
+      self._rotate(chunk.first_ts)
+    segment = self.segments[-1]
+    summary = chunk.summary.astype('<f8').tobytes()
+    self.fd.write(RECORD.pack(MAGIC, chunk.first_ts, chunk.last_ts, chunk.count,
+                              self.columns, len(chunk.data)))
+    self.fd.write(summary)
+    self.fd.write(chunk.data)
+    self.fd.flush()
+    data_offset = segment.size + RECORD.size + len(summary)
+    self._add(StoredChunk(segment, data_offset, chunk.first_ts, chunk.last_ts, chunk.count,
+                          self.columns, len(chunk.data), chunk.summary.copy()))
+    written = RECORD.size + len(summary) + len(chunk.data)
+    segment.size = segment.size + written
+    self.nbytes = self.nbytes + written
+    self._evict()
+
+  def _rotate(self, first_ts):
+    if self.fd != None:
+      self.fd.close()
+    path = os.path.join(self.path, '{0:016d}{1}'.format(first_ts, SEGMENT_EXTENSION))
+    # unless restarted within the same millisecond
+    if len(self.segments) == 0 or self.segments[-1].path != path:
+      self.segments.append(Segment(path, first_ts))
+    self.fd = open(path, 'ab')
+
+  def _evict(self):
+    while self.nbytes > self.max_bytes and len(self.segments) > 1:
+      segment = self.segments.pop(0)
+      count = 0
+      while count < len(self.chunks) and self.chunks[count].segment is segment:
+        count = count + 1
+      del self.chunks[:count]
+      del self.starts[:count]
+      self.nbytes = self.nbytes - segment.size
+      segment.close()
+      try:
+        os.remove(segment.path)
+      except OSError:
+        _logger.exception('Cannot remove telemetry segment {0}'.format(segment.path))
+
+  def close(self):
+    if self.fd != None:
+      self.fd.close()
+      self.fd = None
+    for segment in self.segments:
+      segment.close()
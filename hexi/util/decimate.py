@@ -0,0 +1,149 @@
+"""Decimation of telemetry rows for charts.
+
+Rows look like `[t, [x, y, z, alpha, beta, gamma]]` or `[t, a, b]`. They are
+flattened to a 2D array, decimated column-wise and rebuilt in the same shape.
+Geometry uses the row index rather than `t`, samples are evenly spaced.
+"""
+
+import math
+import numpy
+
+METHODS = ('minmax', 'lttb')
+
+
+SEQUENCES = (list, tuple, numpy.ndarray)
+
+
+def flatten(rows):
+  """Returns (array of shape (R, C), template to rebuild rows with)."""
+  template = [len(value) if isinstance(value, SEQUENCES) else type(value) for value in rows[0]]
+  array = numpy.array([
+    [item for value in row for item in (value if isinstance(value, SEQUENCES) else (value,))]
+    for row in rows], dtype=float)
+  return array, template
+
+
+def unflatten(array, template):
+  rows = []
+  for values in array.tolist():
+    row = []
+    index = 0
+    for kind in template:
+      if kind == int:
+        row.append(int(round(values[index])))
+        index = index + 1
+      elif isinstance(kind, int):
+        row.append(values[index:index + kind])
+        index = index + kind
+      else:
+        row.append(values[index])
+        index = index + 1
+    rows.append(row)
+  return rows
+
+
+def _minmax_rows(t_first, t_last, low, high, first, last, starts):
+  ends = numpy.append(starts[1:], len(t_first)) - 1
+  bucket_low = numpy.minimum.reduceat(low, starts, axis=0)
+  bucket_high = numpy.maximum.reduceat(high, starts, axis=0)
+  rising = last[ends] >= first[starts]
+  out = numpy.empty((2 * len(starts), low.shape[1] + 1))
+  out[0::2, 1:] = numpy.where(rising, bucket_low, bucket_high)
+  out[1::2, 1:] = numpy.where(rising, bucket_high, bucket_low)
+  out[0::2, 0] = t_first[starts]
+  out[1::2, 0] = t_last[ends]
+  return out
+
+
+def minmax(array, n_out):
+  """Keeps the minimum and the maximum of every column per bucket.
+
+  Each bucket becomes two rows, ordered by whether the column rises or falls
+  in that bucket, stamped with the first and last value of column 0.
+  """
+  n_rows = len(array)
+  buckets = n_out // 2
+  if buckets < 1 or n_rows <= n_out:
+    return array
+  starts = (numpy.arange(buckets) * n_rows) // buckets
+  values = array[:, 1:]
+  return _minmax_rows(array[:, 0], array[:, 0], values, values, values, values, starts)
+
+
+def minmax_by_time(t_first, t_last, low, high, first, last, width):
+  """Like `minmax` with buckets of `width` in time, over summary rows.
+
+  A summary row covers t_first to t_last, with the lowest, highest, first
+  and last value of each column; a single sample is a summary row with all
+  four equal. Rows must be in time order.
+  """
+  if len(t_first) == 0:
+    return numpy.empty((0, low.shape[1] + 1))
+  bucket = (t_first - t_first[0]) // width
+  starts = numpy.flatnonzero(numpy.concatenate(([True], bucket[1:] != bucket[:-1])))
+  out = _minmax_rows(t_first, t_last, low, high, first, last, starts)
+  # a bucket of a single sample is one row, not the same row twice
+  ends = numpy.append(starts[1:], len(t_first)) - 1
+  keep = numpy.ones(len(out), dtype=bool)
+  keep[1::2] = (ends != starts) | (t_first[starts] != t_last[starts])
+  return out[keep]
+
+
+def lttb(array, n_out):
+  """Largest-Triangle-Three-Buckets over all columns but column 0.
+
+  Columns are scaled to the same range, a row is chosen per bucket by the sum
+  of its triangle areas across columns.
+  """
+  n_rows = len(array)
+  if n_out >= n_rows or n_out < 3:
+    return array
+  values = array[:, 1:]
+  span = values.max(axis=0) - values.min(axis=0)
+  span[span == 0] = 1
+  values = values / span
+  x = numpy.arange(n_rows, dtype=float)
+
+  edges = numpy.floor(numpy.linspace(1, n_rows - 1, n_out - 1)).astype(int)
+  selected = numpy.empty(n_out, dtype=int)
+  selected[0] = 0
+  selected[-1] = n_rows - 1
+  a = 0
+  for i in range(n_out - 2):
+    start, end = edges[i], max(edges[i + 1], edges[i] + 1)
+    if i + 2 < len(edges):
+      next_start, next_end = edges[i + 1], max(edges[i + 2], edges[i + 1] + 1)
+    else:
+      next_start, next_end = n_rows - 1, n_rows
+    c_x = x[next_start:next_end].mean()
+    c_y = values[next_start:next_end].mean(axis=0)
+    area = numpy.abs((x[a] - c_x) * (values[start:end] - values[a]) -
+                     (x[a] - x[start:end, None]) * (c_y - values[a])).sum(axis=1)
+    a = start + int(numpy.argmax(area))
+    selected[i + 1] = a
+  return array[selected]
+
+
+def decimate_array(array, n_out, method='minmax'):
+  """Like `decimate` for rows already flattened."""
+  if len(array) <= n_out or n_out < 1:
+    return array
+  if method == 'lttb':
+    return lttb(array, n_out)
+  return minmax(array, n_out)
+
+
+def decimate(rows, n_out, method='minmax'):
+  """Returns at most about n_out rows summarizing rows."""
+  if len(rows) <= n_out or n_out < 1:
+    return rows
+  array, template = flatten(rows)
+  return unflatten(decimate_array(array, n_out, method), template)
+
+
+def scaled_points(n_rows, window_rows, points):
+  """Points for n_rows new rows, so a chart showing window_rows rows with
+  `points` points keeps the same density."""
+  if window_rows <= 0:
+    return points
+  return max(2, int(math.ceil(n_rows * points / window_rows)))
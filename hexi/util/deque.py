@@ -2,52 +2,102 @@ import asyncio
 import collections
 import json
 
+from hexi.util import broadcast
+from hexi.util import decimate
 
-class WebSocketPipingDeque(collections.deque):
 
-  def __init__(self, flush_interval=1, *args, **kwargs):
-    super().__init__(*args, **kwargs)
+class WebSocketPiping():
+  """Sends new rows to websocket clients in batches.
+
+  New clients first receive `snapshot()`. Clients may connect with
+  `?points=N` (and optionally `&method=lttb`, default `minmax`) to get about
+  N points for the whole snapshot instead; new batches are then decimated to
+  the same density.
+  """
+
+  def __init__(self, flush_interval=1):
     self.flush_interval = flush_interval
-    self.websocket_clients = set()
+    self.backed_records = []
+    self.broadcaster = broadcast.WebSocketBroadcaster(initial=self.get_initial, variant=self.get_variant)
     self.flush_future = asyncio.ensure_future(self.flush_async())
 
+  def snapshot(self):
+    raise NotImplementedError()
+
+  def window_size(self):
+    """Number of rows in a full snapshot, None if unbounded."""
+    raise NotImplementedError()
+
   def attach_ws_endpoint(self, blueprint, path):
-    @blueprint.websocket(path)
-    async def signal_queue_item(request, ws):
-      try:
-        self.pipe(ws)
-        while True:
-          await ws.recv()
-      finally:
-        self.unpipe(ws)
+    self.broadcaster.attach_ws_endpoint(blueprint, path)
+
+  def get_variant(self, args):
+    try:
+      points = int(args.get('points', [0])[0])
+    except ValueError:
+      return None
+    if points <= 0:
+      return None
+    method = args.get('method', ['minmax'])[0]
+    if not method in decimate.METHODS:
+      method = 'minmax'
+    return 'points={0}&method={1}'.format(points, method)
+
+  def parse_variant(self, key):
+    _, args = broadcast.split_topic('?' + key)
+    return int(args['points'][0]), args['method'][0]
+
+  def get_initial(self, key):
+    records = self.snapshot()
+    if key != None and len(records) > 0:
+      points, method = self.parse_variant(key)
+      records = decimate.decimate(records, points, method)
+    return json.dumps(records)
+
+  def render_batch(self, records, key):
+    if key == None:
+      return json.dumps(records)
+    points, method = self.parse_variant(key)
+    window = self.window_size()
+    points = decimate.scaled_points(len(records), window if window != None else len(records), points)
+    return json.dumps(decimate.decimate(records, points, method))
 
   async def flush_async(self):
     while True:
-      for client in self.websocket_clients:
-        data = json.dumps(client._backed_records)
-        asyncio.ensure_future(client.send(data))
-        client._backed_records = []
+      if len(self.backed_records) > 0:
+        records = self.backed_records
+        self.backed_records = []
+        self.broadcaster.send(lambda key: self.render_batch(records, key))
       await asyncio.sleep(self.flush_interval)
 
   def close(self):
     self.flush_future.cancel()
-    for client in self.websocket_clients:
-      self.unpipe(client)
 
-  def pipe(self, ws, *, send_initial=True):
-    ws._backed_records = []
-    self.websocket_clients.add(ws)
-    if send_initial:
-      initial_data = [log for log in self]
-      data = json.dumps(initial_data)
-      asyncio.ensure_future(ws.send(data))
+  def pipe(self, data):
+    # only batch while somebody is listening
+    if self.broadcaster.has_listeners():
+      self.backed_records.append(data)
+      window = self.window_size()
+      if window != None and len(self.backed_records) > window:
+        del self.backed_records[0]
+
+
+class WebSocketPipingDeque(WebSocketPiping, collections.deque):
+  """A deque whose new items are sent to websocket clients in batches.
+
+  New clients first receive all items currently in the deque.
+  """
 
-  def unpipe(self, ws):
-    ws._backed_records = None
-    self.websocket_clients.remove(ws)
+  def __init__(self, flush_interval=1, *args, **kwargs):
+    collections.deque.__init__(self, *args, **kwargs)
+    WebSocketPiping.__init__(self, flush_interval)
+
+  def snapshot(self):
+    return list(self)
+
+  def window_size(self):
+    return self.maxlen
 
   def append(self, data):
     super().append(data)
-    for client in self.websocket_clients:
-      client._backed_records.append(data)
-
+    self.pipe(data)
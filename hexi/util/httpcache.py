@@ -0,0 +1,162 @@
+"""HTTP response caching and precompressed static files.
+
+Cached responses are rebuilt only after `bump()`, which is called whenever a
+plugin is activated or deactivated or a config is saved. Every cached body
+carries a strong ETag, so polling clients mostly get an empty 304.
+
+Static directories are served from `.br` / `.gz` siblings when the client
+accepts them. The siblings are written once at startup by `precompress` and
+rebuilt only when the original file is newer.
+"""
+
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+import urllib.parse
+
+try:
+  import brotli
+except ImportError:
+  brotli = None
+
+_logger = logging.getLogger(__name__)
+
+COMPRESSIBLE_EXTENSIONS = ('.js', '.css', '.html', '.svg', '.json', '.map', '.txt', '.ttf', '.eot')
+MIN_COMPRESS_SIZE = 1024
+
+generation = 0
+_cache = {}
+
+
+def bump():
+  """Invalidates all cached responses."""
+  global generation
+  generation = generation + 1
+
+
+def make_etag(body):
+  return '"{0}"'.format(hashlib.sha1(body).hexdigest()[:24])
+
+
+def is_not_modified(request, etag):
+  header = request.headers.get('If-None-Match')
+  if header == None:
+    return False
+  return header.strip() == '*' or etag in [tag.strip() for tag in header.split(',')]
+
+
+def get_cached(key, build):
+  """Returns (body, etag), calling build() for a new body only if something
+  changed since it was last built."""
+  entry = _cache.get(key)
+  if entry == None or entry[0] != generation:
+    body = build()
+    entry = (generation, body, make_etag(body))
+    _cache[key] = entry
+  return entry[1], entry[2]
+
+
+def cached_response(request, key, build, content_type):
+  """A 200 with the cached body, or a 304 if the client has it already.
+
+  Args:
+    build: callable returning the body as bytes.
+  """
+  from sanic import response
+  body, etag = get_cached(key, build)
+  headers = { 'ETag': etag, 'Cache-Control': 'no-cache' }
+  if is_not_modified(request, etag):
+    return response.raw(b'', status=304, headers=headers, content_type=content_type)
+  return response.raw(body, headers=headers, content_type=content_type)
+
+
+def _encoders():
+  if brotli != None:
+    yield '.br', lambda data: brotli.compress(data, quality=11)
+  yield '.gz', lambda data: gzip.compress(data, compresslevel=9)
+
+
+def precompress(root):
+  """Writes compressed siblings of the compressible files under root.
+
+  Returns the number of files written.
+  """
+  written = 0
+  for dirpath, dirnames, filenames in os.walk(root):
+    for name in filenames:
+      if not name.endswith(COMPRESSIBLE_EXTENSIONS):
+        continue
+      path = os.path.join(dirpath, name)
+      stat = os.stat(path)
+      if stat.st_size < MIN_COMPRESS_SIZE:
+        continue
+      data = None
+      for extension, compress in _encoders():
+        target = path + extension
+        if os.path.exists(target) and os.stat(target).st_mtime >= stat.st_mtime:
+          continue
+        if data == None:
+          with open(path, 'rb') as fd:
+            data = fd.read()
+        # several web workers may do this at the same time
+        tmp_path = '{0}.{1}.tmp'.format(target, os.getpid())
+        with open(tmp_path, 'wb') as fd:
+          fd.write(compress(data))
+        os.replace(tmp_path, target)
+        written = written + 1
+  return written
+
+
+async def serve_file(request, path):
+  from sanic import response
+  accept_encoding = request.headers.get('Accept-Encoding', '')
+  served_path = path
+  encoding = None
+  for candidate, extension in (('br', '.br'), ('gzip', '.gz')):
+    if candidate in accept_encoding and os.path.isfile(path + extension):
+      served_path = path + extension
+      encoding = candidate
+      break
+  try:
+    stat = os.stat(served_path)
+  except OSError:
+    return response.text('Not Found', status=404)
+  etag = '"{0:x}-{1:x}{2}"'.format(stat.st_mtime_ns, stat.st_size, '-' + encoding if encoding else '')
+  headers = { 'ETag': etag, 'Vary': 'Accept-Encoding', 'Cache-Control': 'no-cache' }
+  if encoding != None:
+    headers['Content-Encoding'] = encoding
+  if is_not_modified(request, etag):
+    return response.raw(b'', status=304, headers=headers)
+  mime_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+  return await response.file(served_path, mime_type=mime_type, headers=headers)
+
+
+def add_static(router, uri, root):
+  """Serves a file, or a directory below uri, on an app or blueprint.
+
+  Replaces `router.static(uri, root)`.
+  """
+  if not os.path.isdir(root):
+    @router.route(uri, methods=['GET', 'HEAD'])
+    async def static_file(request):
+      return await serve_file(request, root)
+    return
+
+  try:
+    written = precompress(root)
+    if written > 0:
+      _logger.info('Precompressed {0} static files in {1}'.format(written, root))
+  except OSError:
+    _logger.exception('Cannot precompress {0}'.format(root))
+
+  real_root = os.path.realpath(root)
+
+  @router.route(uri.rstrip('/') + '/<path:path>', methods=['GET', 'HEAD'])
+  async def static_directory(request, path):
+    file_path = os.path.realpath(os.path.join(real_root, urllib.parse.unquote(path)))
+    if not file_path.startswith(real_root + os.sep):
+      from sanic import response
+      return response.text('Not Found', status=404)
+    return await serve_file(request, file_path)
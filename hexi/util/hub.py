@@ -0,0 +1,124 @@
+"""Several broadcast topics over one websocket.
+
+The client sends JSON commands:
+
+  {"cmd": "subscribe", "topic": "/core/mca/api/mca_log?points=300"}
+  {"cmd": "unsubscribe", "topic": "/core/mca/api/mca_log?points=300"}
+
+Topics are the paths (and query strings) of the broadcaster endpoints. The
+server sends frames, each a JSON array of `[topic, message]` pairs, topic
+being the one the client subscribed with and message the JSON an endpoint
+would have sent. Answers to commands are pairs with the topic `$hub`.
+
+All the messages of a client go through one send loop, and the messages
+arriving while a frame is sent or within `FRAME_INTERVAL` share the next
+frame.
+"""
+
+import asyncio
+import collections
+import json
+
+HUB_TOPIC = '$hub'
+# at most this many frames per second for one client
+FRAME_INTERVAL = 1 / 30
+# per client, the oldest messages are dropped beyond this
+MAX_PENDING = 1000
+
+
+class _TopicSink():
+  def __init__(self, client, topic):
+    self.client = client
+    self.topic = topic
+
+  def deliver(self, message):
+    self.client.push(self.topic, message)
+
+
+class HubClient():
+  """One multiplexed websocket.
+
+  Args:
+    attach: coroutine function (topic, sink) returning the canonical topic,
+      or None if there is no such topic, see `hexi.util.broadcast.attach`.
+    detach: coroutine function (topic, sink).
+  """
+
+  def __init__(self, ws, attach, detach):
+    self.ws = ws
+    self.attach = attach
+    self.detach = detach
+    self.sinks = {}
+    self.pending = collections.deque(maxlen=MAX_PENDING)
+    self.dropped = 0
+    self.ready = asyncio.Event()
+
+  def push(self, topic, message):
+    if len(self.pending) == MAX_PENDING:
+      self.dropped = self.dropped + 1
+    self.pending.append((topic, message))
+    self.ready.set()
+
+  def reply(self, data):
+    self.push(HUB_TOPIC, json.dumps(data))
+
+  def make_frame(self):
+    # messages are JSON already, they are not parsed again
+    parts = []
+    while len(self.pending) > 0:
+      topic, message = self.pending.popleft()
+      parts.append('[{0},{1}]'.format(json.dumps(topic), message))
+    return '[' + ','.join(parts) + ']'
+
+  async def send_loop_async(self):
+    while True:
+      await self.ready.wait()
+      self.ready.clear()
+      await self.ws.send(self.make_frame())
+      await asyncio.sleep(FRAME_INTERVAL)
+
+  async def handle_command(self, command):
+    cmd = command.get('cmd')
+    topic = command.get('topic')
+    if cmd in ('subscribe', 'unsubscribe') and not isinstance(topic, str):
+      self.reply({ 'cmd': cmd, 'code': 400, 'reason': 'topic must be a string' })
+    elif cmd == 'subscribe':
+      if topic in self.sinks:
+        self.reply({ 'cmd': cmd, 'topic': topic, 'code': 200 })
+        return
+      sink = _TopicSink(self, topic)
+      self.sinks[topic] = sink
+      canonical = await self.attach(topic, sink)
+      if canonical == None:
+        del self.sinks[topic]
+        self.reply({ 'cmd': cmd, 'topic': topic, 'code': 404, 'reason': 'Unknown topic' })
+      else:
+        self.reply({ 'cmd': cmd, 'topic': topic, 'code': 200 })
+    elif cmd == 'unsubscribe':
+      sink = self.sinks.pop(topic, None)
+      if sink != None:
+        await self.detach(topic, sink)
+      self.reply({ 'cmd': cmd, 'topic': topic, 'code': 200 })
+    else:
+      self.reply({ 'cmd': cmd, 'code': 404, 'reason': 'Unknown command' })
+
+  async def run(self):
+    """Serves the websocket until it is closed."""
+    send_future = asyncio.ensure_future(self.send_loop_async())
+    try:
+      while True:
+        raw = await self.ws.recv()
+        try:
+          command = json.loads(raw)
+        except ValueError as e:
+          self.reply({ 'code': 400, 'reason': str(e) })
+          continue
+        if not isinstance(command, dict):
+          self.reply({ 'code': 400, 'reason': 'A command must be an object' })
+          continue
+        await self.handle_command(command)
+    finally:
+      send_future.cancel()
+      for topic, sink in self.sinks.items():
+        await self.detach(topic, sink)
+      self.sinks = {}
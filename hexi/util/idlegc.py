@@ -0,0 +1,194 @@
+"""Garbage collection in the idle time between pipeline ticks.
+
+Python collects whenever enough objects were allocated, so its pauses land
+anywhere in a tick. With `IdleCollector.enable`, everything allocated at
+startup is frozen out of collections (`gc.freeze`, Python 3.7+), automatic
+collection is disabled, and the input manager calls `on_tick` once per tick.
+`IDLE_PHASE` into the tick, when the callbacks of the tick are done, the
+generation Python would have collected is collected if its expected pause
+fits the time left before the next tick. Otherwise it waits for a later
+tick, at most `MAX_DEFERRED` ticks.
+
+Collection pauses are measured through `gc.callbacks` in both modes, and
+`trace_allocations_async` compares `tracemalloc` snapshots taken a number of
+ticks apart.
+"""
+
+import asyncio
+import collections
+import gc
+import logging
+import time
+import tracemalloc
+
+import numpy
+
+_logger = logging.getLogger(__name__)
+
+# share of the tick after which collections may start
+IDLE_PHASE = 0.5
+# a collection starts only if its expected pause is below this share of the
+# time left in the tick
+SLACK_SHARE = 0.5
+# ticks a due collection can wait for enough slack, then it runs anyway
+MAX_DEFERRED = 20
+PAUSE_WINDOW = 200
+
+
+class IdleCollector():
+  def __init__(self):
+    self.enabled = False
+    self.ticks = 0
+    self.handle = None
+    self.deferred = 0
+    self.forced = 0
+    self.streak = 0
+    # seconds, updated from measured pauses
+    self.expected = [0.0005, 0.002, 0.02]
+    self.pauses = [collections.deque(maxlen=PAUSE_WINDOW) for _ in range(3)]
+    self.collections = [0, 0, 0]
+    self.collected = [0, 0, 0]
+    self.pause_start = None
+    # (tick, future) resolved once that many ticks passed
+    self.waiters = []
+
+  def install(self):
+    gc.callbacks.append(self._on_gc)
+
+  def _on_gc(self, phase, info):
+    if phase == 'start':
+      self.pause_start = time.perf_counter()
+    elif self.pause_start != None:
+      generation = info['generation']
+      self.pauses[generation].append(time.perf_counter() - self.pause_start)
+      self.collections[generation] = self.collections[generation] + 1
+      self.collected[generation] = self.collected[generation] + info['collected']
+      self.pause_start = None
+
+  def enable(self):
+    """Freezes the objects allocated so far and collects only between ticks."""
+    gc.collect()
+    if hasattr(gc, 'freeze'):
+      gc.freeze()
+    gc.disable()
+    self.enabled = True
+    _logger.info('Garbage collection runs between ticks, {0} objects frozen'.format(
+      gc.get_freeze_count() if hasattr(gc, 'get_freeze_count') else 0))
+
+  def on_tick(self, period):
+    """Called at the start of every tick, `period` seconds apart."""
+    self.ticks = self.ticks + 1
+    if len(self.waiters) > 0:
+      self._wake_waiters()
+    if not self.enabled:
+      return
+    loop = asyncio.get_event_loop()
+    if self.handle != None:
+      self.handle.cancel()
+    self.handle = loop.call_later(period * IDLE_PHASE, self.collect_if_due, loop.time() + period)
+
+  def due_generation(self):
+    """The generation an automatic collection would collect now, or None."""
+    counts = gc.get_count()
+    thresholds = gc.get_threshold()
+    for generation in (2, 1, 0):
+      if counts[generation] > thresholds[generation]:
+        return generation
+    return None
+
+  def collect_if_due(self, deadline):
+    self.handle = None
+    generation = self.due_generation()
+    if generation == None:
+      return
+    slack = deadline - asyncio.get_event_loop().time()
+    if self.expected[generation] > slack * SLACK_SHARE:
+      if self.streak < MAX_DEFERRED:
+        self.streak = self.streak + 1
+        self.deferred = self.deferred + 1
+        return
+      self.forced = self.forced + 1
+    self.streak = 0
+    start = time.perf_counter()
+    gc.collect(generation)
+    pause = time.perf_counter() - start
+    # quick to grow, slow to shrink
+    self.expected[generation] = max(pause, 0.8 * self.expected[generation] + 0.2 * pause)
+
+  def _wake_waiters(self):
+    waiting = []
+    for tick, future in self.waiters:
+      if self.ticks >= tick:
+        if not future.done():
+          future.set_result(None)
+      else:
+        waiting.append((tick, future))
+    self.waiters = waiting
+
+  def wait_ticks(self, ticks):
+    future = asyncio.get_event_loop().create_future()
+    self.waiters.append((self.ticks + ticks, future))
+    return future
+
+  async def trace_allocations_async(self, ticks=20, limit=30):
+    """Memory allocated and not freed over `ticks` ticks, by source line."""
+    started = not tracemalloc.is_tracing()
+    if started:
+      tracemalloc.start()
+    try:
+      await self.wait_ticks(1)
+      before = tracemalloc.take_snapshot()
+      await self.wait_ticks(ticks)
+      after = tracemalloc.take_snapshot()
+      current, peak = tracemalloc.get_traced_memory()
+    finally:
+      if started:
+        tracemalloc.stop()
+    filters = [
+      tracemalloc.Filter(False, tracemalloc.__file__),
+      tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    ]
+    diff = after.filter_traces(filters).compare_to(before.filter_traces(filters), 'lineno')
+    return {
+      'ticks': ticks,
+      'traced_bytes': current,
+      'traced_peak_bytes': peak,
+      'bytes_per_tick': sum(stat.size_diff for stat in diff) / ticks,
+      'blocks_per_tick': sum(stat.count_diff for stat in diff) / ticks,
+      'top': [{
+        'line': '{0}:{1}'.format(stat.traceback[0].filename, stat.traceback[0].lineno),
+        'bytes_per_tick': stat.size_diff / ticks,
+        'blocks_per_tick': stat.count_diff / ticks,
+        'bytes': stat.size,
+      } for stat in diff[:limit] if stat.size_diff != 0 or stat.count_diff != 0],
+    }
+
+  def get_stats(self):
+    def summarize(pauses):
+      if len(pauses) == 0:
+        return None
+      pauses = numpy.array(pauses) * 1000
+      return {
+        'p50': float(numpy.percentile(pauses, 50)),
+        'p99': float(numpy.percentile(pauses, 99)),
+        'max': float(pauses.max()),
+      }
+
+    return {
+      'idle': self.enabled,
+      'frozen': gc.get_freeze_count() if hasattr(gc, 'get_freeze_count') else 0,
+      'counts': gc.get_count(),
+      'thresholds': gc.get_threshold(),
+      'ticks': self.ticks,
+      'deferred': self.deferred,
+      'forced': self.forced,
+      'generations': [{
+        'collections': self.collections[generation],
+        'collected': self.collected[generation],
+        'expected_ms': self.expected[generation] * 1000,
+        'pause_ms': summarize(self.pauses[generation]),
+      } for generation in range(3)],
+    }
+
+
+collector = IdleCollector()
@@ -0,0 +1,144 @@
+"""Moves log record formatting and output off the calling thread.
+
+`install()` replaces the handlers of the given loggers with a handler that
+only puts records on a queue. A background thread formats them and runs the
+original handlers. Repeated warnings from the same call site are aggregated
+there: the first one is written, later ones within `REPEAT_WINDOW` seconds
+are counted and summarized in a single line.
+"""
+
+import atexit
+import logging
+import queue
+import threading
+import time
+
+QUEUE_SIZE = 10000
+REPEAT_WINDOW = 10
+
+
+class LogQueueHandler(logging.Handler):
+  """Puts records on the worker queue, never blocks and never formats."""
+
+  def __init__(self, worker, targets):
+    super().__init__()
+    self.worker = worker
+    self.targets = targets
+
+  def emit(self, record):
+    try:
+      self.worker.queue.put_nowait((self.targets, record))
+    except queue.Full:
+      self.worker.dropped = self.worker.dropped + 1
+
+
+class RepeatAggregator():
+  """Keeps the first record of a call site per window, counts the others."""
+
+  def __init__(self, window=REPEAT_WINDOW, min_level=logging.WARNING):
+    self.window = window
+    self.min_level = min_level
+    # key -> [window start, suppressed count, last suppressed (targets, record)]
+    self.sites = {}
+
+  def key(self, record):
+    return (record.name, record.levelno, record.pathname, record.lineno, str(record.msg))
+
+  def add(self, targets, record, now):
+    """Returns the (targets, record) pairs to write now."""
+    if record.levelno < self.min_level:
+      return [(targets, record)]
+    key = self.key(record)
+    site = self.sites.get(key)
+    if site != None and now - site[0] < self.window:
+      site[1] = site[1] + 1
+      site[2] = (targets, record)
+      return []
+    ret = []
+    if site != None and site[1] > 0:
+      ret.append(self.summary(site))
+    self.sites[key] = [now, 0, None]
+    ret.append((targets, record))
+    return ret
+
+  def expire(self, now):
+    """Returns summaries of windows which have ended."""
+    ret = []
+    for key, site in list(self.sites.items()):
+      if now - site[0] >= self.window:
+        if site[1] > 0:
+          ret.append(self.summary(site))
+        del self.sites[key]
+    return ret
+
+  def summary(self, site):
+    start, count, (targets, record) = site
+    summary = logging.makeLogRecord(dict(record.__dict__,
+      msg='{0} [repeated {1} more times in {2:.0f}s]'.format(record.getMessage(), count, self.window),
+      args=None))
+    return targets, summary
+
+
+class LogWorker(threading.Thread):
+  def __init__(self):
+    super().__init__(name='log-worker', daemon=True)
+    self.queue = queue.Queue(maxsize=QUEUE_SIZE)
+    self.aggregator = RepeatAggregator()
+    self.dropped = 0
+
+  def run(self):
+    last_expire = time.monotonic()
+    while True:
+      try:
+        item = self.queue.get(timeout=1)
+      except queue.Empty:
+        item = None
+      if item == 'stop':
+        self.write(self.aggregator.expire(float('inf')))
+        break
+      now = time.monotonic()
+      if item != None:
+        self.write(self.aggregator.add(item[0], item[1], now))
+      if now - last_expire >= 1:
+        self.write(self.aggregator.expire(now))
+        last_expire = now
+
+  def write(self, items):
+    for targets, record in items:
+      for handler in targets:
+        if record.levelno >= handler.level:
+          try:
+            handler.handle(record)
+          except Exception:
+            handler.handleError(record)
+
+  def stop(self):
+    self.queue.put('stop')
+    self.join(timeout=5)
+
+
+_worker = None
+
+
+def install(logger_names=(None,)):
+  """Moves the handlers of the given loggers (None is the root logger) behind
+  a queue served by a background thread."""
+  global _worker
+  if _worker == None:
+    _worker = LogWorker()
+    _worker.start()
+    atexit.register(_worker.stop)
+  for name in logger_names:
+    logger = logging.getLogger(name)
+    targets = [handler for handler in logger.handlers if not isinstance(handler, LogQueueHandler)]
+    if len(targets) == 0:
+      continue
+    for handler in targets:
+      logger.removeHandler(handler)
+    logger.addHandler(LogQueueHandler(_worker, targets))
+
+
+def get_stats():
+  if _worker == None:
+    return { 'queued': 0, 'dropped': 0 }
+  return { 'queued': _worker.queue.qsize(), 'dropped': _worker.dropped }
@@ -0,0 +1,70 @@
+"""A statistical profiler sampling the stack of the main thread.
+
+An interval timer raises a signal every `interval` seconds, of CPU time in
+`cpu` mode or of real time in `wall` mode, and the handler counts the stack
+it interrupted. Nothing runs between samples, so the profiled process keeps
+its timing. Signal handlers run in the main thread, which is the thread of
+the event loop.
+
+`collapsed()` returns one line per distinct stack, frames from the root
+separated by `;` and followed by the count, the input of flamegraph.pl and
+speedscope. Only available where `signal.setitimer` is (not on Windows).
+"""
+
+import collections
+import os
+import signal
+
+MODES = {
+  'cpu': (signal.ITIMER_PROF, signal.SIGPROF) if hasattr(signal, 'ITIMER_PROF') else None,
+  'wall': (signal.ITIMER_REAL, signal.SIGALRM) if hasattr(signal, 'ITIMER_REAL') else None,
+}
+
+
+def is_supported():
+  return hasattr(signal, 'setitimer')
+
+
+class StackSampler():
+  def __init__(self, interval=0.005, mode='cpu'):
+    if not is_supported():
+      raise RuntimeError('Sampling needs signal.setitimer, not available on this platform')
+    if MODES.get(mode) == None:
+      raise ValueError('Unknown mode {0}, expected one of {1}'.format(mode, ', '.join(MODES)))
+    self.interval = interval
+    self.timer, self.signum = MODES[mode]
+    # tuple of code objects from the leaf -> count
+    self.counts = collections.Counter()
+    self.samples = 0
+    self.previous_handler = None
+
+  def _on_signal(self, signum, frame):
+    stack = []
+    while frame != None:
+      stack.append(frame.f_code)
+      frame = frame.f_back
+    self.counts[tuple(stack)] += 1
+    self.samples = self.samples + 1
+
+  def start(self):
+    self.previous_handler = signal.signal(self.signum, self._on_signal)
+    signal.setitimer(self.timer, self.interval, self.interval)
+
+  def stop(self):
+    signal.setitimer(self.timer, 0, 0)
+    signal.signal(self.signum, self.previous_handler)
+    self.previous_handler = None
+
+  def collapsed(self):
+    names = {}
+
+    def name(code):
+      if code not in names:
+        names[code] = '{0} ({1}:{2})'.format(
+          code.co_name, os.path.relpath(code.co_filename), code.co_firstlineno).replace(';', ':')
+      return names[code]
+
+    lines = collections.Counter()
+    for stack, count in self.counts.items():
+      lines[';'.join(name(code) for code in reversed(stack))] += count
+    return ''.join('{0} {1}\n'.format(stack, count) for stack, count in lines.most_common())
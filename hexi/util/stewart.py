@@ -0,0 +1,73 @@
+import math
+import numpy
+
+
+DEFAULT_GEOMETRY = {
+  'base_radius': 0.5,           # in meters
+  'platform_radius': 0.35,      # in meters
+  'base_joint_spacing': 15,     # in degree, angle between paired base joints
+  'platform_joint_spacing': 45, # in degree, angle between paired platform joints
+  'home_height': 0.6,           # in meters
+  'leg_min': 0.5,               # in meters
+  'leg_max': 0.9,               # in meters
+}
+
+
+def _build_joints(radius, spacing, offset):
+  angles = []
+  for k in range(3):
+    center = numpy.deg2rad(offset + 120 * k)
+    half = numpy.deg2rad(spacing) / 2
+    angles += [center - half, center + half]
+  angles = numpy.array(angles)
+  return numpy.stack([
+    radius * numpy.cos(angles),
+    radius * numpy.sin(angles),
+    numpy.zeros(6),
+  ], axis=1)
+
+
+def rotation_matrix(alpha, beta, gamma):
+  """Rotation matrix R = Rz(gamma) Ry(beta) Rx(alpha)."""
+  ca, sa = math.cos(alpha), math.sin(alpha)
+  cb, sb = math.cos(beta), math.sin(beta)
+  cg, sg = math.cos(gamma), math.sin(gamma)
+  return numpy.array([
+    [cg * cb, cg * sb * sa - sg * ca, cg * sb * ca + sg * sa],
+    [sg * cb, sg * sb * sa + cg * ca, sg * sb * ca - cg * sa],
+    [-sb, cb * sa, cb * ca],
+  ])
+
+
+class StewartKinematics():
+  """Inverse kinematics of a 6-6 Stewart platform.
+
+  Poses are [x, y, z, alpha, beta, gamma] relative to the home position,
+  the same layout as the MCA output signal.
+  """
+
+  def __init__(self, geometry=None):
+    self.geometry = dict(DEFAULT_GEOMETRY)
+    if geometry != None:
+      self.geometry.update(geometry)
+    g = self.geometry
+    self.base_joints = _build_joints(g['base_radius'], g['base_joint_spacing'], 0)
+    # platform joints are rotated by 60 degree and shifted by one so that
+    # each leg connects neighbouring base and platform joints
+    self.platform_joints = numpy.roll(
+      _build_joints(g['platform_radius'], g['platform_joint_spacing'], 60), 1, axis=0)
+    self.home = numpy.array([0, 0, g['home_height']])
+
+  def leg_vectors(self, pose):
+    r = rotation_matrix(pose[3], pose[4], pose[5])
+    t = self.home + numpy.asarray(pose[0:3], dtype=float)
+    return self.platform_joints.dot(r.T) + t - self.base_joints
+
+  def leg_lengths(self, pose):
+    return numpy.linalg.norm(self.leg_vectors(pose), axis=1)
+
+  def clip_leg_lengths(self, lengths):
+    """Returns (clipped lengths, whether any leg was out of its stroke)."""
+    g = self.geometry
+    clipped = numpy.clip(lengths, g['leg_min'], g['leg_max'])
+    return clipped, bool(numpy.any(clipped != lengths))
@@ -1,8 +1,37 @@
-import logging
 import collections
+import logging
+import threading
+
+
+class TailLog():
+  """The last formatted log lines, each with an increasing sequence number,
+  so readers can fetch only the lines they have not seen yet."""
+
+  def __init__(self, maxlen):
+    self.lines = collections.deque(maxlen=maxlen)
+    self.seq = 0
+    self.lock = threading.Lock()
+
+  def append(self, line):
+    with self.lock:
+      self.seq = self.seq + 1
+      self.lines.append((self.seq, line))
+
+  def since(self, seq=0):
+    """Returns (last sequence number, lines after seq)."""
+    with self.lock:
+      if seq >= self.seq:
+        return self.seq, []
+      return self.seq, [line for line_seq, line in self.lines if line_seq > seq]
+
+  def __iter__(self):
+    return iter(self.since()[1])
+
+  def __len__(self):
+    return len(self.lines)
 
 
-log_queue = collections.deque(maxlen=500)
+log_queue = TailLog(maxlen=500)
 
 
 class TailLogHandler(logging.Handler):
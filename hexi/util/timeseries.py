@@ -0,0 +1,476 @@
+"""Compressed in-memory time series.
+
+Samples are a millisecond timestamp and a fixed number of float columns,
+encoded like Gorilla (Pelkonen et al., VLDB 2015): timestamps as
+delta-of-delta with variable length prefixes, values as the XOR with the
+previous value of the same column, keeping only the meaningful bits. Idle or
+slowly changing channels take one or two bits per sample.
+
+Samples go to chunks of `chunk_size` samples. Only the last chunk is open,
+the others are sealed byte strings, so a time range decodes only the chunks
+it overlaps, found by bisecting the chunk start times. The oldest chunks are
+dropped beyond `max_bytes`, sealed chunks are also kept on disk if a
+`hexi.util.chunkstore.ChunkStore` is given. Each chunk also keeps the
+lowest, highest, first and last value of every column, which answers coarse
+queries without decoding.
+"""
+
+import bisect
+import collections
+import struct
+
+import os
+
+import numpy
+
+from hexi.util import chunkstore
+from hexi.util import decimate
+from hexi.util import deque
+
+STORE_PLACE = './.telemetry'
+
+
+class BitWriter():
+  def __init__(self):
+    self.buffer = bytearray()
+    self.acc = 0
+    self.acc_bits = 0
+
+  def write(self, value, n):
+    self.acc = (self.acc << n) | (value & ((1 << n) - 1))
+    self.acc_bits = self.acc_bits + n
+    if self.acc_bits >= 64:
+      extra = self.acc_bits & 7
+      self.buffer += (self.acc >> extra).to_bytes(self.acc_bits >> 3, 'big')
+      self.acc = self.acc & ((1 << extra) - 1)
+      self.acc_bits = extra
+
+  def getvalue(self):
+    pad = (-self.acc_bits) & 7
+    return bytes(self.buffer) + (self.acc << pad).to_bytes((self.acc_bits + pad) >> 3, 'big')
+
+  def __len__(self):
+    return len(self.buffer) + ((self.acc_bits + 7) >> 3)
+
+
+class BitReader():
+  def __init__(self, data):
+    self.data = data
+    self.pos = 0
+
+  def read(self, n):
+    pos = self.pos
+    start = pos >> 3
+    end = (pos + n + 7) >> 3
+    self.pos = pos + n
+    word = int.from_bytes(self.data[start:end], 'big')
+    return (word >> ((end << 3) - pos - n)) & ((1 << n) - 1)
+
+
+def _float_bits(values):
+  return struct.unpack('<{0}Q'.format(len(values)), struct.pack('<{0}d'.format(len(values)), *values))
+
+
+class Chunk():
+  """Consecutive samples, appended to until sealed."""
+
+  def __init__(self, columns, ts, values):
+    self.columns = columns
+    self.first_ts = ts
+    self.last_ts = ts
+    self.count = 1
+    self.data = None
+    self.writer = BitWriter()
+    self.prev_delta = 0
+    self.prev_bits = list(_float_bits(values))
+    self.leading = [-1] * columns
+    self.trailing = [0] * columns
+    for bits in self.prev_bits:
+      self.writer.write(bits, 64)
+    # lowest, highest, first and last values
+    self.summary = numpy.tile(numpy.asarray(values, dtype=float), (4, 1))
+
+  @property
+  def sealed(self):
+    return self.data != None
+
+  def append(self, ts, values):
+    summary = self.summary
+    row = numpy.asarray(values, dtype=float)
+    numpy.minimum(summary[0], row, out=summary[0])
+    numpy.maximum(summary[1], row, out=summary[1])
+    summary[3] = row
+    writer = self.writer
+    delta = ts - self.last_ts
+    dod = delta - self.prev_delta
+    if dod == 0:
+      writer.write(0, 1)
+    elif -63 <= dod <= 64:
+      writer.write(0b10, 2)
+      writer.write(dod + 63, 7)
+    elif -255 <= dod <= 256:
+      writer.write(0b110, 3)
+      writer.write(dod + 255, 9)
+    elif -2047 <= dod <= 2048:
+      writer.write(0b1110, 4)
+      writer.write(dod + 2047, 12)
+    else:
+      writer.write(0b1111, 4)
+      writer.write(dod, 64)
+    self.prev_delta = delta
+    self.last_ts = ts
+
+    for column, bits in enumerate(_float_bits(values)):
+      xor = bits ^ self.prev_bits[column]
+      self.prev_bits[column] = bits
+      if xor == 0:
+        writer.write(0, 1)
+        continue
+      leading = min(64 - xor.bit_length(), 31)
+      trailing = (xor & -xor).bit_length() - 1
+      if leading >= self.leading[column] >= 0 and trailing >= self.trailing[column]:
+        # fits in the window of the previous value
+        writer.write(0b10, 2)
+        writer.write(xor >> self.trailing[column], 64 - self.leading[column] - self.trailing[column])
+      else:
+        meaningful = 64 - leading - trailing
+        writer.write(0b11, 2)
+        writer.write(leading, 5)
+        # 64 meaningful bits are written as 0
+        writer.write(meaningful & 63, 6)
+        writer.write(xor >> trailing, meaningful)
+        self.leading[column] = leading
+        self.trailing[column] = trailing
+    self.count = self.count + 1
+
+  def seal(self):
+    self.data = self.writer.getvalue()
+    self.writer = None
+    self.prev_bits = self.leading = self.trailing = None
+
+  @property
+  def nbytes(self):
+    return len(self.data) if self.data != None else len(self.writer)
+
+  def read(self):
+    return self.data if self.data != None else self.writer.getvalue()
+
+  def decode(self):
+    return decode_chunk(self.read(), self.columns, self.first_ts, self.count)
+
+
+def decode_chunk(data, columns, first_ts, count):
+  """Returns (timestamps as int64 array, values as float array of shape
+  (count, columns))."""
+  read = BitReader(data).read
+  timestamps = [first_ts] * count
+  bits = [0] * (count * columns)
+  for column in range(columns):
+    bits[column] = read(64)
+  ts = first_ts
+  delta = 0
+  leading = [0] * columns
+  meaningful = [0] * columns
+  for i in range(1, count):
+    if read(1) == 0:
+      dod = 0
+    elif read(1) == 0:
+      dod = read(7) - 63
+    elif read(1) == 0:
+      dod = read(9) - 255
+    elif read(1) == 0:
+      dod = read(12) - 2047
+    else:
+      dod = read(64)
+      if dod >= 1 << 63:
+        dod = dod - (1 << 64)
+    delta = delta + dod
+    ts = ts + delta
+    timestamps[i] = ts
+
+    base = i * columns
+    for column in range(columns):
+      prev = bits[base - columns + column]
+      if read(1) == 0:
+        bits[base + column] = prev
+        continue
+      if read(1) == 1:
+        leading[column] = read(5)
+        meaningful[column] = read(6) or 64
+      size = meaningful[column]
+      bits[base + column] = prev ^ (read(size) << (64 - leading[column] - size))
+  values = numpy.array(bits, dtype=numpy.uint64).view(numpy.float64).reshape(count, columns)
+  return numpy.array(timestamps, dtype=numpy.int64), values
+
+
+class TimeSeries():
+  """Compressed samples of `columns` floats with millisecond timestamps.
+
+  Timestamps must not go backwards.
+  """
+
+  DECODED_CACHE_SIZE = 8
+
+  def __init__(self, columns, chunk_size=512, max_bytes=4 * 1024 * 1024, store=None):
+    self.columns = columns
+    self.chunk_size = chunk_size
+    self.max_bytes = max_bytes
+    self.store = store
+    self.chunks = []
+    self.starts = []
+    self.sealed_bytes = 0
+    self.decoded = collections.OrderedDict()
+
+  def append(self, ts, values):
+    if len(self.chunks) > 0 and self.chunks[-1].count < self.chunk_size:
+      self.chunks[-1].append(ts, values)
+      return
+    if len(self.chunks) > 0:
+      self.chunks[-1].seal()
+      self.sealed_bytes = self.sealed_bytes + self.chunks[-1].nbytes
+      if self.store != None:
+        self.store.write(self.chunks[-1])
+    self.chunks.append(Chunk(self.columns, ts, values))
+    self.starts.append(ts)
+    while self.sealed_bytes > self.max_bytes and len(self.chunks) > 1:
+      chunk = self.chunks.pop(0)
+      self.starts.pop(0)
+      self.sealed_bytes = self.sealed_bytes - chunk.nbytes
+      self.decoded.pop(chunk, None)
+
+  def __len__(self):
+    return sum(chunk.count for chunk in self.chunks)
+
+  @property
+  def nbytes(self):
+    return self.sealed_bytes + (self.chunks[-1].nbytes if len(self.chunks) > 0 else 0)
+
+  def _decode(self, chunk):
+    if not chunk.sealed:
+      # the open chunk changes all the time, not worth caching
+      return chunk.decode()
+    result = self.decoded.get(chunk)
+    if result == None:
+      result = decode_chunk(chunk.read(), chunk.columns, chunk.first_ts, chunk.count)
+      self.decoded[chunk] = result
+      if len(self.decoded) > TimeSeries.DECODED_CACHE_SIZE:
+        self.decoded.popitem(last=False)
+    else:
+      self.decoded.move_to_end(chunk)
+    return result
+
+  def _concat(self, parts):
+    if len(parts) == 0:
+      return numpy.empty(0, dtype=numpy.int64), numpy.empty((0, self.columns))
+    return numpy.concatenate([p[0] for p in parts]), numpy.concatenate([p[1] for p in parts])
+
+  def _select(self, chunks, starts, from_ts, to_ts, hi=None):
+    """The chunks of chunks[:hi] overlapping a time range, starts are their
+    first timestamps."""
+    hi = len(chunks) if hi == None else hi
+    first = 0 if from_ts == None else max(0, bisect.bisect_right(starts, from_ts, 0, hi) - 1)
+    last = hi if to_ts == None else bisect.bisect_right(starts, to_ts, 0, hi)
+    return [chunk for chunk in chunks[first:last] if from_ts == None or chunk.last_ts >= from_ts]
+
+  def select(self, from_ts=None, to_ts=None):
+    """Returns the chunks overlapping a time range, stored ones first."""
+    chunks = []
+    if self.store != None:
+      # the in-memory chunks are the most recent stored ones
+      stored = self.store.chunks
+      end = len(stored)
+      if len(self.starts) > 0:
+        end = bisect.bisect_left(self.store.starts, self.starts[0])
+      chunks = self._select(stored, self.store.starts, from_ts, to_ts, hi=end)
+    return chunks + self._select(self.chunks, self.starts, from_ts, to_ts)
+
+  def _slice(self, chunk, from_ts, to_ts):
+    timestamps, values = self._decode(chunk)
+    lo = 0 if from_ts == None else numpy.searchsorted(timestamps, from_ts, 'left')
+    hi = len(timestamps) if to_ts == None else numpy.searchsorted(timestamps, to_ts, 'right')
+    return timestamps[lo:hi], values[lo:hi]
+
+  def range(self, from_ts=None, to_ts=None):
+    """Returns (timestamps, values) of the samples with from_ts <= ts <= to_ts."""
+    parts = [self._slice(chunk, from_ts, to_ts) for chunk in self.select(from_ts, to_ts)]
+    return self._concat([part for part in parts if len(part[0]) > 0])
+
+  def summarize(self, from_ts, to_ts, width):
+    """Returns the time range as summary rows for `decimate.minmax_by_time`.
+
+    Chunks shorter than width and fully inside the range are taken from
+    their summary, the others are decoded.
+    """
+    t_first, t_last, summaries = [], [], []
+    for chunk in self.select(from_ts, to_ts):
+      if ((from_ts == None or chunk.first_ts >= from_ts) and
+          (to_ts == None or chunk.last_ts <= to_ts) and
+          chunk.last_ts - chunk.first_ts < width):
+        t_first.append([chunk.first_ts])
+        t_last.append([chunk.last_ts])
+        summaries.append(chunk.summary[None])
+      else:
+        timestamps, values = self._slice(chunk, from_ts, to_ts)
+        t_first.append(timestamps)
+        t_last.append(timestamps)
+        summaries.append(numpy.repeat(values[:, None, :], 4, axis=1))
+    if len(summaries) == 0:
+      return numpy.empty(0, dtype=numpy.int64), numpy.empty(0, dtype=numpy.int64), numpy.empty((0, 4, self.columns))
+    return (numpy.concatenate(t_first).astype(numpy.int64), numpy.concatenate(t_last).astype(numpy.int64),
+            numpy.concatenate(summaries))
+
+  def bounds(self):
+    """Returns (first ts, last ts), or None if empty."""
+    chunks = self.select()
+    if len(chunks) == 0:
+      return None
+    return chunks[0].first_ts, chunks[-1].last_ts
+
+  def tail(self, n):
+    """Returns (timestamps, values) of the last n samples."""
+    parts = []
+    remaining = n
+    for chunk in reversed(self.select()):
+      if remaining <= 0:
+        break
+      timestamps, values = self._decode(chunk)
+      parts.insert(0, (timestamps[-remaining:], values[-remaining:]))
+      remaining = remaining - chunk.count
+    return self._concat(parts)
+
+
+class TelemetryLog(deque.WebSocketPiping):
+  """Long history of telemetry rows like `[t, [x, y, z, ...]]` or `[t, a, b]`,
+  with `t` in seconds, kept in a `TimeSeries`.
+
+  Websocket clients first receive the last `snapshot_len` rows, then new rows
+  in batches, see `WebSocketPiping`. Older rows are available through
+  `query`, from disk if `store` names a directory under `STORE_PLACE`.
+  """
+
+  def __init__(self, snapshot_len, flush_interval=1, template=None, store=None,
+               store_max_bytes=256 * 1024 * 1024, **kwargs):
+    """
+      template: shape of the rows as returned by `decimate.flatten`, like
+        `[float, 6]`. Needed with store, so history is readable before the
+        first new row.
+    """
+    self.snapshot_len = snapshot_len
+    self.series_args = kwargs
+    self.store_name = store
+    self.store_max_bytes = store_max_bytes
+    self.series = None
+    self.template = None
+    if template != None:
+      self._create_series(template)
+    super().__init__(flush_interval)
+
+  def _create_series(self, template):
+    self.template = template
+    columns = sum(kind if isinstance(kind, int) else 1 for kind in template) - 1
+    store = None
+    if self.store_name != None:
+      store = chunkstore.ChunkStore(os.path.join(STORE_PLACE, self.store_name), columns,
+                                    max_bytes=self.store_max_bytes)
+    self.series = TimeSeries(columns, store=store, **self.series_args)
+
+  def window_size(self):
+    return self.snapshot_len
+
+  def append(self, row):
+    array, template = decimate.flatten([row])
+    if self.series == None:
+      self._create_series(template)
+    self.series.append(int(round(array[0, 0] * 1000)), array[0, 1:])
+    self.pipe(row)
+
+  def _to_rows(self, array):
+    """Rows of an array whose first column is in milliseconds."""
+    if len(array) == 0:
+      return []
+    array[:, 0] = array[:, 0] / 1000
+    return decimate.unflatten(array, self.template)
+
+  def _to_array(self, timestamps, values):
+    array = numpy.empty((len(timestamps), self.series.columns + 1))
+    array[:, 0] = timestamps
+    array[:, 1:] = values
+    return array
+
+  def snapshot(self):
+    if self.series == None:
+      return []
+    return self._to_rows(self._to_array(*self.series.tail(self.snapshot_len)))
+
+  def query(self, from_t=None, to_t=None, points=None, method='minmax', resolution=None):
+    """Returns the rows between two times in seconds.
+
+    With `resolution` in seconds, rows are the lowest and highest values of
+    each column per time bucket, mostly taken from chunk summaries, so hours
+    of history are read without decoding them. `points` picks the resolution
+    for about that many rows, or with the `lttb` method picks rows of the
+    decoded range.
+    """
+    if self.series == None:
+      return []
+    if from_t != None and to_t != None and from_t > to_t:
+      return []
+    from_ts = None if from_t == None else int(from_t * 1000)
+    to_ts = None if to_t == None else int(to_t * 1000)
+    width = None
+    if resolution != None:
+      width = max(1, int(resolution * 1000))
+    elif points != None and method != 'lttb':
+      bounds = self.series.bounds()
+      if bounds == None:
+        return []
+      span = max(0, (bounds[1] if to_ts == None else to_ts) - (bounds[0] if from_ts == None else from_ts))
+      width = span // max(1, points // 2) + 1
+
+    if width != None:
+      t_first, t_last, summaries = self.series.summarize(from_ts, to_ts, width)
+      return self._to_rows(decimate.minmax_by_time(
+        t_first, t_last, summaries[:, 0], summaries[:, 1], summaries[:, 2], summaries[:, 3], width))
+    array = self._to_array(*self.series.range(from_ts, to_ts))
+    if points != None:
+      array = decimate.decimate_array(array, points, method)
+    return self._to_rows(array)
+
+  def get_stats(self):
+    return {
+      'samples': len(self.series) if self.series != None else 0,
+      'bytes': self.series.nbytes if self.series != None else 0,
+      'chunks': len(self.series.chunks) if self.series != None else 0,
+      'stored_bytes': self.series.store.nbytes if self.series != None and self.series.store != None else 0,
+      'stored_chunks': len(self.series.store.chunks) if self.series != None and self.series.store != None else 0,
+    }
+
+  def query_args(self, args):
+    """Parses `from`, `to`, `points`, `method` and `resolution` of a query."""
+    def get(name, parse):
+      value = args.get(name)
+      if isinstance(value, list):
+        value = value[0]
+      return parse(value) if value not in (None, '') else None
+    return {
+      'from_t': get('from', float),
+      'to_t': get('to', float),
+      'points': get('points', int),
+      'method': get('method', str) or 'minmax',
+      'resolution': get('resolution', float),
+    }
+
+  def attach_history_endpoint(self, blueprint, path):
+    from sanic import response
+
+    @blueprint.route(path)
+    async def get_history(request):
+      try:
+        kwargs = self.query_args(request.args)
+      except ValueError as e:
+        return response.json({ 'code': 400, 'reason': str(e) })
+      return response.json({
+        'code': 200,
+        'data': self.query(**kwargs),
+        'stats': self.get_stats(),
+      })
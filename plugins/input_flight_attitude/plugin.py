@@ -4,20 +4,19 @@ import logging
 import glob
 import pyee
 
-from sanic import response
 from hexi.plugin.InputPlugin import InputPlugin
+from hexi.service import event
+from hexi.util import broadcast
 
 _logger = logging.getLogger(__name__)
 
-SLEEP_INTERVAL = 1 / 20
-
 
 class PluginInputFlightAttitude(InputPlugin):
 
   def __init__(self):
     super().__init__()
     self.configurable = True
-    self.connected_clients = set()
+    self.state_broadcaster = broadcast.WebSocketBroadcaster(initial=lambda: json.dumps(self.get_states()))
     self.current_state = 'initial'
     self.state_running = False
     self.state_progress = 0
@@ -29,6 +28,20 @@ class PluginInputFlightAttitude(InputPlugin):
   def activate(self):
     super().activate()
     self.load_attitudes()
+    self.reset_state_running()
+    event.subscribe(self.on_script_event, ['hexi.pipeline.input.script_data', 'hexi.pipeline.input.script_done'])
+    self.hint_next_states()
+
+  def deactivate(self):
+    super().deactivate()
+    event.unsubscribe(self.on_script_event)
+    # the input manager stops the running script, its done event is not seen
+    self.reset_state_running()
+
+  def reset_state_running(self):
+    self.state_running = False
+    self.state_progress = 0
+    self.ee.emit('state_change')
 
   def load_attitudes(self):
     files = glob.glob('./plugins/input_flight_attitude/attitudes/*.json')
@@ -67,34 +80,37 @@ class PluginInputFlightAttitude(InputPlugin):
     self.current_state = state_id
     self.state_progress = 0
     self.ee.emit('state_change')
-    self.send_state_future = asyncio.ensure_future(self.send_signal_async(state_id))
-    self.send_state_future.add_done_callback(self.on_send_state_done)
-
-  async def send_signal_async(self, state_id):
-    state = self.states[state_id]
-    current_step = 0
-    all_step = len(state['attitudes'])
-    for attitude in state['attitudes']:
-      await asyncio.sleep(SLEEP_INTERVAL)
-      self.emit_input_signal(attitude[1:])
-      # emit step
-      current_step = current_step + 1
-      if current_step % 20 == 0:
-        self.state_progress = current_step / all_step
-        self.ee.emit('state_change')
-
-  def on_send_state_done(self, future):
-    self.state_running = False
-    self.state_progress = 0
-    self.ee.emit('state_change')
+    # the whole state is known in advance, so it is played as a script which
+    # MCA plugins can precompute instead of processing sample by sample
+    self.emit_input_script(state_id, self.get_state_samples(state_id))
+
+  def get_state_samples(self, state_id):
+    return [attitude[1:] for attitude in self.states[state_id]['attitudes']]
+
+  def hint_next_states(self):
+    self.emit_input_script_hint({
+      state_id: self.get_state_samples(state_id)
+      for state_id, state in self.states.items()
+      if self.current_state in state['fromState']
+    })
+
+  async def on_script_event(self, e):
+    value = e['value']
+    if value['source'] != self.id:
+      return
+    if e['key'] == 'hexi.pipeline.input.script_done':
+      self.reset_state_running()
+      self.hint_next_states()
+    elif (value['index'] + 1) % 20 == 0:
+      self.state_progress = (value['index'] + 1) / value['total']
+      self.ee.emit('state_change')
 
   def on_state_change(self):
-    data_to_send = json.dumps(self.get_states())
-    for client in self.connected_clients:
-      asyncio.ensure_future(client.send(data_to_send))
+    self.state_broadcaster.send(json.dumps(self.get_states()))
 
-  def load(self):
-    super().load()
+  def load_web(self):
+    super().load_web()
+    from sanic import response
 
     @self.bp.route('/api/state', methods=['POST'])
     async def set_state(request):
@@ -108,12 +124,4 @@ class PluginInputFlightAttitude(InputPlugin):
         _logger.exception('Set state failed')
         return response.json({ 'code': 400, 'reason': str(e) })
 
-    @self.bp.websocket('/api/state')
-    async def signal_feed(request, ws):
-      try:
-        self.connected_clients.add(ws)
-        await ws.send(json.dumps(self.get_states()))
-        while True:
-          await ws.recv()
-      finally:
-        self.connected_clients.remove(ws)
+    self.state_broadcaster.attach_ws_endpoint(self.bp, '/api/state')
@@ -0,0 +1,106 @@
+"""Throughput and latency of `DataChannel` against the bridge simulator.
+
+For each rate, starts `plugins.input_fsx.simulator` in a subprocess with
+`--stamp`, connects a `DataChannel` to it and counts the datagrams received
+and discarded over the measuring window. Latency is the time from sending
+to the `udp_received_message` event, both on `time.monotonic()`, so both
+processes must run on the same machine.
+
+  python -m plugins.input_fsx.benchmark --rates 1000,5000,20000 --duration 5
+
+The highest rate delivering at least `--min-delivery` of its datagrams is
+reported as the maximum sustained rate.
+"""
+
+import argparse
+import asyncio
+import socket
+import subprocess
+import sys
+import time
+
+import numpy
+
+from plugins.input_fsx import datachannel
+
+
+def free_port(kind):
+  with socket.socket(socket.AF_INET, kind) as sock:
+    sock.bind(('127.0.0.1', 0))
+    return sock.getsockname()[1]
+
+
+async def measure_async(rate, duration, warmup, simulator_args):
+  tcp_port = free_port(socket.SOCK_STREAM)
+  udp_port = free_port(socket.SOCK_DGRAM)
+  simulator = subprocess.Popen([
+    sys.executable, '-m', 'plugins.input_fsx.simulator',
+    '--port', str(tcp_port), '--rate', str(rate), '--stamp',
+  ] + simulator_args)
+  channel = datachannel.DataChannel(udp_port, '127.0.0.1', tcp_port)
+  channel.tcp.retry_sec = 0.1
+  latencies = []
+  measuring = False
+
+  def on_message(msg):
+    if measuring:
+      latencies.append(time.monotonic() - msg.transmissionDataBody.zAcceleration)
+
+  channel.ee.on('udp_received_message', on_message)
+  try:
+    await channel.start_async()
+    while channel.tcp.state != 'connected':
+      await asyncio.sleep(0.05)
+    await asyncio.sleep(warmup)
+    received = channel.udp_receive_counter
+    discarded = channel.udp_discard_counter
+    measuring = True
+    await asyncio.sleep(duration)
+    measuring = False
+    received = channel.udp_receive_counter - received
+    discarded = channel.udp_discard_counter - discarded
+  finally:
+    channel.stop()
+    simulator.terminate()
+    simulator.wait()
+
+  latencies = numpy.array(latencies) * 1000
+  percentiles = numpy.percentile(latencies, [50, 99, 99.9]) if len(latencies) > 0 else [numpy.nan] * 3
+  return {
+    'rate': rate,
+    'received_per_sec': received / duration,
+    'discarded_per_sec': discarded / duration,
+    'delivery': received / (rate * duration),
+    'latency_p50_ms': percentiles[0],
+    'latency_p99_ms': percentiles[1],
+    'latency_p999_ms': percentiles[2],
+  }
+
+
+def main(argv=None):
+  parser = argparse.ArgumentParser(prog='plugins.input_fsx.benchmark')
+  parser.add_argument('--rates', default='60,1000,5000,10000,20000,50000',
+                      help='comma separated datagrams per second')
+  parser.add_argument('--duration', type=float, default=5, help='seconds measured per rate')
+  parser.add_argument('--warmup', type=float, default=1, help='seconds skipped per rate')
+  parser.add_argument('--min-delivery', type=float, default=0.99)
+  parser.add_argument('--loss', default='0')
+  parser.add_argument('--reorder', default='0')
+  parser.add_argument('--duplicate', default='0')
+  args = parser.parse_args(argv)
+
+  simulator_args = ['--loss', args.loss, '--reorder', args.reorder, '--duplicate', args.duplicate]
+  loop = asyncio.get_event_loop()
+  sustained = None
+  print('{0:>8} {1:>10} {2:>10} {3:>9} {4:>9} {5:>9} {6:>9}'.format(
+    'rate', 'recv/s', 'discard/s', 'delivery', 'p50 ms', 'p99 ms', 'p99.9 ms'))
+  for rate in [float(rate) for rate in args.rates.split(',')]:
+    result = loop.run_until_complete(measure_async(rate, args.duration, args.warmup, simulator_args))
+    print('{rate:>8.0f} {received_per_sec:>10.0f} {discarded_per_sec:>10.0f} {delivery:>9.3f} '
+          '{latency_p50_ms:>9.3f} {latency_p99_ms:>9.3f} {latency_p999_ms:>9.3f}'.format(**result))
+    if result['delivery'] >= args.min_delivery:
+      sustained = rate
+  print('Maximum sustained rate: {0}'.format('{0:.0f}/s'.format(sustained) if sustained != None else 'none'))
+
+if __name__ == '__main__':
+  main()
@@ -1,15 +1,25 @@
 import time
 import asyncio
 import random
+import struct
 import pyee
 import logging
 
+from google.protobuf.message import DecodeError
 from plugins.input_fsx import fsx_pb2
+from plugins.input_fsx import linkstats
 from hexi.service import event
 
 
 _logger = logging.getLogger(__name__)
 
+# seconds between pings, each one a sample of round trip time and clock offset
+PING_INTERVAL = 1
+# little endian length prefix of the frames on the TCP channel
+FRAME_HEADER = struct.Struct('<I')
+# a larger length means the stream is corrupt
+MAX_FRAME_SIZE = 1024 * 1024
+
 
 class UDPServer(asyncio.DatagramProtocol):
 
@@ -20,6 +30,7 @@ class UDPServer(asyncio.DatagramProtocol):
     self.sn = 0
 
   def datagram_received(self, data, addr):
+    arrival_us = linkstats.now_us()
     try:
       # Note: there are no length prefix in UDP packets
       msg = fsx_pb2.UdpResponseMessage()
@@ -33,6 +44,7 @@ class UDPServer(asyncio.DatagramProtocol):
         self.manager.ee.emit('udp_discarded_message')
         return
       self.sn = msg.serialNumber
+      self.manager.channel.link.on_datagram(msg, arrival_us)
       self.manager.ee.emit('udp_received_message', msg)
     except Exception as e:
       _logger.warn(e)
@@ -42,32 +54,105 @@ class UDPServer(asyncio.DatagramProtocol):
     self.manager.ee.emit('udp_closed')
 
 
+class TCPClient(asyncio.Protocol):
+  """Length prefixed frames on the TCP channel.
+
+  Every complete frame of a received chunk is parsed in place through a
+  memoryview. Only an incomplete frame at the end is copied, to a buffer
+  kept across chunks. The same message object is emitted for every frame,
+  so listeners must copy what they keep.
+
+  Frames written in one event loop iteration go out in one `writelines`.
+  """
+
+  def __init__(self, manager):
+    super().__init__()
+    self.manager = manager
+    self.transport = None
+    self.buffer = bytearray()
+    self.message = fsx_pb2.TcpResponseMessage()
+    self.frames = []
+
+  def connection_made(self, transport):
+    self.transport = transport
+
+  def connection_lost(self, exc):
+    self.frames = []
+    self.manager.on_connection_lost()
+
+  def data_received(self, data):
+    receive_us = linkstats.now_us()
+    try:
+      if len(self.buffer) == 0:
+        consumed = self.decode(data, receive_us)
+        if consumed < len(data):
+          self.buffer.extend(data[consumed:])
+      else:
+        self.buffer.extend(data)
+        consumed = self.decode(self.buffer, receive_us)
+        del self.buffer[:consumed]
+    except (ValueError, DecodeError) as e:
+      _logger.warn('Telemetry connection is broken: {0}'.format(e))
+      self.buffer = bytearray()
+      self.transport.abort()
+
+  def decode(self, data, receive_us):
+    """Handles the complete frames of data, returns the bytes they take."""
+    offset = 0
+    end = len(data)
+    with memoryview(data) as view:
+      while end - offset >= FRAME_HEADER.size:
+        size = FRAME_HEADER.unpack_from(view, offset)[0]
+        if size > MAX_FRAME_SIZE:
+          raise ValueError('Frame of {0} bytes'.format(size))
+        start = offset + FRAME_HEADER.size
+        if end - start < size:
+          break
+        with view[start:start + size] as frame:
+          self.message.ParseFromString(frame)
+        offset = start + size
+        try:
+          self.manager.on_message(self.message, receive_us)
+        except Exception:
+          # the frame is consumed, it must not be handled again
+          _logger.exception('Telemetry message handler failed')
+    return offset
+
+  def write(self, body):
+    if len(self.frames) == 0:
+      asyncio.get_event_loop().call_soon(self.flush)
+    self.frames.append(FRAME_HEADER.pack(len(body)))
+    self.frames.append(body)
+
+  def flush(self):
+    frames = self.frames
+    self.frames = []
+    if len(frames) > 0 and not self.transport.is_closing():
+      self.transport.writelines(frames)
+
+
 class TCPClientManager(object):
   def __init__(self, channel, host, port, retry_sec=2):
     self.channel = channel
     self.host = host
     self.port = port
     self.retry_sec = retry_sec
-    self.work_future = None
     self.heartbeat_future = None
     self.connect_future = None
     self.reconnect_future = None
-    self.reader = None
-    self.writer = None
+    self.protocol = None
     self.state = 'idle'
     self.ee = channel.ee
 
   async def connect_async(self):
+    loop = asyncio.get_event_loop()
     while True and (self.state in ['connecting', 'reconnecting']):
       try:
-        future = asyncio.open_connection(self.host, self.port)
-        reader, writer = await asyncio.wait_for(future, timeout=3)
+        future = loop.create_connection(lambda: TCPClient(self), self.host, self.port)
+        _, protocol = await asyncio.wait_for(future, timeout=3)
         _logger.info('Telemetry connected')
-        self.reader = reader
-        self.writer = writer
+        self.protocol = protocol
         self.state = 'connected'
-        self.work_future = asyncio.ensure_future(self.work_async())
-        self.work_future.add_done_callback(self.on_work_done)
         self.heartbeat_future = asyncio.ensure_future(self.heartbeat_async())
         self.heartbeat_future.add_done_callback(self.on_heartbeat_done)
         self.ee.emit('tcp_connected')
@@ -89,35 +174,26 @@ class TCPClientManager(object):
 
   async def heartbeat_async(self):
     while True:
-      await asyncio.sleep(10)
+      await asyncio.sleep(PING_INTERVAL)
       msg = fsx_pb2.TcpRequestMessage()
       msg.msgType = fsx_pb2.TcpRequestMessage.MSG_TYPE_PING
       msg.pingBody.timeStamp = int(time.time())
+      msg.pingBody.originTimeUs = linkstats.now_us()
       self.write_message(msg)
 
   def on_heartbeat_done(self, future):
     self.heartbeat_future = None
 
-  async def work_async(self):
-    try:
-      while True:
-        size_buffer = await self.reader.readexactly(4)
-        size = int.from_bytes(size_buffer, byteorder='little')
-        body_buffer = await self.reader.readexactly(size)
-        msg = fsx_pb2.TcpResponseMessage()
-        msg.ParseFromString(body_buffer)
-        self.ee.emit('tcp_received_message', msg)
-    except (asyncio.IncompleteReadError, ConnectionResetError, ConnectionAbortedError):
-      pass
-
-  def on_work_done(self, future):
+  def on_message(self, msg, receive_us):
+    self.channel.link.on_response(msg, receive_us)
+    self.ee.emit('tcp_received_message', msg)
+
+  def on_connection_lost(self):
     _logger.info('Telemetry connection lost')
-    self.work_future = None
     if self.heartbeat_future != None:
       self.heartbeat_future.cancel()
-    self.reader = None
-    self.writer = None
-    if self.state != 'disconnected':
+    self.protocol = None
+    if self.state == 'connected':
       self.reconnect()
 
   async def reconnect_async(self):
@@ -142,17 +218,17 @@ class TCPClientManager(object):
       self.connect_future.cancel()
     if self.reconnect_future != None:
       self.reconnect_future.cancel()
-    if self.work_future != None:
-      self.work_future.cancel()
     if self.heartbeat_future != None:
       self.heartbeat_future.cancel()
-    if self.writer != None:
-      self.writer.close()
+    if self.protocol != None:
+      self.protocol.transport.close()
 
   def write_message(self, msg):
-    data = msg.SerializeToString()
-    data = len(data).to_bytes(4, byteorder = 'little') + data
-    self.writer.write(data)
+    if self.protocol == None:
+      _logger.warn('A message is not sent because telemetry is not connected')
+      return
+    self.channel.link.on_request_sent(linkstats.now_us())
+    self.protocol.write(msg.SerializeToString())
 
 class UDPServerManager(object):
   def __init__(self, channel, token, host, port):
@@ -198,6 +274,7 @@ class DataChannel(object):
     self.udp = UDPServerManager(self, self.udp_token, '0.0.0.0', udp_port)
     self.udp_receive_counter = 0
     self.udp_discard_counter = 0
+    self.link = linkstats.LinkStats()
     self.ee.on('tcp_connected', self.on_tcp_connected)
     self.ee.on('tcp_received_message', self.on_tcp_received_message)
     self.ee.on('udp_received_message', self.on_udp_received_message)
@@ -212,11 +289,13 @@ class DataChannel(object):
       delta_discard = self.udp_discard_counter - last_discard
       last_receive = self.udp_receive_counter
       last_discard = self.udp_discard_counter
-      self.ee.emit('udp_analytics_tick', {
+      stats = {
         'receive_all': last_receive,
         'discard_all': last_discard,
         'receive_tick': delta_receive,
-        'discard_tick': delta_discard})
+        'discard_tick': delta_discard}
+      stats.update(self.link.tick())
+      self.ee.emit('udp_analytics_tick', stats)
 
   def on_udp_analytics_done(self, future):
     self.udp_analytics_future = None
@@ -238,6 +317,7 @@ class DataChannel(object):
 
   def on_tcp_connected(self):
     self.udp.protocol.sn = 0
+    self.link.reset_connection()
     msg = fsx_pb2.TcpRequestMessage()
     msg.msgType = fsx_pb2.TcpRequestMessage.MSG_TYPE_SET_CONFIG
     msg.setConfigBody.udpPort = self.udp_port
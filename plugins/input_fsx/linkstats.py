@@ -0,0 +1,179 @@
+"""Latency of the link to the FSX bridge.
+
+Pings carry the time hexi sent them, and the bridge answers with it and its
+own times of receiving the ping and sending the answer, all in microseconds
+since the epoch. From the four times, as in NTP:
+
+  rtt    = (t4 - t1) - (t3 - t2)
+  offset = ((t2 - t1) + (t3 - t4)) / 2
+
+`offset` being bridge clock minus hexi clock. The sample of lowest round trip
+time among the last few is the least disturbed by queueing, so it is the one
+trusted for the offset, and the drift of the clocks is the slope of those
+offsets over time.
+
+Telemetry datagrams carry the time the bridge sent them. Their age is the
+time of arrival minus the sending time converted to hexi's clock, and their
+jitter is the interarrival jitter of RFC 3550, which needs no clock offset.
+
+Bridges older than these fields leave them zero. Round trip times are then
+taken between writing a request and reading its response, and there are no
+offset, age or jitter.
+"""
+
+import bisect
+import collections
+import time
+
+import numpy
+
+# upper bounds of the histogram buckets, the last bucket is unbounded
+EDGES_MS = (0.1, 0.2, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+# the offset is taken from the best of this many pings
+OFFSET_WINDOW = 8
+# the drift is fitted to this many offsets
+DRIFT_WINDOW = 64
+# seconds of offsets needed before fitting the drift
+DRIFT_MIN_SPAN = 30
+
+
+def now_us():
+  return int(time.time() * 1000000)
+
+
+class Histogram():
+  def __init__(self, edges=EDGES_MS):
+    self.edges = edges
+    self.counts = [0] * (len(edges) + 1)
+
+  def add(self, value_ms):
+    self.counts[bisect.bisect_left(self.edges, value_ms)] += 1
+
+  def reset(self):
+    self.counts = [0] * (len(self.edges) + 1)
+
+  def to_dict(self):
+    return { 'edges_ms': list(self.edges), 'counts': list(self.counts) }
+
+
+class ClockEstimator():
+  """Round trip time and clock offset from ping timestamps."""
+
+  def __init__(self):
+    self.samples = collections.deque(maxlen=OFFSET_WINDOW)
+    self.offsets = collections.deque(maxlen=DRIFT_WINDOW)
+    self.rtt_us = None
+    self.offset_us = None
+    self.offset_at_us = None
+    self.drift_ppm = None
+
+  def add(self, t1, t2, t3, t4):
+    rtt = (t4 - t1) - (t3 - t2)
+    offset = ((t2 - t1) + (t3 - t4)) / 2
+    self.add_rtt(rtt)
+    self.samples.append((rtt, offset, t4))
+    _, self.offset_us, self.offset_at_us = min(self.samples)
+    self.offsets.append((self.offset_at_us, self.offset_us))
+    self.drift_ppm = self._fit_drift()
+
+  def add_rtt(self, rtt):
+    self.rtt_us = max(0, rtt)
+
+  def _fit_drift(self):
+    if len(self.offsets) < 3:
+      return None
+    t = numpy.array([item[0] for item in self.offsets], dtype=numpy.float64)
+    if t[-1] - t[0] < DRIFT_MIN_SPAN * 1000000:
+      return None
+    offset = numpy.array([item[1] for item in self.offsets], dtype=numpy.float64)
+    slope = numpy.polyfit(t - t[0], offset, 1)[0]
+    return float(slope) * 1000000
+
+  @property
+  def synced(self):
+    return self.offset_us != None
+
+  def to_local(self, bridge_us):
+    """Converts a time of the bridge clock to the hexi clock."""
+    offset = self.offset_us
+    if self.drift_ppm != None:
+      offset = offset + self.drift_ppm * (bridge_us - offset - self.offset_at_us) / 1000000
+    return bridge_us - offset
+
+
+class LinkStats():
+  def __init__(self):
+    self.clock = ClockEstimator()
+    # write times of the requests waiting for a response, oldest first
+    self.pending = collections.deque(maxlen=64)
+    self.rtt_hist = Histogram()
+    self.age_hist = Histogram()
+    self.interarrival_hist = Histogram()
+    self.jitter_us = None
+    self.last_transit = None
+    self.last_arrival = None
+    self.age_sum_us = 0
+    self.age_count = 0
+    self.age_max_us = None
+
+  def on_request_sent(self, t_us):
+    self.pending.append(t_us)
+
+  def on_response(self, msg, t4):
+    t_sent = self.pending.popleft() if len(self.pending) > 0 else None
+    if msg.originTimeUs != 0 and msg.receiveTimeUs != 0 and msg.transmitTimeUs != 0:
+      self.clock.add(msg.originTimeUs, msg.receiveTimeUs, msg.transmitTimeUs, t4)
+    elif t_sent != None:
+      self.clock.add_rtt(t4 - t_sent)
+    else:
+      return
+    self.rtt_hist.add(self.clock.rtt_us / 1000)
+
+  def on_datagram(self, msg, arrival_us):
+    if self.last_arrival != None:
+      self.interarrival_hist.add((arrival_us - self.last_arrival) / 1000)
+    self.last_arrival = arrival_us
+    if msg.sendTimeUs == 0:
+      return
+    transit = arrival_us - msg.sendTimeUs
+    if self.last_transit != None:
+      d = abs(transit - self.last_transit)
+      self.jitter_us = d if self.jitter_us == None else self.jitter_us + (d - self.jitter_us) / 16
+    self.last_transit = transit
+    if self.clock.synced:
+      age = arrival_us - self.clock.to_local(msg.sendTimeUs)
+      self.age_hist.add(age / 1000)
+      self.age_sum_us += age
+      self.age_count += 1
+      if self.age_max_us == None or age > self.age_max_us:
+        self.age_max_us = age
+
+  def reset_connection(self):
+    """Forgets what belongs to one connection to the bridge."""
+    self.pending.clear()
+    self.last_transit = None
+    self.last_arrival = None
+
+  def tick(self):
+    """Returns the stats since the last tick, and starts the next one."""
+    def ms(value_us):
+      return float(value_us) / 1000 if value_us != None else None
+
+    stats = {
+      'rtt_ms': ms(self.clock.rtt_us),
+      'clock_offset_ms': ms(self.clock.offset_us),
+      'clock_drift_ppm': self.clock.drift_ppm,
+      'jitter_ms': ms(self.jitter_us),
+      'age_mean_ms': ms(self.age_sum_us / self.age_count) if self.age_count > 0 else None,
+      'age_max_ms': ms(self.age_max_us),
+      'rtt_hist': self.rtt_hist.to_dict(),
+      'age_hist': self.age_hist.to_dict(),
+      'interarrival_hist': self.interarrival_hist.to_dict(),
+    }
+    self.rtt_hist.reset()
+    self.age_hist.reset()
+    self.interarrival_hist.reset()
+    self.age_sum_us = 0
+    self.age_count = 0
+    self.age_max_us = None
+    return stats
@@ -5,8 +5,7 @@ import logging
 import numpy
 import scipy.constants
 
-from sanic import response
-from hexi.util import deque
+from hexi.util import timeseries
 from hexi.plugin.InputPlugin import InputPlugin
 from plugins.input_fsx import DataChannel
 
@@ -28,10 +27,12 @@ class PluginInputFsx(InputPlugin):
       'tcp_port': PluginInputFsx.CHANNEL_TCP_PORT,
     }
     self.channel = None
-    self.udp_analytics_log_queue = deque.WebSocketPipingDeque(maxlen=100)
+    self.link_stats = None
+    self.udp_analytics_log_queue = timeseries.TelemetryLog(100, max_bytes=1024 * 1024)
 
-  def load(self):
-    super().load()
+  def load_web(self):
+    super().load_web()
+    from sanic import response
 
     @self.bp.route('/api/config', methods=['GET'])
     async def get_config(request):
@@ -46,7 +47,12 @@ class PluginInputFsx(InputPlugin):
         _logger.exception('Save config failed')
         return response.json({ 'code': 400, 'reason': str(e) })
 
+    @self.bp.route('/api/link', methods=['GET'])
+    async def get_link(request):
+      return response.json({ 'code': 200, 'data': self.link_stats })
+
     self.udp_analytics_log_queue.attach_ws_endpoint(self.bp, '/api/udp_log')
+    self.udp_analytics_log_queue.attach_history_endpoint(self.bp, '/api/udp_history')
 
   def activate(self):
     super().activate()
@@ -79,40 +85,31 @@ class PluginInputFsx(InputPlugin):
     self.start_future = asyncio.ensure_future(self.channel.start_async())
     self.start_future.add_done_callback(self.on_start_done)
 
-    self.last_signal = [0, 0, 0, 0, 0, 0]
-    self.emit_signal_future = asyncio.ensure_future(self.emit_signal_async())
-    self.emit_signal_future.add_done_callback(self.on_emit_signal_done)
-
   def on_start_done(self, future):
     self.start_future = None
 
-  def on_emit_signal_done(self, future):
-    self.emit_signal_future = None
-
   def try_destroy_channel(self):
     if self.channel == None:
       return
     if self.start_future != None:
       self.start_future.cancel()
-    if self.emit_signal_future != None:
-      self.emit_signal_future.cancel()
     self.channel.stop()
     self.channel = None
 
   def on_udp_analytics_tick(self, data):
+    self.link_stats = data
     self.udp_analytics_log_queue.append([
-      int(time.time()),
+      time.time(),
       data['receive_tick'],
       data['discard_tick']
     ])
 
-  async def emit_signal_async(self):
-    while True:
-      self.emit_input_signal(self.last_signal)
-      await asyncio.sleep(1 / 20)
-
   def on_udp_received_message(self, msg):
-    self.last_signal = [
+    # mean age of the datagrams of the last analytics tick, once the clocks are synchronized
+    latency = None
+    if self.link_stats != None and self.link_stats.get('age_mean_ms') != None:
+      latency = self.link_stats['age_mean_ms'] / 1000
+    self.emit_input_signal([
       # convert foot to meter
       scipy.constants.foot * msg.transmissionDataBody.zAcceleration,   # forward/backward
       scipy.constants.foot * msg.transmissionDataBody.xAcceleration,   # left/right
@@ -120,5 +117,5 @@ class PluginInputFsx(InputPlugin):
       # convert degree to radians
       numpy.deg2rad(msg.transmissionDataBody.rollVelocity),
       numpy.deg2rad(msg.transmissionDataBody.pitchVelocity),
-      numpy.deg2rad(msg.transmissionDataBody.yawVelocity)]
+      numpy.deg2rad(msg.transmissionDataBody.yawVelocity)], latency)
 
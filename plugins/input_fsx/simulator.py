@@ -0,0 +1,222 @@
+"""Stand-in for the FSX bridge of `extras/hexi-fsx-plugin`.
+
+Speaks the same protocol as the bridge: a TCP server reading length
+prefixed `TcpRequestMessage`s and answering each with a
+`TcpResponseMessage`. After SET_CONFIG it streams `UdpResponseMessage`
+telemetry to the UDP port and token of the request, from the address the
+TCP client connected from.
+
+Telemetry is a slow synthetic motion. Loss, reordering and duplication of
+datagrams can be injected. With `stamp`, zAcceleration carries the
+`time.monotonic()` of sending instead, so a receiver on the same machine can
+measure latency, see `plugins.input_fsx.benchmark`.
+
+Pings and datagrams are timestamped like the bridge does, on a clock that
+can be set off and drifting from the local one to exercise the estimation of
+`plugins.input_fsx.linkstats`.
+
+  python -m plugins.input_fsx.simulator --rate 60 --loss 0.01
+"""
+
+import argparse
+import asyncio
+import logging
+import math
+import random
+import time
+
+from plugins.input_fsx import fsx_pb2
+
+_logger = logging.getLogger(__name__)
+
+# datagrams are sent in bursts this often at high rates
+TICK_SEC = 0.001
+
+
+class TelemetryStream():
+  """Streams telemetry to one hexi instance."""
+
+  def __init__(self, simulator, host, port, token):
+    self.simulator = simulator
+    self.host = host
+    self.port = port
+    self.token = token
+    self.serial_number = 1
+    self.held = None
+    self.transport = None
+    self.future = None
+
+  async def start(self):
+    loop = asyncio.get_event_loop()
+    self.transport, _ = await loop.create_datagram_endpoint(
+      asyncio.DatagramProtocol, remote_addr=(self.host, self.port))
+    self.future = asyncio.ensure_future(self.run_async())
+
+  def stop(self):
+    if self.future != None:
+      self.future.cancel()
+    if self.transport != None:
+      self.transport.close()
+
+  def make_message(self):
+    sim = self.simulator
+    t = time.monotonic()
+    msg = fsx_pb2.UdpResponseMessage()
+    msg.msgType = fsx_pb2.UdpResponseMessage.MSG_TYPE_TRANSMISSION_DATA
+    self.serial_number = self.serial_number + 1
+    msg.serialNumber = self.serial_number
+    msg.token = self.token
+    msg.sendTimeUs = sim.time_us()
+    body = msg.transmissionDataBody
+    body.xAcceleration = 2 * math.sin(t * 0.7)
+    body.yAcceleration = 1 * math.sin(t * 1.1)
+    body.zAcceleration = t if sim.stamp else 0.5 * math.sin(t * 1.9)
+    body.pitchVelocity = 3 * math.sin(t * 0.5)
+    body.rollVelocity = 5 * math.sin(t * 0.3)
+    body.yawVelocity = 1 * math.sin(t * 0.2)
+    return msg.SerializeToString()
+
+  def send(self):
+    sim = self.simulator
+    data = self.make_message()
+    rng = sim.rng
+    if rng.random() < sim.loss:
+      sim.stats['lost'] += 1
+      return
+    if self.held == None and rng.random() < sim.reorder:
+      # goes out after the next datagram
+      self.held = data
+      sim.stats['reordered'] += 1
+      return
+    self.transport.sendto(data)
+    sim.stats['sent'] += 1
+    if rng.random() < sim.duplicate:
+      self.transport.sendto(data)
+      sim.stats['duplicated'] += 1
+    if self.held != None:
+      self.transport.sendto(self.held)
+      sim.stats['sent'] += 1
+      self.held = None
+
+  async def run_async(self):
+    start = time.monotonic()
+    sent = 0
+    while True:
+      due = int((time.monotonic() - start) * self.simulator.rate)
+      while sent < due:
+        self.send()
+        sent = sent + 1
+      next_at = start + (sent + 1) / self.simulator.rate
+      await asyncio.sleep(max(TICK_SEC, next_at - time.monotonic()))
+
+
+class BridgeSimulator():
+  def __init__(self, host='127.0.0.1', port=16315, rate=60,
+               loss=0, reorder=0, duplicate=0, stamp=False, seed=None,
+               clock_offset=0, clock_drift=0):
+    """
+      clock_offset: milliseconds the bridge clock is ahead of the local one.
+      clock_drift: parts per million the bridge clock runs faster.
+    """
+    self.host = host
+    self.port = port
+    self.rate = rate
+    self.loss = loss
+    self.reorder = reorder
+    self.duplicate = duplicate
+    self.stamp = stamp
+    self.clock_offset = clock_offset
+    self.clock_drift = clock_drift
+    self.clock_start = time.time()
+    self.rng = random.Random(seed)
+    self.server = None
+    self.streams = set()
+    self.stats = { 'requests': 0, 'sent': 0, 'lost': 0, 'reordered': 0, 'duplicated': 0 }
+
+  def time_us(self):
+    """Microseconds since the epoch on the bridge clock."""
+    t = time.time()
+    t = t + self.clock_offset / 1000 + (t - self.clock_start) * self.clock_drift / 1000000
+    return int(t * 1000000)
+
+  async def start(self):
+    self.server = await asyncio.start_server(self.handle_client, self.host, self.port)
+    _logger.info('FSX bridge simulator listening at {0}:{1}'.format(self.host, self.port))
+
+  async def stop(self):
+    for stream in self.streams:
+      stream.stop()
+    self.streams.clear()
+    if self.server != None:
+      self.server.close()
+      await self.server.wait_closed()
+
+  def handle_request(self, request, peer_host, client):
+    """Returns whether the request succeeded and the stream of the client."""
+    if request.msgType == fsx_pb2.TcpRequestMessage.MSG_TYPE_SET_CONFIG:
+      if client != None:
+        client.stop()
+        self.streams.discard(client)
+      client = TelemetryStream(self, peer_host, request.setConfigBody.udpPort, request.setConfigBody.udpToken)
+      self.streams.add(client)
+      asyncio.ensure_future(client.start())
+    return True, client
+
+  async def handle_client(self, reader, writer):
+    peer_host = writer.get_extra_info('peername')[0]
+    _logger.info('Remote connection from {0}'.format(peer_host))
+    client = None
+    try:
+      while True:
+        size = int.from_bytes(await reader.readexactly(4), byteorder='little')
+        request = fsx_pb2.TcpRequestMessage()
+        request.ParseFromString(await reader.readexactly(size))
+        receive_us = self.time_us()
+        self.stats['requests'] += 1
+        success, client = self.handle_request(request, peer_host, client)
+        response = fsx_pb2.TcpResponseMessage()
+        response.success = success
+        response.timeStamp = int(time.time())
+        if request.msgType == fsx_pb2.TcpRequestMessage.MSG_TYPE_PING:
+          response.originTimeUs = request.pingBody.originTimeUs
+          response.receiveTimeUs = receive_us
+          response.transmitTimeUs = self.time_us()
+        body = response.SerializeToString()
+        writer.write(len(body).to_bytes(4, byteorder='little') + body)
+    except (asyncio.IncompleteReadError, ConnectionError):
+      pass
+    finally:
+      if client != None:
+        client.stop()
+        self.streams.discard(client)
+      writer.close()
+
+
+def main(argv=None):
+  parser = argparse.ArgumentParser(prog='plugins.input_fsx.simulator')
+  parser.add_argument('--host', default='127.0.0.1')
+  parser.add_argument('--port', type=int, default=16315)
+  parser.add_argument('--rate', type=float, default=60, help='datagrams per second')
+  parser.add_argument('--loss', type=float, default=0, help='probability to drop a datagram')
+  parser.add_argument('--reorder', type=float, default=0, help='probability to delay a datagram past the next one')
+  parser.add_argument('--duplicate', type=float, default=0, help='probability to send a datagram twice')
+  parser.add_argument('--stamp', action='store_true', help='send time.monotonic() as zAcceleration')
+  parser.add_argument('--seed', type=int, default=None)
+  parser.add_argument('--clock-offset', type=float, default=0, help='milliseconds the bridge clock is ahead')
+  parser.add_argument('--clock-drift', type=float, default=0, help='ppm the bridge clock runs faster')
+  args = parser.parse_args(argv)
+
+  logging.basicConfig(level=logging.INFO)
+  simulator = BridgeSimulator(args.host, args.port, args.rate,
+                              args.loss, args.reorder, args.duplicate, args.stamp, args.seed,
+                              args.clock_offset, args.clock_drift)
+  loop = asyncio.get_event_loop()
+  loop.run_until_complete(simulator.start())
+  try:
+    loop.run_forever()
+  except KeyboardInterrupt:
+    pass
+  loop.run_until_complete(simulator.stop())
+
+if __name__ == '__main__':
+  main()
@@ -3,6 +3,7 @@ import numpy as np
 from scipy import signal
 
 FREQ = 20
+MAX_ORDER = 3
 
 
 class RealtimeFilter():
@@ -32,31 +33,80 @@ class RealtimeFilter():
     return output
 
 
-def build_1st_filter(omega, lp=True, freq=FREQ):
+def design_1st_filter(omega, lp=True, freq=FREQ):
   b = [1, 0] if not lp else [0, omega]
   a = [1, omega]
-  return RealtimeFilter(*signal.bilinear(b, a, fs=freq))
+  return signal.bilinear(b, a, fs=freq)
 
 
-def build_2nd_filter(omega, zeta, lp=True, freq=FREQ):
+def design_2nd_filter(omega, zeta, lp=True, freq=FREQ):
   b = [1, 0, 0] if not lp else [0, 0, omega ** 2]
   a = [1, 2 * zeta * omega, omega ** 2]
-  return RealtimeFilter(*signal.bilinear(b, a, fs=freq))
+  return signal.bilinear(b, a, fs=freq)
 
 
-def build_3rd_filter(omega, zeta, omega_1, lp=True, freq=FREQ):
+def design_3rd_filter(omega, zeta, omega_1, lp=True, freq=FREQ):
   b = [1, 0, 0, 0] if not lp else [0, 0, 0, omega ** 3]
   a = [1, 2 * zeta * omega + omega_1, omega ** 2 + omega_1 * 2 * zeta * omega, omega ** 2 * omega_1]
-  return RealtimeFilter(*signal.bilinear(b, a, fs=freq))
+  return signal.bilinear(b, a, fs=freq)
 
 
-def build_filter(*, order:int=1, lp:bool=True,
+def design_filter(*, order:int=1, lp:bool=True,
   omega:float=0.0, zeta:float=1.0, omega_1:float=0.0, freq=FREQ):
   assert order in [1, 2, 3]
   if order == 1:
-    return build_1st_filter(omega, lp, freq)
+    return design_1st_filter(omega, lp, freq)
   elif order == 2:
-    return build_2nd_filter(omega, zeta, lp, freq)
+    return design_2nd_filter(omega, zeta, lp, freq)
   else:
-    return build_3rd_filter(omega, zeta, omega_1, lp, freq)
+    return design_3rd_filter(omega, zeta, omega_1, lp, freq)
 
+
+def build_filter(*, freq=FREQ, **filter_config):
+  return RealtimeFilter(*design_filter(freq=freq, **filter_config))
+
+
+class FilterBank():
+  """Many independent IIR filters advanced together in one vectorized step.
+
+  `b` and `a` have shape (..., n). Filters of lower order are zero-padded up
+  to n coefficients, which leaves their response unchanged.
+  """
+
+  def __init__(self, b, a):
+    assert b.shape == a.shape
+    self.b = b
+    self.a = a
+    self.reset()
+
+  @staticmethod
+  def from_configs(configs, freq=FREQ, n=MAX_ORDER + 1):
+    """Builds a bank from a nested list of filter configs, e.g. shape (K, M)."""
+    configs = np.array(configs, dtype=object)
+    b = np.zeros(configs.shape + (n,))
+    a = np.zeros(configs.shape + (n,))
+    for index, filter_config in np.ndenumerate(configs):
+      fb, fa = design_filter(freq=freq, **filter_config)
+      b[index][:len(fb)] = fb
+      a[index][:len(fa)] = fa
+    return FilterBank(b, a)
+
+  def reset(self):
+    self.input = np.zeros(self.b.shape)
+    self.output = np.zeros(self.b.shape)
+
+  def apply(self, v):
+    # input[..., i] holds x[t - i], output[..., i] holds y[t - i]
+    self.input[..., 1:] = self.input[..., :-1]
+    self.input[..., 0] = v
+    self.output[..., 1:] = self.output[..., :-1]
+    output = (self.b * self.input).sum(axis=-1) - (self.a[..., 1:] * self.output[..., 1:]).sum(axis=-1)
+    self.output[..., 0] = output
+    return output
+
+  def get_state(self):
+    return (np.copy(self.input), np.copy(self.output))
+
+  def set_state(self, state):
+    self.input[...] = state[0]
+    self.output[...] = state[1]
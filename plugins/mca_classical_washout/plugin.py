@@ -1,23 +1,37 @@
 import asyncio
+import copy
 import ipaddress
 import collections
+import json
 import logging
 import math
 import numpy
 import scipy.constants
 import time
 
-from sanic import response
 from hexi.plugin.MCAPlugin import MCAPlugin
 from hexi.service import event
-from plugins.mca_classical_washout import dfilter
+from plugins.mca_classical_washout import quantile
+from plugins.mca_classical_washout import washout
 
 _logger = logging.getLogger(__name__)
 
-VECTOR_G = numpy.array([[0, 0, scipy.constants.g]]).T
-MAX_MOVE_ACCELERATION = 1                 # in meters
-MAX_ROTATE_VELOCITY = numpy.deg2rad(10)   # in degree
-MAX_TILT_ACCELERATION = math.sin(numpy.deg2rad(10)) * scipy.constants.g
+# the parts of config['scale'] describing the curves, see washout.make_scaling
+SCALING_KEYS = ('type', 'x_max', 'points', 'lut_size')
+AXES = ['x', 'y', 'z', 'alpha', 'beta', 'gamma']
+# seconds between updates of the automatic x_max
+AUTO_UPDATE_PERIOD = 1
+# the automatic x_max stays within these ratios of the configured one, so a
+# quiet session does not amplify noise to the platform limits
+AUTO_MIN_RATIO = 0.25
+AUTO_MAX_RATIO = 4
+# relative change of an automatic x_max needed to rebuild the scaling
+AUTO_HYSTERESIS = 0.05
+
+
+def _x_max_array(scale_config):
+  x_max = scale_config.get('x_max') or washout.DEFAULT_SCALE_X_MAX
+  return numpy.array([numpy.inf if value == None else value for value in x_max], dtype=float)
 
 
 class PluginMCAClassicalWashout(MCAPlugin):
@@ -25,105 +39,101 @@ class PluginMCAClassicalWashout(MCAPlugin):
   def __init__(self):
     super().__init__()
     self.configurable = True
+    self.washout = None
+    self.estimator = None
     self.config_default = {
       'freq': 20,
-      'scale': {
-        'type': 'third-order',  # ['third-order', 'linear']
-        'src_max': {
-          'x': 0,
-          'y': 0,
-          'z': 0,
-          'alpha': 0,
-          'beta': 0,
-          'gamma': 0,
-        },  # 在运行时根据数据调整最大值
-      },
-      'filter': {
-        'tilt': {
-          'x': {
-            'order': 2,
-            'lp': True,
-            'zeta': 1.0,
-            'omega': 5.0,
-          },
-          'y': {
-            'order': 2,
-            'lp': True,
-            'zeta': 1.0,
-            'omega': 8.0,
-          },
-        },
-        'movement': {
-          'x': {
-            'order': 3,
-            'lp': False,
-            'zeta': 1.0,
-            'omega': 2.5,
-            'omega_1': 0.25,
-          },
-          'y': {
-            'order': 3,
-            'lp': False,
-            'zeta': 1.0,
-            'omega': 4.0,
-            'omega_1': 0.4,
-          },
-          'z': {
-            'order': 3,
-            'lp': False,
-            'zeta': 1.0,
-            'omega': 4.0,
-            'omega_1': 0.4,
-          },
+      # 每个座椅可覆盖部分滤波器参数，如 [{}, {'filter': {'tilt': {'x': {'omega': 6.0}}}}]
+      'seats': [{}],
+      'scale': dict(
+        copy.deepcopy(washout.PLUGIN_SCALE_CONFIG),
+        # 由输入绝对值的分位数自动调整 x_max，见 quantile
+        auto={
+          'enabled': False,
+          'quantile': 0.99,
+          'half_life': 600,  # 秒，旧数据权重减半的时间，None 为不遗忘
+          'warmup': 30,      # 秒，之前不调整
         },
-        'rotate': {
-          'alpha': {
-            'order': 1,
-            'lp': False,
-            'omega': 1.0,
-          },
-          'beta': {
-            'order': 1,
-            'lp': False,
-            'omega': 1.0,
-          },
-          'gamma': {
-            'order': 2,
-            'lp': False,
-            'zeta': 1.0,
-            'omega': 1.0,
-          },
-        },
-      },
+      ),
+      'filter': copy.deepcopy(washout.DEFAULT_FILTER_CONFIG),
     }
 
+  def get_seat_filter_configs(self):
+    return [washout.merge_config(self.config['filter'], seat.get('filter', {}))
+            for seat in self.config.get('seats', [{}])]
+
+  def get_seat_count(self):
+    return len(self.config.get('seats', [{}]))
+
+  def get_scale_config(self):
+    return { key: self.config['scale'][key] for key in SCALING_KEYS if key in self.config['scale'] }
+
+  def rebuild_estimator(self):
+    auto = self.config['scale']['auto']
+    half_life = auto.get('half_life')
+    forgetting = 1.0 if half_life == None else 0.5 ** (1 / (half_life * self.config['freq']))
+    self.estimator = quantile.TDigest(6, forgetting=forgetting)
+
+  def get_src_max(self):
+    """The estimated quantile of each input axis, of specific force and angular velocity."""
+    if self.estimator.count == 0:
+      return { key: 0 for key in AXES }
+    values = self.estimator.quantile(self.config['scale']['auto']['quantile'])
+    return { key: float(values[index]) for index, key in enumerate(AXES) }
+
   def rebuild_filters(self):
-    self.filters = {}
-    for kind, dimensions in self.config['filter'].items():
-      self.filters[kind] = {}
-      for d, filter_config in dimensions.items():
-        self.filters[kind][d] = dfilter.build_filter(**filter_config)
+    if self.washout == None:
+      self.washout = washout.Washout(self.get_seat_filter_configs(), self.config['freq'],
+                                     self.get_scale_config())
+    else:
+      self.washout.set_filters(self.get_seat_filter_configs())
 
   def load(self):
     super().load()
 
     self.rebuild_filters()
+    self.rebuild_estimator()
     self.reset()
 
+  def load_web(self):
+    super().load_web()
+    from sanic import response
+
     @self.bp.route('/api/config/scale', methods=['GET'])
     async def get_scale_config(request):
-      return response.json({ 'code': 200, 'data': self.config['scale'] })
+      return response.json({ 'code': 200, 'data': dict(self.config['scale'],
+                                                       src_max=self.get_src_max(),
+                                                       applied=self.washout.scale_config) })
 
     @self.bp.route('/api/config/scale', methods=['POST'])
     async def set_scale_config(request):
       try:
-        self.config['scale']['type'] = request.json['type']
-        # TODO: save config
+        scale_config = dict(self.get_scale_config(),
+                            **{ key: request.json[key] for key in SCALING_KEYS if key in request.json })
+        auto = dict(self.config['scale']['auto'], **request.json.get('auto', {}))
+        if not 0 < auto['quantile'] < 1:
+          raise ValueError('quantile must be within (0, 1)')
+        if auto['half_life'] != None and auto['half_life'] <= 0:
+          raise ValueError('half_life must be positive')
+        # raises on an invalid curve before anything is changed
+        self.washout.set_scaling(scale_config)
+        self.config['scale'].update(scale_config)
+        forget_changed = auto['half_life'] != self.config['scale']['auto']['half_life']
+        self.config['scale']['auto'] = auto
+        if forget_changed:
+          self.rebuild_estimator()
+        self.save_config()
         return response.json({ 'code': 200 })
       except Exception as e:
         _logger.exception('Save config failed')
         return response.json({ 'code': 400, 'reason': str(e) })
 
+    @self.bp.route('/api/config/scale/reset', methods=['POST'])
+    async def reset_scale_range(request):
+      self.rebuild_estimator()
+      self.washout.set_scaling(self.get_scale_config())
+      return response.json({ 'code': 200 })
+
     @self.bp.route('/api/config/filter', methods=['GET'])
     async def get_scale_config(request):
       return response.json({ 'code': 200, 'data': self.config['filter'] })
@@ -140,180 +150,72 @@ class PluginMCAClassicalWashout(MCAPlugin):
         return response.json({ 'code': 400, 'reason': str(e) })
 
   def _update_scale(self, data):
-    scales = self.config['scale']['src_max']
-    for index, key in enumerate(['x', 'y', 'z', 'alpha', 'beta', 'gamma']):
-      value = abs(data[index])
-      if value > scales[key]:
-        scales[key] = value
-
-  def apply_movement_filter(self, a_i):
-    filters = self.filters['movement']
-    return numpy.array([[
-        filters['x'].apply(a_i[0][0]),
-        filters['y'].apply(a_i[1][0]),
-        filters['z'].apply(a_i[2][0]),
-      ]]).T
-
-  def apply_tilt_filter(self, f_s):
-    filters = self.filters['tilt']
-    return numpy.array([[
-        filters['x'].apply(f_s[0][0]),
-        filters['y'].apply(f_s[1][0]),
-        0,
-      ]]).T
-
-  def apply_rotate_filter(self, omega_s):
-    filters = self.filters['rotate']
-    return numpy.array([[
-        filters['alpha'].apply(omega_s[0][0]),
-        filters['beta'].apply(omega_s[1][0]),
-        filters['gamma'].apply(omega_s[2][0]),
-      ]]).T
-
-  def apply_scaling(self, x, max_x, max_y):
-    if max_x == 0:
-      return 0
-    sign = numpy.sign(x)
-    if abs(x) > max_x:
-      return sign * max_y
-    else:
-      return (max_y / max_x) * x
-
-  def apply_movement_scaling(self, vector):
-    # TODO: fix me. currently using a fixed max_x
-    ret = numpy.copy(vector)
-    scale_opt = self.config['scale']['src_max']
-    ret[0][0] = self.apply_scaling(vector[0][0], 3, MAX_MOVE_ACCELERATION)
-    ret[1][0] = self.apply_scaling(vector[1][0], 3, MAX_MOVE_ACCELERATION)
-    #ret[2][0] = self.apply_scaling(vector[2][0], scale_opt['z'], MAX_MOVE_ACCELERATION)
-    return ret
-
-  def apply_rotate_scaling(self, vector):
-    # TODO: fix me. currently using a fixed max_x
-    ret = numpy.copy(vector)
-    scale_opt = self.config['scale']['src_max']
-    ret[0][0] = self.apply_scaling(vector[0][0], 2, MAX_ROTATE_VELOCITY)
-    ret[1][0] = self.apply_scaling(vector[1][0], 2, MAX_ROTATE_VELOCITY)
-    ret[2][0] = self.apply_scaling(vector[2][0], 2, MAX_ROTATE_VELOCITY)
-    return ret
-
-  def apply_tilt_scaling(self, scalar):
-    return scalar * (MAX_TILT_ACCELERATION / MAX_MOVE_ACCELERATION)
-    """
-    sign = numpy.sign(scalar)
-    if abs(scalar) > MAX_TILT_ACCELERATION:
-      return sign * MAX_TILT_ACCELERATION
-    else:
-      return scalar
-    """
+    """Feeds the quantile estimator, and the scaling with its estimate if `auto` is enabled."""
+    self.estimator.add(numpy.abs(data - washout.VECTOR_G6))
+    auto = self.config['scale']['auto']
+    if not auto['enabled']:
+      return
+    samples = self.estimator.count
+    freq = self.config['freq']
+    if samples < auto['warmup'] * freq or samples % (AUTO_UPDATE_PERIOD * freq) != 0:
+      return
+    base = self.get_scale_config()
+    x_max = _x_max_array(base)
+    bounded = numpy.isfinite(x_max)
+    estimate = numpy.clip(self.estimator.quantile(auto['quantile'])[bounded],
+                          x_max[bounded] * AUTO_MIN_RATIO, x_max[bounded] * AUTO_MAX_RATIO)
+    applied = _x_max_array(self.washout.scale_config)[bounded]
+    if numpy.all(numpy.abs(estimate - applied) <= AUTO_HYSTERESIS * applied):
+      return
+    x_max[bounded] = estimate
+    self.washout.set_scaling(dict(base, x_max=[float(value) if numpy.isfinite(value) else None for value in x_max]))
 
   def reset(self):
-    global ig_disp_1, ig_disp_2, ig_rot_1, ps, po
-    ig_disp_1 = numpy.array([[0, 0, 0]]).T  # 位移运动一次积分
-    ig_disp_2 = numpy.array([[0, 0, 0]]).T  # 位移运动二次积分
-    ig_rot_1 = numpy.array([[0, 0, 0]]).T   # 旋转运动一次积分
-    ps = numpy.array([[0, 0, 0]]).T         # 平台位置（ps = ig_disp_2）
-    po = numpy.array([[0, 0, 0]]).T         # 平台旋转角度
+    # 重置积分器与滤波器内部状态
+    self.washout.reset()
 
-    # 重置滤波器内部状态
-    for kind, dimensions in self.config['filter'].items():
-      for d, filter_config in dimensions.items():
-        self.filters[kind][d].reset()
+  def _broadcast_inputs(self, data):
+    return numpy.broadcast_to(numpy.asarray(data, dtype=float).reshape(-1, 6), (self.washout.k, 6))
 
+  def _emit(self, inputs, outputs):
+    self.emit_mca_signal(inputs[0].tolist(), outputs[0].tolist())
+    if self.washout.k > 1:
+      self.emit_mca_seat_signals(inputs.tolist(), outputs.tolist())
 
   def handle_input_signal(self, data):
-    global ig_disp_1, ig_disp_2, ig_rot_1, ps, po
-
-    delta_time = 1 / self.config['freq']
-
-    # 更新缩放最大值
-    self._update_scale(data)
-
-    # 旋转矩阵
     """
-    r_x = numpy.array([
-      [1, 0, 0],
-      [0, math.cos(po[0][0]), math.sin(po[0][0])],
-      [0, -math.sin(po[0][0]), math.cos(po[0][0])],
-    ])
-    r_y = numpy.array([
-      [math.cos(po[1][0]), 0, -math.sin(po[1][0])],
-      [0, 1, 0],
-      [math.sin(po[1][0]), 0, math.cos(po[1][0])],
-    ])
-    r_z = numpy.array([
-      [math.cos(po[2][0]), math.sin(po[2][0]), 0],
-      [-math.sin(po[2][0]), math.cos(po[2][0]), 0],
-      [0, 0, 1],
-    ])
-    L = r_x.dot(r_y).dot(r_z)
+      data is either [x, y, z, alpha, beta, gamma] shared by all seats,
+      or a list of such signals, one per seat
     """
+    inputs = self._broadcast_inputs(data)
 
-    # 体坐标系下重力加速度
-    g_a = VECTOR_G
-
-    # 绝对线加速度
-    a_a = numpy.array([data[0:3]]).T
-
-    # 角速度
-    omega_a = numpy.array([data[3:6]]).T
-
-    # 比力
-    f_a = a_a - g_a
-
-    #####################
-
-    # 位移运动：缩放
-    f_s = self.apply_movement_scaling(f_a)
-
-    # 位移运动：变幻
-    f_i = f_s #L.dot(f_s)
-    a_i = f_i + VECTOR_G
-
-    # 位移运动：高通滤波
-    a_hp = self.apply_movement_filter(a_i)
-
-    # 位移运动：积分
-    ig_disp_1 = ig_disp_1 + delta_time * a_hp       # 第一次积分
-    ig_disp_2 = ig_disp_2 + delta_time * ig_disp_1  # 第二次积分
-    ps = numpy.copy(ig_disp_2)
-
-    #####################
-
-    # 倾斜协调：低通滤波
-    f_lp = self.apply_tilt_filter(f_s)
-
-    # 倾斜协调：计算（公式2.29）
-    theta_lp = numpy.array([[
-      math.asin(self.apply_tilt_scaling(f_lp[1][0]) / scipy.constants.g),
-      -math.asin(self.apply_tilt_scaling(f_lp[0][0]) / scipy.constants.g),
-      0
-    ]]).T
-
-    # 倾斜协调：限速
-    # TODO
-    theta_tc = theta_lp
-
-    #####################
-
-    # 旋转运动：缩放
-    omega_s = self.apply_rotate_scaling(omega_a)
-
-    # 旋转运动：高通滤波
-    omega_hp = self.apply_rotate_filter(omega_s)
-
-    # 旋转运动：积分
-    ig_rot_1 = ig_rot_1 + delta_time * omega_hp    # 一次积分
-
-    #####################
-
-    po = ig_rot_1 + theta_tc
-
-    self.emit_mca_signal(data, [
-      ps[0][0],
-      ps[1][0],
-      ps[2][0],
-      po[0][0],
-      po[1][0],
-      po[2][0],
-    ])
+    # 更新缩放最大值
+    self._update_scale(inputs[0])
+
+    self._emit(inputs, self.washout.step(inputs))
+
+  def script_entry_state(self):
+    key = (self.config['freq'],
+           json.dumps([self.washout.filter_configs, self.washout.scale_config], sort_keys=True),
+           self.washout.state.digest())
+    return key, (self.washout.filter_configs, self.washout.scale_config, self.washout.snapshot())
+
+  def precompute_script(self, samples, snapshot):
+    filter_configs, scale_config, entry = snapshot
+    scratch = washout.Washout(filter_configs, self.config['freq'], scale_config)
+    scratch.restore(entry)
+    outputs = scratch.run(samples)
+    return { 'samples': samples, 'outputs': outputs, 'entry': entry, 'exit': scratch.snapshot() }
+
+  def handle_precomputed_signal(self, data, result, index):
+    inputs = self._broadcast_inputs(data)
+    self._update_scale(inputs[0])
+    self._emit(inputs, result['outputs'][index])
+
+  def finish_script(self, result, played):
+    if played >= len(result['samples']):
+      self.washout.restore(result['exit'])
+    else:
+      # interrupted, replay the played part from the entry state
+      self.washout.restore(result['entry'])
+      self.washout.run(result['samples'][:played])
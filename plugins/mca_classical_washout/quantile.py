@@ -0,0 +1,96 @@
+"""Streaming quantile estimation in bounded memory.
+
+`TDigest` is a merging t-digest (Dunning, 2019) for several columns at once.
+Samples are buffered, and a full buffer is merged with the centroids of each
+column: all sorted by value and grouped by the integer part of the k1 scale
+`k(q) = compression / (2 pi) * asin(2 q - 1)` of their rank q, each group
+becoming one centroid. Groups are narrow in the tails, so high quantiles are
+precise, and a lone spike stays a light centroid of its own, which moves
+them by a fraction of a centroid at most. A column keeps about
+`compression / 2` centroids whatever the number of samples.
+
+With `forgetting` below 1, the weight of every sample decays by that factor
+per later sample, so the estimate follows about the last
+`1 / (1 - forgetting)` samples and old outliers fade out.
+
+P² (Jain and Chlamtac) needs less memory but is not used: its markers are
+interpolated from their neighbours, and one large sample in the first few
+thousand inflates a 0.99 quantile many times.
+"""
+
+import math
+
+import numpy
+
+
+class TDigest():
+  def __init__(self, columns, compression=100, forgetting=1.0):
+    if compression < 10:
+      raise ValueError('Compression must be at least 10')
+    if not 0 < forgetting <= 1:
+      raise ValueError('Forgetting factor must be within (0, 1]')
+    self.columns = columns
+    self.compression = compression
+    self.forgetting = forgetting
+    self.buffer = numpy.zeros((compression, columns))
+    # weight of the buffered samples when merged, the oldest first
+    self.ages = forgetting ** numpy.arange(compression - 1, -1, -1, dtype=float)
+    self.reset()
+
+  def reset(self):
+    self.count = 0
+    self.buffered = 0
+    # one array of centroid means and one of weights per column
+    self.means = [numpy.zeros(0)] * self.columns
+    self.weights = [numpy.zeros(0)] * self.columns
+
+  def add(self, x):
+    """Adds one sample of every column."""
+    self.buffer[self.buffered] = x
+    self.buffered = self.buffered + 1
+    self.count = self.count + 1
+    if self.buffered == self.compression:
+      self.merge()
+
+  def _k(self, q):
+    return self.compression / (2 * math.pi) * numpy.arcsin(2 * q - 1)
+
+  def merge(self):
+    if self.buffered == 0:
+      return
+    decay = self.forgetting ** self.buffered
+    ages = self.ages[self.compression - self.buffered:]
+    for column in range(self.columns):
+      means = numpy.concatenate((self.means[column], self.buffer[:self.buffered, column]))
+      weights = numpy.concatenate((self.weights[column] * decay, ages))
+      order = numpy.argsort(means, kind='mergesort')
+      means = means[order]
+      weights = weights[order]
+      cumulative = numpy.cumsum(weights)
+      total = cumulative[-1]
+      groups = numpy.floor(self._k((cumulative - weights / 2) / total) - self._k(0)).astype(numpy.intp)
+      merged_weights = numpy.bincount(groups, weights=weights)
+      merged_sums = numpy.bincount(groups, weights=weights * means)
+      used = merged_weights > 0
+      self.weights[column] = merged_weights[used]
+      self.means[column] = merged_sums[used] / self.weights[column]
+    self.buffered = 0
+
+  def quantile(self, p):
+    """The estimated `p` quantile per column, None before the first sample."""
+    if self.count == 0:
+      return None
+    self.merge()
+    values = numpy.empty(self.columns)
+    for column in range(self.columns):
+      weights = self.weights[column]
+      cumulative = numpy.cumsum(weights)
+      values[column] = numpy.interp(p * cumulative[-1], cumulative - weights / 2, self.means[column])
+    return values
+
+  def get_stats(self):
+    return {
+      'samples': self.count,
+      'centroids': [len(means) for means in self.means],
+      'weight': float(numpy.sum(self.weights[0])) + self.buffered,
+    }
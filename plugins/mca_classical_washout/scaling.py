@@ -0,0 +1,120 @@
+"""Scaling curves of the washout input stage.
+
+A curve maps an input `x` of one axis to `sign(x) * y_max * shape(|x| / x_max)`,
+`shape` being one of:
+
+  linear: u, saturating at 1.
+  third-order: 1.5 u - 0.5 u^3, saturating at 1 with zero slope, so large
+    inputs are compressed smoothly instead of clipped.
+  tanh: tanh(u), a soft limit which only approaches 1.
+  piecewise: linear interpolation of user points `[[u, shape(u)], ...]`
+    starting at [0, 0], flat after the last point.
+
+All curves have the same shape for the six axes and differ by `x_max` and
+`y_max`, so they are evaluated for all axes, seats and samples of an array
+at once. An axis with an infinite `x_max` is passed through unchanged, the
+others need a positive `x_max` and a finite `y_max`.
+
+With `lut_size`, the shape is tabulated once and evaluated by linear
+interpolation in the table. This pays off for piecewise curves of many
+points, which otherwise take a binary search per value; the other shapes are
+cheaper to evaluate directly.
+"""
+
+import numpy
+
+CURVES = ('linear', 'third-order', 'tanh', 'piecewise')
+# tanh is tabulated up to this u, it is within 1e-3 of 1 beyond
+TANH_LUT_RANGE = 4
+
+
+def make_shape(kind, points=None):
+  """Returns the shape of a curve, a function of u >= 0."""
+  if kind == 'linear':
+    return lambda u: numpy.minimum(u, 1)
+  if kind == 'third-order':
+    def third_order(u):
+      u = numpy.minimum(u, 1)
+      return u * (1.5 - 0.5 * u * u)
+    return third_order
+  if kind == 'tanh':
+    return numpy.tanh
+  if kind == 'piecewise':
+    points = numpy.asarray(points, dtype=float)
+    if points.ndim != 2 or points.shape[1] != 2 or len(points) < 2:
+      raise ValueError('Piecewise scaling needs at least two [u, y] points')
+    if points[0, 0] != 0 or points[0, 1] != 0:
+      raise ValueError('Piecewise scaling must start at [0, 0]')
+    if numpy.any(numpy.diff(points[:, 0]) <= 0):
+      raise ValueError('Piecewise scaling points must be in increasing u')
+    return lambda u: numpy.interp(u, points[:, 0], points[:, 1])
+  raise ValueError('Unknown scaling type {0}, expected one of {1}'.format(kind, ', '.join(CURVES)))
+
+
+class LookupTable():
+  """A shape tabulated on [0, u_max], constant beyond."""
+
+  def __init__(self, shape, u_max, size):
+    self.scale = (size - 1) / u_max
+    self.table = shape(numpy.linspace(0, u_max, size))
+    # slope to the next entry, 0 after the last one
+    self.slopes = numpy.append(numpy.diff(self.table), 0)
+    self.last = size - 1
+
+  def __call__(self, u):
+    position = numpy.minimum(u * self.scale, self.last)
+    index = position.astype(numpy.intp)
+    position -= index
+    return self.table.take(index) + position * self.slopes.take(index)
+
+
+class Scaling():
+  """Curves for the six axes [x, y, z, alpha, beta, gamma]."""
+
+  def __init__(self, kind, x_max, y_max, points=None, lut_size=0):
+    """
+      x_max, y_max: 6 values each, an infinite x_max passes the axis through.
+      points: for `piecewise`, see the module doc.
+      lut_size: entries of a lookup table for the shape, 0 to evaluate it directly.
+    """
+    self.kind = kind
+    x_max = numpy.asarray(x_max, dtype=float)
+    y_max = numpy.asarray(y_max, dtype=float)
+    if x_max.shape != (6,) or y_max.shape != (6,):
+      raise ValueError('x_max and y_max need 6 values')
+    if numpy.any(numpy.isnan(x_max) | (x_max <= 0)):
+      raise ValueError('x_max must be positive')
+    self.axes = numpy.flatnonzero(numpy.isfinite(x_max))
+    if not numpy.all(numpy.isfinite(y_max[self.axes])):
+      raise ValueError('Axes {0} have no platform limit, their x_max must be None'.format(
+        ', '.join(str(axis) for axis in self.axes if not numpy.isfinite(y_max[axis]))))
+    self.inv_x_max = 1 / x_max[self.axes]
+    self.y_max = y_max[self.axes]
+    self.shape = make_shape(kind, points)
+    if lut_size > 0:
+      if kind == 'tanh':
+        u_max = TANH_LUT_RANGE
+      elif kind == 'piecewise':
+        u_max = float(numpy.asarray(points, dtype=float)[-1, 0])
+      else:
+        u_max = 1
+      self.shape = LookupTable(self.shape, u_max, lut_size)
+
+  @classmethod
+  def from_config(cls, config, y_max, default_x_max):
+    """
+      config: like `{'type': 'third-order', 'x_max': [3, 3, None, 2, 2, 2]}`,
+        None meaning unbounded, with optional `points` and `lut_size`.
+    """
+    x_max = config.get('x_max') or default_x_max
+    x_max = [numpy.inf if value == None else value for value in x_max]
+    return cls(config.get('type', 'linear'), x_max, y_max,
+               config.get('points'), config.get('lut_size', 0))
+
+  def apply(self, x):
+    """Scales an array of shape (..., 6), a single signal or whole batches."""
+    x = numpy.asarray(x, dtype=float)
+    out = numpy.array(x)
+    scaled = x[..., self.axes]
+    out[..., self.axes] = numpy.sign(scaled) * self.y_max * self.shape(numpy.abs(scaled) * self.inv_x_max)
+    return out
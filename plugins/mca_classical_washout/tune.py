@@ -0,0 +1,328 @@
+"""Offline parameter sweep and auto-tuning for the classical washout.
+
+Recorded trajectories are replayed through the washout for every candidate
+filter config, in parallel on a process pool. Candidates are scored by cue
+fidelity against workspace usage. Results are cached per parameter hash so
+re-runs only evaluate new candidates.
+
+Usage (in the project's root directory):
+
+  python3 -m plugins.mca_classical_washout.tune \\
+    --trajectory plugins/input_flight_attitude/attitudes/*.json \\
+    --spec spec.json --output tuned/
+
+A spec is a JSON object with an optional `base` filter config, optional
+`scale` config (the plugin's `config['scale']` without `auto`, by default the
+plugin's default scaling), optional `weights` and `limits`, and one search
+strategy, where parameters are
+addressed as `kind.axis.name`, e.g. `movement.x.omega`:
+
+  {"grid": {"movement.x.omega": [1.5, 2.5, 3.5], "tilt.x.omega": [4, 5, 6]}}
+  {"random": {"movement.x.omega": [1.0, 4.0]}, "samples": 64, "seed": 0}
+  {"coordinate": ["movement.x.omega", "tilt.x.omega"], "rounds": 5, "step": 0.3}
+"""
+
+import argparse
+import collections
+import concurrent.futures
+import copy
+import csv
+import glob
+import hashlib
+import itertools
+import json
+import logging
+import os
+import random
+import numpy
+
+from plugins.mca_classical_washout import dfilter
+from plugins.mca_classical_washout import washout
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_WEIGHTS = {
+  'fidelity': 1.0,
+  'workspace': 0.5,
+  'violation': 10.0,
+}
+
+DEFAULT_LIMITS = {
+  'position': 0.1,    # in meters
+  'angle': 15,        # in degree
+}
+
+# Number of candidates a worker advances together as washout seats
+BATCH_SIZE = 16
+
+
+def load_trajectory(path):
+  """Loads a trajectory as an array of shape (T, 6).
+
+  Accepts flight attitude files (`{"attitudes": [[t, x, y, z, alpha, beta, gamma], ...]}`),
+  plain JSON lists of such rows, and CSV files with the same columns.
+  """
+  if path.endswith('.csv'):
+    with open(path, 'r') as fd:
+      rows = [[float(v) for v in row] for row in csv.reader(fd) if row and not row[0].startswith('#')]
+  else:
+    with open(path, 'r') as fd:
+      data = json.loads(fd.read())
+    rows = data['attitudes'] if isinstance(data, dict) else data
+  return numpy.array(rows, dtype=float)[:, 1:7]
+
+
+def set_param(filter_config, path, value):
+  kind, axis, name = path.split('.')
+  filter_config[kind][axis][name] = value
+
+
+def get_param(filter_config, path):
+  kind, axis, name = path.split('.')
+  return filter_config[kind][axis][name]
+
+
+def config_hash(filter_config, scale_config, freq, weights, limits, trajectories_digest):
+  key = json.dumps([filter_config, scale_config, freq, weights, limits, trajectories_digest], sort_keys=True)
+  return hashlib.sha1(key.encode()).hexdigest()
+
+
+def digest_trajectories(trajectories):
+  h = hashlib.sha1()
+  for trajectory in trajectories:
+    h.update(numpy.ascontiguousarray(trajectory).tobytes())
+  return h.hexdigest()
+
+
+def score(inputs, outputs, freq, weights, limits):
+  """Scores the washout output of a single seat.
+
+  Fidelity is the normalized RMS error between the input specific force and
+  angular velocity and the cues the platform produces (translation plus
+  tilt-coordinated gravity). Workspace is the peak fraction of the position
+  and angle limits in use; exceeding a limit adds a violation penalty.
+  """
+  dt = 1 / freq
+  ps = outputs[:, 0:3]
+  po = outputs[:, 3:6]
+  a_platform = numpy.gradient(numpy.gradient(ps, dt, axis=0), dt, axis=0)
+  f_cue = numpy.copy(a_platform)
+  f_cue[:, 0] = f_cue[:, 0] - washout.G * numpy.sin(po[:, 1])
+  f_cue[:, 1] = f_cue[:, 1] + washout.G * numpy.sin(po[:, 0])
+  omega_cue = numpy.gradient(po, dt, axis=0)
+  reference = inputs
+  cue = numpy.concatenate([f_cue, omega_cue], axis=1)
+  scale = numpy.sqrt(numpy.mean(reference ** 2, axis=0)) + 1e-6
+  fidelity = float(numpy.mean(numpy.sqrt(numpy.mean((cue - reference) ** 2, axis=0)) / scale))
+
+  position_usage = float(numpy.max(numpy.abs(ps))) / limits['position']
+  angle_usage = float(numpy.max(numpy.abs(po))) / numpy.deg2rad(limits['angle'])
+  workspace = max(position_usage, angle_usage)
+  violation = max(0.0, workspace - 1)
+
+  cost = (weights['fidelity'] * fidelity
+          + weights['workspace'] * workspace
+          + weights['violation'] * violation)
+  return {
+    'cost': cost,
+    'fidelity': fidelity,
+    'workspace': workspace,
+    'position_usage': position_usage,
+    'angle_usage': angle_usage,
+  }
+
+
+def evaluate_batch(filter_configs, scale_config, trajectories, freq, weights, limits):
+  """Runs in a worker process. Returns one metrics dict per filter config."""
+  totals = [None] * len(filter_configs)
+  for trajectory in trajectories:
+    w = washout.Washout(filter_configs, freq, scale_config)
+    outputs = w.run(trajectory)
+    for k in range(len(filter_configs)):
+      metrics = score(trajectory, outputs[:, k], freq, weights, limits)
+      if totals[k] == None:
+        totals[k] = metrics
+      else:
+        # worst trajectory counts for workspace, fidelity is averaged
+        totals[k] = {
+          'cost': totals[k]['cost'] + metrics['cost'],
+          'fidelity': totals[k]['fidelity'] + metrics['fidelity'],
+          'workspace': max(totals[k]['workspace'], metrics['workspace']),
+          'position_usage': max(totals[k]['position_usage'], metrics['position_usage']),
+          'angle_usage': max(totals[k]['angle_usage'], metrics['angle_usage']),
+        }
+  for metrics in totals:
+    metrics['cost'] = metrics['cost'] / len(trajectories)
+    metrics['fidelity'] = metrics['fidelity'] / len(trajectories)
+  return totals
+
+
+class ResultCache():
+  """One JSON file per parameter hash."""
+
+  def __init__(self, path):
+    self.path = path
+    if path != None:
+      os.makedirs(path, exist_ok=True)
+
+  def get(self, key):
+    if self.path == None:
+      return None
+    try:
+      with open(os.path.join(self.path, key + '.json'), 'r') as fd:
+        return json.loads(fd.read())
+    except (OSError, ValueError):
+      return None
+
+  def put(self, key, result):
+    if self.path == None:
+      return
+    with open(os.path.join(self.path, key + '.json'), 'w') as fd:
+      fd.write(json.dumps(result))
+
+
+class Tuner():
+  def __init__(self, trajectories, base_config, freq=dfilter.FREQ,
+               weights=None, limits=None, cache_path=None, workers=None,
+               scale_config=washout.PLUGIN_SCALE_CONFIG):
+    self.trajectories = trajectories
+    self.digest = digest_trajectories(trajectories)
+    self.base_config = base_config
+    self.scale_config = scale_config
+    self.freq = freq
+    self.weights = dict(DEFAULT_WEIGHTS, **(weights or {}))
+    self.limits = dict(DEFAULT_LIMITS, **(limits or {}))
+    self.cache = ResultCache(cache_path)
+    self.workers = workers
+    self.results = {}
+    self.cache_hits = 0
+
+  def make_config(self, params):
+    filter_config = copy.deepcopy(self.base_config)
+    for path, value in params.items():
+      set_param(filter_config, path, value)
+    return filter_config
+
+  def evaluate(self, executor, candidates):
+    """Evaluates a list of filter configs, returns results in the same order."""
+    keys = [config_hash(c, self.scale_config, self.freq, self.weights, self.limits, self.digest) for c in candidates]
+    pending = collections.OrderedDict()
+    for key, candidate in zip(keys, candidates):
+      if key in self.results or key in pending:
+        continue
+      cached = self.cache.get(key)
+      if cached != None:
+        self.cache_hits = self.cache_hits + 1
+        self.results[key] = cached
+      else:
+        pending[key] = candidate
+    pending = list(pending.items())
+
+    futures = {}
+    for i in range(0, len(pending), BATCH_SIZE):
+      batch = pending[i:i + BATCH_SIZE]
+      future = executor.submit(evaluate_batch, [c for _, c in batch], self.scale_config,
+                               self.trajectories, self.freq, self.weights, self.limits)
+      futures[future] = batch
+    for future in concurrent.futures.as_completed(futures):
+      for (key, candidate), metrics in zip(futures[future], future.result()):
+        result = dict(metrics, filter=candidate)
+        self.results[key] = result
+        self.cache.put(key, result)
+    _logger.info('Evaluated {0} candidates ({1} new)'.format(len(candidates), len(pending)))
+    return [self.results[key] for key in keys]
+
+  def run(self, spec):
+    with concurrent.futures.ProcessPoolExecutor(max_workers=self.workers) as executor:
+      if 'grid' in spec:
+        paths = list(spec['grid'].keys())
+        candidates = [self.make_config(dict(zip(paths, values)))
+                      for values in itertools.product(*spec['grid'].values())]
+        self.evaluate(executor, candidates)
+      elif 'random' in spec:
+        rnd = random.Random(spec.get('seed', 0))
+        candidates = [self.make_config({
+            path: rnd.uniform(low, high) for path, (low, high) in spec['random'].items()})
+          for _ in range(spec.get('samples', 32))]
+        self.evaluate(executor, candidates)
+      elif 'coordinate' in spec:
+        self.run_coordinate(executor, spec)
+      else:
+        raise ValueError('Spec must contain one of `grid`, `random` or `coordinate`')
+    return self.ranked()
+
+  def run_coordinate(self, executor, spec):
+    """Pattern search: every round tries each parameter scaled by (1 +- step)
+    in parallel, moves to the best candidate and shrinks the step when no
+    candidate improves."""
+    paths = spec['coordinate']
+    step = spec.get('step', 0.3)
+    best = self.evaluate(executor, [self.base_config])[0]
+    for i in range(spec.get('rounds', 5)):
+      candidates = []
+      for path in paths:
+        for factor in (1 - step, 1 + step):
+          candidate = copy.deepcopy(best['filter'])
+          set_param(candidate, path, get_param(best['filter'], path) * factor)
+          candidates.append(candidate)
+      round_best = min(self.evaluate(executor, candidates), key=lambda r: r['cost'])
+      if round_best['cost'] < best['cost']:
+        best = round_best
+      else:
+        step = step / 2
+      _logger.info('Round {0}: cost={1:.4f} step={2:.3f}'.format(i + 1, best['cost'], step))
+
+  def ranked(self):
+    return sorted(self.results.values(), key=lambda r: r['cost'])
+
+
+def write_results(results, output, top, freq, scale_config):
+  os.makedirs(output, exist_ok=True)
+  for rank, result in enumerate(results[:top], start=1):
+    path = os.path.join(output, 'rank_{0}.json'.format(rank))
+    with open(path, 'w') as fd:
+      # same layout as the plugin config, `filter` can be POSTed to /api/config/filter
+      # and `scale` to /api/config/scale
+      fd.write(json.dumps({'freq': freq, 'scale': scale_config, 'filter': result['filter']}, indent=2))
+    _logger.info('#{0} cost={1:.4f} fidelity={2:.4f} workspace={3:.3f} -> {4}'.format(
+      rank, result['cost'], result['fidelity'], result['workspace'], path))
+
+
+def main():
+  parser = argparse.ArgumentParser(description='Tune classical washout filter parameters offline.')
+  parser.add_argument('--trajectory', nargs='+', required=True, help='recorded trajectory files (.json or .csv)')
+  parser.add_argument('--spec', required=True, help='search spec (JSON file)')
+  parser.add_argument('--output', default='tuned', help='directory for the best configs')
+  parser.add_argument('--top', type=int, default=3, help='number of configs to write')
+  parser.add_argument('--cache', default='.washout_tune_cache', help='result cache directory')
+  parser.add_argument('--workers', type=int, default=None, help='worker processes')
+  parser.add_argument('--freq', type=float, default=dfilter.FREQ)
+  args = parser.parse_args()
+
+  logging.basicConfig(level=logging.INFO, format='%(asctime)s %(message)s')
+
+  files = sorted(set(itertools.chain.from_iterable(glob.glob(p) for p in args.trajectory)))
+  if len(files) == 0:
+    parser.error('no trajectory found')
+  trajectories = [load_trajectory(path) for path in files]
+  with open(args.spec, 'r') as fd:
+    spec = json.loads(fd.read())
+
+  tuner = Tuner(
+    trajectories,
+    spec.get('base', washout.DEFAULT_FILTER_CONFIG),
+    freq=args.freq,
+    weights=spec.get('weights'),
+    limits=spec.get('limits'),
+    cache_path=args.cache,
+    workers=args.workers,
+    scale_config=dict(washout.PLUGIN_SCALE_CONFIG, **spec.get('scale', {})))
+  _logger.info('Loaded {0} trajectories ({1} samples)'.format(
+    len(trajectories), sum(len(t) for t in trajectories)))
+  results = tuner.run(spec)
+  _logger.info('{0} results, {1} from cache'.format(len(results), tuner.cache_hits))
+  write_results(results, args.output, args.top, args.freq, tuner.scale_config)
+
+
+if __name__ == '__main__':
+  main()
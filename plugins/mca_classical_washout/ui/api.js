@@ -9,6 +9,9 @@ const API = {
       set(config) {
         return request.post('/plugins/mca_classical_washout/api/config/scale', config);
       },
+      resetRange() {
+        return request.post('/plugins/mca_classical_washout/api/config/scale/reset');
+      },
     },
   },
 };
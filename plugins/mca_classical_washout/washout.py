@@ -0,0 +1,319 @@
+import copy
+import hashlib
+import math
+import numpy
+import scipy.constants
+
+from plugins.mca_classical_washout import dfilter
+from plugins.mca_classical_washout import scaling
+
+G = scipy.constants.g
+VECTOR_G = numpy.array([0, 0, G])
+# subtracted from inputs [x, y, z, alpha, beta, gamma] for the specific force
+VECTOR_G6 = numpy.array([0, 0, G, 0, 0, 0])
+MAX_MOVE_ACCELERATION = 1                 # in meters
+MAX_ROTATE_VELOCITY = numpy.deg2rad(10)   # in degree
+MAX_HEAVE_ACCELERATION = 1                # in m/s^2, z when it is scaled
+MAX_TILT_ACCELERATION = math.sin(numpy.deg2rad(10)) * G
+# keys of a filter config which are not filter parameters
+NON_FILTER_KEYS = ('rate_limit',)
+
+# input reaching the platform limits, of specific force and angular velocity,
+# None is unbounded. See `scaling`
+DEFAULT_SCALE_X_MAX = [3, 3, None, 2, 2, 2]
+SCALE_Y_MAX = numpy.array([MAX_MOVE_ACCELERATION, MAX_MOVE_ACCELERATION, MAX_HEAVE_ACCELERATION] + [MAX_ROTATE_VELOCITY] * 3)
+DEFAULT_SCALE_CONFIG = {
+  'type': 'linear',
+  'x_max': DEFAULT_SCALE_X_MAX,
+}
+# the scaling of the plugin by default, also used by the offline tuner
+PLUGIN_SCALE_CONFIG = {
+  'type': 'third-order',  # ['linear', 'third-order', 'tanh', 'piecewise']
+  'x_max': DEFAULT_SCALE_X_MAX,  # 输入达到平台极限时的值，None 为不缩放
+  'points': None,  # piecewise: [[u, y], ...]，u = |x| / x_max，y 为平台极限的比例
+  'lut_size': 0,   # 查找表大小，0 为直接计算
+}
+
+DEFAULT_FILTER_CONFIG = {
+  'tilt': {
+    'x': {
+      'order': 2,
+      'lp': True,
+      'zeta': 1.0,
+      'omega': 5.0,
+      'rate_limit': 3.0,  # in degree per second, below the rotation threshold
+    },
+    'y': {
+      'order': 2,
+      'lp': True,
+      'zeta': 1.0,
+      'omega': 8.0,
+      'rate_limit': 3.0,
+    },
+  },
+  'movement': {
+    'x': {
+      'order': 3,
+      'lp': False,
+      'zeta': 1.0,
+      'omega': 2.5,
+      'omega_1': 0.25,
+    },
+    'y': {
+      'order': 3,
+      'lp': False,
+      'zeta': 1.0,
+      'omega': 4.0,
+      'omega_1': 0.4,
+    },
+    'z': {
+      'order': 3,
+      'lp': False,
+      'zeta': 1.0,
+      'omega': 4.0,
+      'omega_1': 0.4,
+    },
+  },
+  'rotate': {
+    'alpha': {
+      'order': 1,
+      'lp': False,
+      'omega': 1.0,
+    },
+    'beta': {
+      'order': 1,
+      'lp': False,
+      'omega': 1.0,
+    },
+    'gamma': {
+      'order': 2,
+      'lp': False,
+      'zeta': 1.0,
+      'omega': 1.0,
+    },
+  },
+}
+
+# Order of the filtered channels in the filter bank
+FILTER_CHANNELS = [
+  ('movement', 'x'), ('movement', 'y'), ('movement', 'z'),
+  ('tilt', 'x'), ('tilt', 'y'),
+  ('rotate', 'alpha'), ('rotate', 'beta'), ('rotate', 'gamma'),
+]
+
+
+def merge_config(base, override):
+  ret = copy.deepcopy(base)
+  for key, value in override.items():
+    if isinstance(value, dict) and isinstance(ret.get(key), dict):
+      ret[key] = merge_config(ret[key], value)
+    else:
+      ret[key] = copy.deepcopy(value)
+  return ret
+
+
+def filter_params(filter_config):
+  return { key: value for key, value in filter_config.items() if key not in NON_FILTER_KEYS }
+
+
+def body_to_inertial(angles, f, omega):
+  """Transforms platform frame vectors by the platform angles [alpha, beta, gamma].
+
+  Returns the specific force in the inertial frame, `L f`, and the Euler
+  angle rates of the angular velocity, `T omega`, for the roll-pitch-yaw
+  rotation. Every argument has shape (..., 3); the trig functions are
+  evaluated once and the rows of L and T written out, without building the
+  three elementary rotations.
+  """
+  sin = numpy.sin(angles)
+  cos = numpy.cos(angles)
+  s_a, s_b, s_g = sin[..., 0], sin[..., 1], sin[..., 2]
+  c_a, c_b, c_g = cos[..., 0], cos[..., 1], cos[..., 2]
+  f_x, f_y, f_z = f[..., 0], f[..., 1], f[..., 2]
+  o_x, o_y, o_z = omega[..., 0], omega[..., 1], omega[..., 2]
+
+  # f 在横滚、俯仰后的分量，再绕偏航旋转
+  f_y_a = c_a * f_y - s_a * f_z
+  f_z_a = s_a * f_y + c_a * f_z
+  f_x_b = c_b * f_x + s_b * f_z_a
+  f_i = numpy.empty(numpy.broadcast(f, angles).shape)
+  f_i[..., 0] = c_g * f_x_b - s_g * f_y_a
+  f_i[..., 1] = s_g * f_x_b + c_g * f_y_a
+  f_i[..., 2] = c_b * f_z_a - s_b * f_x
+
+  # 角速度转欧拉角速度
+  o_y_a = s_a * o_y + c_a * o_z
+  euler_rates = numpy.empty(numpy.broadcast(omega, angles).shape)
+  euler_rates[..., 0] = o_x + s_b / c_b * o_y_a
+  euler_rates[..., 1] = c_a * o_y - s_a * o_z
+  euler_rates[..., 2] = o_y_a / c_b
+  return f_i, euler_rates
+
+
+def make_scaling(scale_config):
+  return scaling.Scaling.from_config(scale_config, SCALE_Y_MAX, DEFAULT_SCALE_X_MAX)
+
+
+def digest_arrays(values, decimals=9):
+  """Hash of arrays rounded to `decimals`, so a state that has decayed to
+  rest always hashes the same."""
+  h = hashlib.sha1()
+  for value in values:
+    # adding 0.0 turns -0.0 into 0.0
+    h.update((numpy.round(value, decimals) + 0.0).tobytes())
+  return h.hexdigest()
+
+
+class WashoutState():
+  """Integrator and filter state of K seats, each row is a seat."""
+
+  def __init__(self, k, filters):
+    self.k = k
+    self.filters = filters
+    self.reset()
+
+  def reset(self):
+    self.ig_disp_1 = numpy.zeros((self.k, 3))   # 位移运动一次积分
+    self.ig_disp_2 = numpy.zeros((self.k, 3))   # 位移运动二次积分
+    self.ig_rot_1 = numpy.zeros((self.k, 3))    # 旋转运动一次积分
+    self.ps = numpy.zeros((self.k, 3))          # 平台位置（ps = ig_disp_2）
+    self.po = numpy.zeros((self.k, 3))          # 平台旋转角度
+    self.tilt = numpy.zeros((self.k, 2))        # 限速后的倾斜协调角度
+    self.filters.reset()
+
+  ARRAYS = ['ig_disp_1', 'ig_disp_2', 'ig_rot_1', 'ps', 'po', 'tilt']
+
+  def snapshot(self):
+    return ([numpy.copy(getattr(self, name)) for name in self.ARRAYS], self.filters.get_state())
+
+  def restore(self, snapshot):
+    arrays, filter_state = snapshot
+    for name, value in zip(self.ARRAYS, arrays):
+      setattr(self, name, numpy.copy(value))
+    self.filters.set_state(filter_state)
+
+  def digest(self):
+    arrays, filter_state = self.snapshot()
+    return digest_arrays(arrays + list(filter_state))
+
+
+class Washout():
+  """Classical washout for K independent seats.
+
+  Each seat has its own filter parameters. All seats advance in a single
+  vectorized step, so the cost per added seat is close to constant.
+  """
+
+  def __init__(self, filter_configs, freq=dfilter.FREQ, scale_config=DEFAULT_SCALE_CONFIG):
+    self.freq = freq
+    self.state = None
+    self.set_filters(filter_configs)
+    self.set_scaling(scale_config)
+
+  def set_scaling(self, scale_config):
+    """Replaces the input scaling, see `scaling.Scaling.from_config`."""
+    self.scaling = make_scaling(scale_config)
+    self.scale_config = scale_config
+
+  def set_filters(self, filter_configs):
+    """Rebuilds filters from a list of per-seat `config['filter']` dicts.
+
+    Filter history is cleared, integrators are kept if the seat count is unchanged.
+    """
+    self.filter_configs = filter_configs
+    filters = dfilter.FilterBank.from_configs([
+      [filter_params(filter_config[kind][d]) for kind, d in FILTER_CHANNELS]
+      for filter_config in filter_configs], freq=self.freq)
+    # largest tilt change per tick of each seat, roll from the lateral channel
+    self.tilt_step = numpy.deg2rad([
+      [filter_config['tilt'][d].get('rate_limit', numpy.inf) for d in ('y', 'x')]
+      for filter_config in filter_configs]) / self.freq
+    if self.state == None or self.state.k != len(filter_configs):
+      self.state = WashoutState(len(filter_configs), filters)
+    else:
+      self.state.filters = filters
+
+  @property
+  def k(self):
+    return self.state.k
+
+  def reset(self):
+    self.state.reset()
+
+  def snapshot(self):
+    """Copy of the integrator and filter state, see `restore`."""
+    return self.state.snapshot()
+
+  def restore(self, snapshot):
+    self.state.restore(snapshot)
+
+  def scale(self, inputs):
+    """Scaled specific force and angular velocity of inputs of shape (..., 6)."""
+    # 比力, 角速度：缩放
+    return self.scaling.apply(numpy.asarray(inputs, dtype=float) - VECTOR_G6)
+
+  def step(self, inputs):
+    """Advances all seats by one tick.
+
+    Args:
+      inputs: array of shape (K, 6) or (6,), rows are [x, y, z, alpha, beta, gamma].
+
+    Returns:
+      array of shape (K, 6), rows are [s_x, s_y, s_z, theta_alpha, theta_beta, theta_gamma].
+    """
+    return self._advance(numpy.broadcast_to(self.scale(inputs), (self.state.k, 6)))
+
+  def _advance(self, scaled):
+    s = self.state
+    delta_time = 1 / self.freq
+
+    f_s = scaled[:, 0:3]
+    omega_s = scaled[:, 3:6]
+
+    # 位移运动、旋转运动：变换到惯性系，用上一拍的平台角度
+    f_i, omega_i = body_to_inertial(s.po, f_s, omega_s)
+    a_i = f_i + VECTOR_G
+
+    # 高通滤波（位移、旋转）与低通滤波（倾斜协调）
+    filtered = s.filters.apply(numpy.concatenate([a_i, f_s[:, 0:2], omega_i], axis=1))
+    a_hp = filtered[:, 0:3]
+    f_lp = filtered[:, 3:5]
+    omega_hp = filtered[:, 5:8]
+
+    # 位移运动：积分
+    s.ig_disp_1 = s.ig_disp_1 + delta_time * a_hp
+    s.ig_disp_2 = s.ig_disp_2 + delta_time * s.ig_disp_1
+    s.ps = numpy.copy(s.ig_disp_2)
+
+    # 倾斜协调：计算（公式2.29）
+    tilt = numpy.clip(f_lp * (MAX_TILT_ACCELERATION / MAX_MOVE_ACCELERATION) / G, -1, 1)
+    theta_lp = numpy.arcsin(tilt[:, ::-1]) * [1, -1]
+
+    # 倾斜协调：限速
+    s.tilt = s.tilt + numpy.minimum(numpy.maximum(theta_lp - s.tilt, -self.tilt_step), self.tilt_step)
+
+    # 旋转运动：积分
+    s.ig_rot_1 = s.ig_rot_1 + delta_time * omega_hp
+
+    s.po = numpy.copy(s.ig_rot_1)
+    s.po[:, 0:2] += s.tilt
+
+    return numpy.concatenate([s.ps, s.po], axis=1)
+
+  def run(self, samples):
+    """Advances all seats through a whole trajectory.
+
+    Args:
+      samples: array of shape (T, K, 6) or (T, 6).
+
+    Returns:
+      array of shape (T, K, 6).
+    """
+    samples = numpy.asarray(samples, dtype=float)
+    # scaling has no state, the whole trajectory is scaled at once
+    scaled = self.scale(samples.reshape(len(samples), -1, 6))
+    scaled = numpy.broadcast_to(scaled, (len(samples), self.k, 6))
+    outputs = numpy.empty((len(samples), self.k, 6))
+    for t in range(len(samples)):
+      outputs[t] = self._advance(scaled[t])
+    return outputs
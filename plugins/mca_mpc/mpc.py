@@ -0,0 +1,587 @@
+"""Model-predictive motion cueing.
+
+The platform is split into four decoupled channels:
+
+  x:   surge + pitch (tilt coordination), perceived f_x = a_x - g * beta
+  y:   sway + roll (tilt coordination),   perceived f_y = a_y + g * alpha
+  z:   heave
+  yaw: yaw
+
+Each channel carries the platform states, a vestibular model of the pilot on
+the platform and the same vestibular model driven by the vehicle reference.
+The cost penalizes the difference of what is perceived in both, the inputs
+and the distance from neutral, subject to input and workspace bounds.
+
+The condensed QP of every channel is built once per parameter set and cached.
+Each tick only evaluates a few precomputed gain matrices and runs a
+warm-started ADMM solve against a deadline.
+"""
+
+import copy
+import functools
+import hashlib
+import json
+import time
+import numpy
+import scipy.constants
+import scipy.linalg
+
+G = scipy.constants.g
+
+DEFAULT_CONFIG = {
+  'freq': 20,
+  'horizon': 20,            # steps
+  'deadline_ms': 4,         # per tick, for all channels
+  'max_iter': 200,
+  'vestibular': {
+    'otolith_tau': 0.3,     # in seconds, first-order otolith model
+    'canal_tau': 5.7,       # in seconds, high-pass semicircular canal model
+  },
+  'scale': {
+    'movement': 0.5,
+    'rotate': 0.5,
+  },
+  'weights': {
+    'force': 1.0,           # perceived specific force error
+    'rotate': 10.0,         # perceived angular velocity error
+    'input_accel': 0.01,
+    'input_rate': 0.1,
+    'position': 1.0,        # pull back to neutral
+    'velocity': 0.5,
+    'angle': 0.5,
+  },
+  'limits': {
+    'position': 0.1,        # in meters
+    'velocity': 0.5,        # in m/s
+    'terminal_velocity': 0.02,  # in m/s, at the end of the horizon
+    'angle': 15,            # in degree
+    'accel': 3.0,           # in m/s^2
+    'rate': 10,             # in degree/s, also limits tilt rate
+  },
+}
+
+CHANNELS = ['x', 'y', 'z', 'yaw']
+# in rad/s, critically damped return to neutral once no feasible plan is left
+NEUTRAL_OMEGA = 1.0
+
+# (translation, rotation, sign of g * angle in perceived force)
+CHANNEL_KINDS = {
+  'x': (True, True, -1),
+  'y': (True, True, 1),
+  'z': (True, False, 0),
+  'yaw': (False, True, 0),
+}
+
+
+def build_channel_model(channel, config):
+  """Builds the discrete model of one channel.
+
+  Returns a dict with the state space matrices, where the state is laid out as
+  platform states first, then vestibular states:
+
+    x[k+1] = A x[k] + B u[k] + Br r[k]
+    e[k+1] = C x[k+1] + D u[k] + E r[k]     (perceived error)
+    z[k]   = Cz x[k]                        (constrained outputs)
+    z[N]   = Cz_terminal x[N]               (terminal constraints)
+  """
+  translation, rotation, sign = CHANNEL_KINDS[channel]
+  tau_o = config['vestibular']['otolith_tau']
+  tau_c = config['vestibular']['canal_tau']
+  w = config['weights']
+  limits = config['limits']
+
+  names = []
+  if translation:
+    names += ['p', 'v']
+  if rotation:
+    names += ['ang']
+  if translation:
+    names += ['op', 'ov']   # otolith, platform & vehicle
+  if rotation:
+    names += ['cp', 'cv']   # canal, platform & vehicle
+  inputs = (['a'] if translation else []) + (['w'] if rotation else [])
+  refs = (['fr'] if translation else []) + (['wr'] if rotation else [])
+  errors = (['f'] if translation else []) + (['w'] if rotation else [])
+  n, m, nr, ne = len(names), len(inputs), len(refs), len(errors)
+  si = {name: i for i, name in enumerate(names)}
+  ui = {name: i for i, name in enumerate(inputs)}
+  ri = {name: i for i, name in enumerate(refs)}
+
+  Ac = numpy.zeros((n, n))
+  Bc = numpy.zeros((n, m))
+  Brc = numpy.zeros((n, nr))
+  C = numpy.zeros((ne, n))
+  D = numpy.zeros((ne, m))
+  E = numpy.zeros((ne, nr))
+  row = 0
+  if translation:
+    Ac[si['p'], si['v']] = 1
+    Bc[si['v'], ui['a']] = 1
+    # otolith: tau * d(op)/dt = f - op, with f = a + sign * g * ang
+    Ac[si['op'], si['op']] = -1 / tau_o
+    Bc[si['op'], ui['a']] = 1 / tau_o
+    if rotation:
+      Ac[si['op'], si['ang']] = sign * G / tau_o
+    Ac[si['ov'], si['ov']] = -1 / tau_o
+    Brc[si['ov'], ri['fr']] = 1 / tau_o
+    C[row, si['op']] = 1
+    C[row, si['ov']] = -1
+    row = row + 1
+  if rotation:
+    Bc[si['ang'], ui['w']] = 1
+    # canal: perceived = w - c, tau * dc/dt = w - c
+    Ac[si['cp'], si['cp']] = -1 / tau_c
+    Bc[si['cp'], ui['w']] = 1 / tau_c
+    Ac[si['cv'], si['cv']] = -1 / tau_c
+    Brc[si['cv'], ri['wr']] = 1 / tau_c
+    C[row, si['cp']] = -1
+    C[row, si['cv']] = 1
+    D[row, ui['w']] = 1
+    E[row, ri['wr']] = -1
+
+  # zero-order hold discretization of inputs and references together
+  dt = 1 / config['freq']
+  M = numpy.zeros((n + m + nr, n + m + nr))
+  M[:n, :n] = Ac
+  M[:n, n:n + m] = Bc
+  M[:n, n + m:] = Brc
+  Md = scipy.linalg.expm(M * dt)
+
+  Cz = []
+  z_max = []
+  Cz_terminal = []
+  z_terminal_max = []
+  W = numpy.zeros(n)
+  if translation:
+    Cz += [numpy.eye(n)[si['p']], numpy.eye(n)[si['v']]]
+    z_max += [limits['position'], limits['velocity']]
+    # being almost at rest at the end of the horizon keeps the next tick feasible
+    Cz_terminal.append(numpy.eye(n)[si['v']])
+    z_terminal_max.append(limits['terminal_velocity'])
+    W[si['p']] = w['position']
+    W[si['v']] = w['velocity']
+  if rotation:
+    Cz.append(numpy.eye(n)[si['ang']])
+    z_max.append(numpy.deg2rad(limits['angle']))
+    W[si['ang']] = w['angle']
+  u_max = (([limits['accel']] if translation else []) +
+           ([numpy.deg2rad(limits['rate'])] if rotation else []))
+  Q = ([w['force']] if translation else []) + ([w['rotate']] if rotation else [])
+  R = ([w['input_accel']] if translation else []) + ([w['input_rate']] if rotation else [])
+
+  return {
+    'names': names,
+    'A': Md[:n, :n],
+    'B': Md[:n, n:n + m],
+    'Br': Md[:n, n + m:],
+    'C': C,
+    'D': D,
+    'E': E,
+    'Cz': numpy.array(Cz),
+    'z_max': numpy.array(z_max),
+    'Cz_terminal': numpy.array(Cz_terminal).reshape(-1, n),
+    'z_terminal_max': numpy.array(z_terminal_max),
+    'u_max': numpy.array(u_max),
+    'Q': numpy.array(Q),
+    'R': numpy.array(R),
+    'W': W,
+    'translation': translation,
+    'rotation': rotation,
+  }
+
+
+class CondensedQP():
+  """Condensed horizon QP of one channel:
+
+    min 1/2 U'HU + q'U   s.t.   l <= A_con U <= u
+    q = Fx x0 + FR R,    l, u = bounds -/+ (Gx x0 + GR R)
+  """
+
+  # ADMM settings, the step size rho adapts within a ladder of prefactored values
+  RHO_LADDER = [0.03, 0.1, 0.3, 1.0, 3.0]
+  SIGMA = 1e-6
+  ALPHA = 1.6
+
+  def __init__(self, model, horizon):
+    N = horizon
+    A, B, Br = model['A'], model['B'], model['Br']
+    n, m = B.shape
+    nr = Br.shape[1]
+    self.model = model
+    self.horizon = N
+    self.n, self.m, self.nr = n, m, nr
+
+    # predicted states x[1..N]
+    Sx = numpy.zeros((N * n, n))
+    Su = numpy.zeros((N * n, N * m))
+    Sr = numpy.zeros((N * n, N * nr))
+    power = numpy.eye(n)
+    powers = [power]
+    for k in range(N):
+      power = A.dot(power)
+      powers.append(power)
+      Sx[k * n:(k + 1) * n] = power
+    for k in range(N):
+      for j in range(k + 1):
+        Su[k * n:(k + 1) * n, j * m:(j + 1) * m] = powers[k - j].dot(B)
+        Sr[k * n:(k + 1) * n, j * nr:(j + 1) * nr] = powers[k - j].dot(Br)
+
+    I_N = numpy.eye(N)
+    C_bar = numpy.kron(I_N, model['C'])
+    D_bar = numpy.kron(I_N, model['D'])
+    E_bar = numpy.kron(I_N, model['E'])
+    Cz_bar = numpy.kron(I_N, model['Cz'])
+    Q_bar = numpy.kron(I_N, numpy.diag(model['Q']))
+    R_bar = numpy.kron(I_N, numpy.diag(model['R']))
+    W_bar = numpy.kron(I_N, numpy.diag(model['W']))
+
+    Mu = C_bar.dot(Su) + D_bar
+    self.H = 2 * (Mu.T.dot(Q_bar).dot(Mu) + R_bar + Su.T.dot(W_bar).dot(Su))
+    self.Fx = 2 * (Mu.T.dot(Q_bar).dot(C_bar).dot(Sx) + Su.T.dot(W_bar).dot(Sx))
+    self.FR = 2 * (Mu.T.dot(Q_bar).dot(C_bar.dot(Sr) + E_bar) + Su.T.dot(W_bar).dot(Sr))
+
+    Cz_terminal = numpy.zeros((len(model['z_terminal_max']), N * n))
+    Cz_terminal[:, (N - 1) * n:] = model['Cz_terminal']
+    Cz_all = numpy.vstack([Cz_bar, Cz_terminal])
+    self.A_con = numpy.vstack([numpy.eye(N * m), Cz_all.dot(Su)])
+    self.Gx = numpy.vstack([numpy.zeros((N * m, n)), Cz_all.dot(Sx)])
+    self.GR = numpy.vstack([numpy.zeros((N * m, N * nr)), Cz_all.dot(Sr)])
+    self.bound = numpy.concatenate([
+      numpy.tile(model['u_max'], N),
+      numpy.tile(model['z_max'], N),
+      model['z_terminal_max']])
+
+    self._build_scaled()
+
+  def _build_scaled(self, iterations=15):
+    """Ruiz equilibration of the KKT matrix, the solver works in scaled space:
+
+      U = Ds Us,   A_s = Es A_con Ds,   H_s = c Ds H Ds,   q_s = c Ds q
+    """
+    H, A = self.H, self.A_con
+    size, rows = A.shape[1], A.shape[0]
+    Ds = numpy.ones(size)
+    Es = numpy.ones(rows)
+    H_s, A_s = H, A
+    for _ in range(iterations):
+      norms = numpy.concatenate([
+        numpy.maximum(numpy.max(numpy.abs(H_s), axis=0), numpy.max(numpy.abs(A_s), axis=0)),
+        numpy.max(numpy.abs(A_s), axis=1)])
+      scale = 1 / numpy.sqrt(numpy.maximum(norms, 1e-8))
+      d, e = scale[:size], scale[size:]
+      H_s = d[:, None] * H_s * d[None, :]
+      A_s = e[:, None] * A_s * d[None, :]
+      Ds, Es = Ds * d, Es * e
+    c = 1 / numpy.mean(numpy.max(numpy.abs(H_s), axis=0))
+
+    self.Ds, self.Es = Ds, Es
+    self.H_s = c * H_s
+    self.A_s = A_s
+    self.Fx_s = c * Ds[:, None] * self.Fx
+    self.FR_s = c * Ds[:, None] * self.FR
+    self.Gx_s = Es[:, None] * self.Gx
+    self.GR_s = Es[:, None] * self.GR
+    self.bound_s = Es * self.bound
+    # the ADMM linear system only depends on rho, invert it once per rho
+    self.K_inv = [numpy.linalg.inv(self.H_s + self.SIGMA * numpy.eye(size) + rho * self.A_s.T.dot(self.A_s))
+                  for rho in self.RHO_LADDER]
+
+
+@functools.lru_cache(maxsize=16)
+def _get_condensed_qps(config_json):
+  config = json.loads(config_json)
+  return {channel: CondensedQP(build_channel_model(channel, config), config['horizon'])
+          for channel in CHANNELS}
+
+
+def get_condensed_qps(config):
+  """Condensed QPs of all channels, cached per parameter set."""
+  return _get_condensed_qps(json.dumps(config, sort_keys=True))
+
+
+class AdmmSolver():
+  """Warm-started ADMM (OSQP-style) on a cached CondensedQP, in scaled space."""
+
+  def __init__(self, qp, eps=1e-3, feas_tol=1e-2):
+    self.qp = qp
+    self.eps = eps
+    self.feas_tol = feas_tol
+    self.U = numpy.zeros(qp.A_s.shape[1])
+    self.z = numpy.zeros(qp.A_s.shape[0])
+    self.y = numpy.zeros(qp.A_s.shape[0])
+    self.rho_index = 1
+    self.feasible_plan = None
+    # steps the feasible plan was shifted since it was found
+    self.plan_age = 0
+
+  def snapshot(self):
+    return (self.U, self.z, self.y, self.rho_index, self.feasible_plan, self.plan_age)
+
+  def restore(self, snapshot):
+    self.U, self.z, self.y, self.rho_index, self.feasible_plan, self.plan_age = snapshot
+
+  def shift(self):
+    """Moves the previous solution one step forward as the warm start."""
+    m = self.qp.m
+    self.U = numpy.concatenate([self.U[m:], self.U[-m:]])
+    self.z = self.qp.A_s.dot(self.U)
+    if self.feasible_plan is not None:
+      # beyond the checked horizon the plan holds still rather than keep
+      # accelerating
+      self.feasible_plan = numpy.concatenate([self.feasible_plan[m:], numpy.zeros(m)])
+      self.plan_age = self.plan_age + 1
+
+  def neutral_input(self, x0):
+    """Input braking the platform back to neutral, within the input bounds."""
+    model = self.qp.model
+    si = {name: i for i, name in enumerate(model['names'])}
+    u = []
+    if model['translation']:
+      u.append(-NEUTRAL_OMEGA ** 2 * x0[si['p']] - 2 * NEUTRAL_OMEGA * x0[si['v']])
+    if model['rotation']:
+      u.append(-NEUTRAL_OMEGA * x0[si['ang']])
+    return numpy.clip(u, -model['u_max'], model['u_max'])
+
+  def solve(self, x0, R, deadline, max_iter):
+    """Returns (first input, iterations, converged, used fallback).
+
+    The fallback is the last feasible plan while it is within the horizon,
+    then a return to neutral.
+    """
+    qp = self.qp
+    sigma, alpha = qp.SIGMA, qp.ALPHA
+    rho = qp.RHO_LADDER[self.rho_index]
+    K_inv = qp.K_inv[self.rho_index]
+    q = qp.Fx_s.dot(x0) + qp.FR_s.dot(R)
+    offset = qp.Gx_s.dot(x0) + qp.GR_s.dot(R)
+    l = -qp.bound_s - offset
+    u = qp.bound_s - offset
+    A_s = qp.A_s
+
+    U, z, y = self.U, numpy.clip(self.z, l, u), self.y
+    converged = False
+    iterations = 0
+    while iterations < max_iter:
+      iterations = iterations + 1
+      U_tilde = K_inv.dot(sigma * U - q + A_s.T.dot(rho * z - y))
+      z_tilde = A_s.dot(U_tilde)
+      U = alpha * U_tilde + (1 - alpha) * U
+      z_relaxed = alpha * z_tilde + (1 - alpha) * z
+      z_prev = z
+      z = numpy.clip(z_relaxed + y / rho, l, u)
+      y = y + rho * (z_relaxed - z)
+      if iterations % 5 == 0:
+        # relative to the bounds, so tight rows are held to the same accuracy
+        r_prim = numpy.max(numpy.abs(A_s.dot(U) - z) / qp.bound_s)
+        r_dual = numpy.max(numpy.abs(rho * A_s.T.dot(z - z_prev)))
+        if r_prim < self.eps and r_dual < self.eps:
+          converged = True
+          break
+        if time.perf_counter() > deadline:
+          break
+        # balance the residuals by moving along the rho ladder
+        index = self.rho_index
+        if r_prim > 10 * r_dual and index < len(qp.RHO_LADDER) - 1:
+          index = index + 1
+        elif r_dual > 10 * r_prim and index > 0:
+          index = index - 1
+        if index != self.rho_index:
+          self.rho_index = index
+          rho = qp.RHO_LADDER[index]
+          K_inv = qp.K_inv[index]
+    self.U, self.z, self.y = U, z, y
+
+    # feasibility is judged on the unscaled constraints
+    plan = qp.Ds * U
+    z = qp.A_con.dot(plan) + qp.Gx.dot(x0) + qp.GR.dot(R)
+    violation = float(numpy.max((numpy.abs(z) - qp.bound) / qp.bound))
+    fallback = False
+    if violation <= self.feas_tol:
+      self.feasible_plan = plan
+      self.plan_age = 0
+    elif self.feasible_plan is not None and self.plan_age < qp.horizon:
+      plan = self.feasible_plan
+      fallback = True
+    elif self.feasible_plan is not None:
+      return self.neutral_input(x0), iterations, converged, True
+    else:
+      # nothing feasible yet, at least respect the input bounds
+      plan = numpy.clip(plan, -qp.bound[:len(plan)], qp.bound[:len(plan)])
+      fallback = True
+    return plan[:qp.m], iterations, converged, fallback
+
+
+class SolveStats():
+  def __init__(self, size=500):
+    self.times = numpy.zeros(size)
+    self.iterations = numpy.zeros(size)
+    self.ticks = 0
+    self.deadline_misses = 0
+    self.fallbacks = 0
+    self.not_converged = 0
+
+  def add(self, elapsed_ms, iterations):
+    index = self.ticks % len(self.times)
+    self.times[index] = elapsed_ms
+    self.iterations[index] = iterations
+    self.ticks = self.ticks + 1
+
+  def to_dict(self):
+    count = min(self.ticks, len(self.times))
+    times = self.times[:count] if count > 0 else numpy.zeros(1)
+    iterations = self.iterations[:count] if count > 0 else numpy.zeros(1)
+    return {
+      'ticks': self.ticks,
+      'deadline_misses': self.deadline_misses,
+      'fallbacks': self.fallbacks,
+      'not_converged': self.not_converged,
+      'solve_ms': {
+        'last': float(self.times[(self.ticks - 1) % len(self.times)]) if self.ticks > 0 else 0,
+        'mean': float(numpy.mean(times)),
+        'p50': float(numpy.percentile(times, 50)),
+        'p99': float(numpy.percentile(times, 99)),
+        'max': float(numpy.max(times)),
+      },
+      'iterations_mean': float(numpy.mean(iterations)),
+    }
+
+
+class MpcCueing():
+  def __init__(self, config):
+    self.config = copy.deepcopy(config)
+    self.qps = get_condensed_qps(self.config)
+    self.solvers = {channel: AdmmSolver(qp) for channel, qp in self.qps.items()}
+    self.states = {channel: numpy.zeros(qp.n) for channel, qp in self.qps.items()}
+    self.stats = SolveStats()
+
+  def reset(self):
+    for channel, qp in self.qps.items():
+      self.solvers[channel] = AdmmSolver(qp)
+      self.states[channel] = numpy.zeros(qp.n)
+
+  def snapshot(self):
+    # solver and plant arrays are replaced on every step, never written in place
+    return ({channel: solver.snapshot() for channel, solver in self.solvers.items()},
+            dict(self.states))
+
+  def restore(self, snapshot):
+    solvers, states = snapshot
+    for channel, solver_snapshot in solvers.items():
+      self.solvers[channel].restore(solver_snapshot)
+    self.states = dict(states)
+
+  def digest(self):
+    """Hash of the state rounded to 1e-9, stable while the platform rests."""
+    solvers, states = self.snapshot()
+    h = hashlib.sha1()
+    for channel in CHANNELS:
+      U, z, y, rho_index, feasible_plan, plan_age = solvers[channel]
+      for value in (states[channel], U, z, y, feasible_plan):
+        if value is not None:
+          # adding 0.0 turns -0.0 into 0.0
+          h.update((numpy.round(value, 9) + 0.0).tobytes())
+      h.update(bytes([rho_index, min(plan_age, 255)]))
+    return h.hexdigest()
+
+  def references(self, data):
+    """Per channel reference [f, w] from a [x, y, z, alpha, beta, gamma] signal."""
+    scale = self.config['scale']
+    movement = numpy.asarray(data[0:3], dtype=float) * scale['movement']
+    rotate = numpy.asarray(data[3:6], dtype=float) * scale['rotate']
+    return {
+      'x': numpy.array([movement[0], rotate[1]]),
+      'y': numpy.array([movement[1], rotate[0]]),
+      'z': numpy.array([movement[2]]),
+      'yaw': numpy.array([rotate[2]]),
+    }
+
+  def step(self, data, preview=None, deadline_ms=None):
+    """Advances one tick.
+
+    Args:
+      data: current [x, y, z, alpha, beta, gamma] signal.
+      preview: optional list of upcoming signals. When given, the horizon
+        tracks them instead of holding the current reference.
+      deadline_ms: overrides the configured solve deadline.
+
+    Returns:
+      [s_x, s_y, s_z, theta_alpha, theta_beta, theta_gamma]
+    """
+    start = time.perf_counter()
+    if deadline_ms == None:
+      deadline_ms = self.config['deadline_ms']
+    deadline = start + deadline_ms / 1000
+    horizon = self.config['horizon']
+
+    current = self.references(data)
+    if preview:
+      upcoming = [self.references(d) for d in preview[:horizon]]
+      while len(upcoming) < horizon:
+        upcoming.append(upcoming[-1])
+    iterations = 0
+    missed = False
+    for channel in CHANNELS:
+      qp = self.qps[channel]
+      solver = self.solvers[channel]
+      if preview:
+        R = numpy.concatenate([current[channel]] + [r[channel] for r in upcoming[:horizon - 1]])
+      else:
+        R = numpy.tile(current[channel], horizon)
+      solver.shift()
+      u0, n_iter, converged, fallback = solver.solve(
+        self.states[channel], R, deadline, self.config['max_iter'])
+      iterations = iterations + n_iter
+      if not converged:
+        self.stats.not_converged = self.stats.not_converged + 1
+        missed = missed or time.perf_counter() > deadline
+      if fallback:
+        self.stats.fallbacks = self.stats.fallbacks + 1
+      model = qp.model
+      self.states[channel] = (model['A'].dot(self.states[channel]) +
+                              model['B'].dot(u0) + model['Br'].dot(current[channel]))
+
+    if missed:
+      self.stats.deadline_misses = self.stats.deadline_misses + 1
+    self.stats.add((time.perf_counter() - start) * 1000, iterations)
+    return self.pose()
+
+  def pose(self):
+    def state(channel, name):
+      return float(self.states[channel][self.qps[channel].model['names'].index(name)])
+    return [
+      state('x', 'p'),
+      state('y', 'p'),
+      state('z', 'p'),
+      state('y', 'ang'),
+      state('x', 'ang'),
+      state('yaw', 'ang'),
+    ]
+
+  def run(self, samples, start=0, stop=None, snapshot_every=None):
+    """Runs a known trajectory, previewing the upcoming samples over the
+    horizon. Meant for offline use, so each solve may take a whole tick.
+
+    Args:
+      samples: the whole trajectory.
+      start: index of the first sample to run, the state must be the one
+        before it.
+      stop: index of the sample to stop before, None to run to the end.
+        Samples after it are still previewed.
+      snapshot_every: when given, the state before every sample whose index
+        is a multiple of it is kept as well.
+
+    Returns:
+      list of poses, one per sample run, and with `snapshot_every` the list
+      of snapshots, the first one the state before sample 0
+    """
+    samples = list(samples)
+    budget_ms = 1000 / self.config['freq']
+    poses = []
+    snapshots = []
+    for index in range(start, len(samples) if stop == None else stop):
+      if snapshot_every != None and index % snapshot_every == 0:
+        snapshots.append(self.snapshot())
+      poses.append(self.step(samples[index], preview=samples[index + 1:], deadline_ms=budget_ms))
+    if snapshot_every != None:
+      return poses, snapshots
+    return poses
@@ -0,0 +1,88 @@
+import copy
+import json
+import logging
+
+from hexi.plugin.MCAPlugin import MCAPlugin
+from plugins.mca_mpc import mpc
+
+_logger = logging.getLogger(__name__)
+
+# samples between the snapshots kept of a precomputed script, an interrupted
+# script replays fewer samples than that to where it stopped
+SNAPSHOT_INTERVAL = 5
+
+
+class PluginMCAMpc(MCAPlugin):
+
+  def __init__(self):
+    super().__init__()
+    self.cueing = None
+    self.config_default = copy.deepcopy(mpc.DEFAULT_CONFIG)
+
+  def rebuild(self):
+    # condensed QP matrices are cached per parameter set, so switching back
+    # to a previous config is cheap
+    self.cueing = mpc.MpcCueing(self.config)
+
+  def load(self):
+    super().load()
+
+    self.rebuild()
+
+  def load_web(self):
+    super().load_web()
+    from sanic import response
+
+    @self.bp.route('/api/config', methods=['GET'])
+    async def get_config(request):
+      return response.json({ 'code': 200, 'data': self.config })
+
+    @self.bp.route('/api/config', methods=['POST'])
+    async def set_config(request):
+      try:
+        config = copy.deepcopy(self.config)
+        config.update(request.json)
+        mpc.get_condensed_qps(config)
+        self.config = config
+        self.rebuild()
+        self.save_config()
+        return response.json({ 'code': 200 })
+      except Exception as e:
+        _logger.exception('Save config failed')
+        return response.json({ 'code': 400, 'reason': str(e) })
+
+    @self.bp.route('/api/stats', methods=['GET'])
+    async def get_stats(request):
+      stats = self.cueing.stats.to_dict()
+      stats['budget_ms'] = 1000 / self.config['freq']
+      stats['deadline_ms'] = self.config['deadline_ms']
+      return response.json({ 'code': 200, 'data': stats })
+
+  def handle_input_signal(self, data):
+    pose = self.cueing.step(data)
+    self.emit_mca_signal(data, pose)
+
+  def script_entry_state(self):
+    key = (json.dumps(self.cueing.config, sort_keys=True), self.cueing.digest())
+    return key, (self.cueing.config, self.cueing.snapshot())
+
+  def precompute_script(self, samples, snapshot):
+    # scripted segments are fully known, so the whole horizon is previewed.
+    # the copy shares the cached QPs, live solve stats are left untouched
+    config, entry = snapshot
+    scratch = mpc.MpcCueing(config)
+    scratch.restore(entry)
+    poses, snapshots = scratch.run(samples, snapshot_every=SNAPSHOT_INTERVAL)
+    return { 'samples': samples, 'poses': poses, 'snapshots': snapshots, 'exit': scratch.snapshot() }
+
+  def handle_precomputed_signal(self, data, result, index):
+    self.emit_mca_signal(data, result['poses'][index])
+
+  def finish_script(self, result, played):
+    if played >= len(result['samples']):
+      self.cueing.restore(result['exit'])
+    else:
+      # interrupted, replay the few played samples after the last snapshot
+      start = played // SNAPSHOT_INTERVAL * SNAPSHOT_INTERVAL
+      self.cueing.restore(result['snapshots'][played // SNAPSHOT_INTERVAL])
+      self.cueing.run(result['samples'], start=start, stop=played)
@@ -3,8 +3,8 @@ import asyncio
 import logging
 import numpy
 
-from sanic import response
 from hexi.plugin.OutputPlugin import OutputPlugin
+from hexi.util import broadcast
 
 _logger = logging.getLogger(__name__)
 
@@ -14,21 +14,11 @@ class PluginOutputStewartVisualize(OutputPlugin):
   def __init__(self):
     super().__init__()
     self.configurable = True
-    self.connected_clients = set()
+    self.signal_broadcaster = broadcast.WebSocketBroadcaster()
 
   def handle_motion_signal(self, input_signal, motion_signal):
-    data_to_send = json.dumps(motion_signal)
-    for client in self.connected_clients:
-      asyncio.ensure_future(client.send(data_to_send))
+    self.signal_broadcaster.send(json.dumps(motion_signal))
 
-  def load(self):
-    super().load()
-
-    @self.bp.websocket('/api/signal')
-    async def signal_feed(request, ws):
-      try:
-        self.connected_clients.add(ws)
-        while True:
-          await ws.recv()
-      finally:
-        self.connected_clients.remove(ws)
+  def load_web(self):
+    super().load_web()
+    self.signal_broadcaster.attach_ws_endpoint(self.bp, '/api/signal')